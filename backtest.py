@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Backtesting
+Turns trading signals into positions, PnL, Sharpe ratio, drawdown and turnover, and
+sweeps thousands of signal rule sets at once by broadcasting over (parameters x time).
+"""
+
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from market_predictor import DEFAULT_SIGNAL_RULES, _crossed
+
+SWEEP_PARAMETERS = ('fast_ma', 'slow_ma', 'rsi_oversold', 'rsi_overbought', 'bb_std', 'min_votes')
+METRICS = ('total_return', 'sharpe', 'max_drawdown', 'turnover', 'trades')
+
+
+def positions_from_signals(buy, sell, allow_short=False):
+    """Hold +1 after a BUY and 0 (or -1 with ``allow_short``) after a SELL until the next signal.
+    
+    ``buy`` and ``sell`` are boolean arrays with time on the last axis; the
+    position starts flat. The position follows whichever signal fired last,
+    found with a running ``maximum.accumulate`` of signal indices, so any
+    leading batch axes are handled without a Python loop.
+    """
+    buy, sell = np.broadcast_arrays(buy, sell)
+    steps = np.arange(buy.shape[-1], dtype=np.int32)
+    last_buy = np.maximum.accumulate(np.where(buy, steps, np.int32(-1)), axis=-1)
+    last_sell = np.maximum.accumulate(np.where(sell, steps, np.int32(-1)), axis=-1)
+    positions = (last_buy > last_sell).astype(np.int8)
+    if allow_short:
+        positions -= last_sell > last_buy
+    return positions
+
+
+def backtest_positions(close, positions, cost=0.0005, periods_per_year=252):
+    """Metrics of trading ``positions`` (decided at each close) on the next bar's return.
+    
+    A position taken at bar t earns the return from t to t+1, so there is no
+    look-ahead. Every change of position pays ``cost`` (a fraction, e.g.
+    0.0005 = 5 bps) per unit traded. Leading axes of ``positions`` are
+    separate strategies; returns a dict of metric arrays over those axes
+    plus the per-bar strategy ``returns``.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    positions = np.asarray(positions)
+    traded = np.abs(np.diff(positions, axis=-1, prepend=0))
+    
+    returns = np.empty(positions.shape, dtype=np.float64)
+    returns[..., 0] = 0.0
+    np.multiply(positions[..., :-1], close[1:] / close[:-1] - 1, out=returns[..., 1:])
+    returns -= cost * traded
+    
+    equity = np.cumprod(1 + returns, axis=-1)
+    drawdown = equity / np.maximum.accumulate(equity, axis=-1) - 1
+    mean, std = returns.mean(axis=-1), returns.std(axis=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = np.where(std > 0, mean / std * np.sqrt(periods_per_year), 0.0)[()]
+    
+    return {
+        'total_return': equity[..., -1] - 1,
+        'sharpe': sharpe,
+        'max_drawdown': drawdown.min(axis=-1),
+        'turnover': traded.sum(axis=-1),
+        'trades': np.count_nonzero(traded, axis=-1),
+        'returns': returns,
+    }
+
+
+def backtest_signals(close, signals, cost=0.0005, allow_short=False, periods_per_year=252):
+    """Backtest a BUY/SELL/HOLD label series such as ``generate_trading_signals(...)['Signal']``."""
+    signals = np.asarray(signals)
+    positions = positions_from_signals(signals == 'BUY', signals == 'SELL', allow_short)
+    return backtest_positions(close, positions, cost, periods_per_year)
+
+
+def parameter_grid(**values):
+    """Cartesian product of parameter lists as a DataFrame with one row per rule set.
+    
+    Keys are those of ``SWEEP_PARAMETERS``; missing ones take their
+    ``DEFAULT_SIGNAL_RULES`` value. Moving averages are given as window
+    lengths (``fast_ma=[5, 10]``). Combinations whose fast window is not
+    shorter than the slow one, or whose ``rsi_oversold`` is not below
+    ``rsi_overbought`` (``sweep`` would count both RSI votes), are dropped.
+    """
+    unknown = set(values) - set(SWEEP_PARAMETERS)
+    if unknown:
+        raise ValueError(f"Unknown sweep parameters: {sorted(unknown)}")
+    
+    defaults = {name: DEFAULT_SIGNAL_RULES[name] for name in SWEEP_PARAMETERS}
+    defaults['fast_ma'], defaults['slow_ma'] = _window(defaults['fast_ma']), _window(defaults['slow_ma'])
+    options = [list(np.atleast_1d(values.get(name, defaults[name]))) for name in SWEEP_PARAMETERS]
+    grid = pd.DataFrame(list(itertools.product(*options)), columns=list(SWEEP_PARAMETERS))
+    valid = (grid['fast_ma'] < grid['slow_ma']) & (grid['rsi_oversold'] < grid['rsi_overbought'])
+    return grid[valid].reset_index(drop=True)
+
+
+def sweep(indicators, grid, cost=0.0005, allow_short=False, periods_per_year=252, chunk_size=256,
+          warmup=None):
+    """Evaluate every rule set of ``grid`` on one symbol and rank them by Sharpe ratio.
+    
+    ``indicators`` is a ``calculate_technical_indicators`` frame. Each vote
+    of ``signal_votes`` depends on only one or two parameters, so it is
+    computed once per distinct value (one MA crossover per window pair, one
+    RSI mask per threshold, ...) as int8 arrays, and a rule set's votes are
+    a sum of gathered rows. Rule sets are evaluated ``chunk_size`` at a time
+    as (chunk, T) arrays, and rule sets that end up with identical
+    positions are backtested once.
+    """
+    warmup = DEFAULT_SIGNAL_RULES['warmup'] if warmup is None else warmup
+    close = indicators['Close'].to_numpy(dtype=np.float64)
+    bb_middle = indicators['BB_Middle'].to_numpy(dtype=np.float64)
+    bb_width = (indicators['BB_Upper'].to_numpy(dtype=np.float64) - bb_middle) / 2  # One rolling std
+    rsi = indicators['RSI'].to_numpy(dtype=np.float64)
+    
+    # MA crossovers, one row per distinct (fast, slow) window pair
+    pairs, pair_index = np.unique(grid[['fast_ma', 'slow_ma']].to_numpy(dtype=int), axis=0, return_inverse=True)
+    windows = np.unique(pairs)
+    moving_averages = np.stack([_moving_average(indicators, window) for window in windows])
+    ma_buy, ma_sell = _crossed(moving_averages[np.searchsorted(windows, pairs[:, 0])],
+                               moving_averages[np.searchsorted(windows, pairs[:, 1])])
+    macd_buy, macd_sell = _crossed(indicators['MACD'].to_numpy(dtype=np.float64),
+                                   indicators['MACD_Signal'].to_numpy(dtype=np.float64))
+    
+    def votes_by_value(name, vote):
+        values, index = np.unique(grid[name].to_numpy(dtype=np.float64), return_inverse=True)
+        return vote(values[:, None]).astype(np.int8), index.ravel()
+    
+    rsi_buy, oversold_index = votes_by_value('rsi_oversold', lambda level: rsi < level)
+    rsi_sell, overbought_index = votes_by_value('rsi_overbought', lambda level: rsi > level)
+    bb_buy, bb_index = votes_by_value('bb_std', lambda k: close < bb_middle - k * bb_width)
+    bb_sell, _ = votes_by_value('bb_std', lambda k: close > bb_middle + k * bb_width)
+    pair_index = pair_index.ravel()
+    min_votes = grid['min_votes'].to_numpy()[:, None]
+    
+    metrics = {name: np.empty(len(grid), dtype=np.int64 if name == 'trades' else np.float64) for name in METRICS}
+    seen = {}
+    for start in range(0, len(grid), chunk_size):
+        rows = np.arange(start, min(start + chunk_size, len(grid)))
+        buy_votes = (ma_buy[pair_index[rows]].astype(np.int8) + macd_buy + rsi_buy[oversold_index[rows]]
+                     + bb_buy[bb_index[rows]])
+        sell_votes = (ma_sell[pair_index[rows]].astype(np.int8) + macd_sell + rsi_sell[overbought_index[rows]]
+                      + bb_sell[bb_index[rows]])
+        
+        # Same precedence as label_signals: BUY wins, nothing fires during warm-up
+        buy = buy_votes >= min_votes[rows]
+        sell = ~buy & (sell_votes >= min_votes[rows])
+        buy[:, :warmup] = False
+        sell[:, :warmup] = False
+        positions = positions_from_signals(buy, sell, allow_short)
+        
+        # Backtest each distinct position path once
+        keys = [row.tobytes() for row in positions]
+        new = {}
+        for row, key in zip(rows, keys):
+            if key not in seen and key not in new:
+                new[key] = row - start
+        if new:
+            results = backtest_positions(close, positions[list(new.values())], cost, periods_per_year)
+            for i, key in enumerate(new):
+                seen[key] = tuple(results[name][i] for name in METRICS)
+        for row, key in zip(rows, keys):
+            for name, value in zip(METRICS, seen[key]):
+                metrics[name][row] = value
+    
+    ranked = grid.assign(**metrics)
+    return ranked.sort_values('sharpe', ascending=False, kind='stable').reset_index(drop=True)
+
+
+def _window(name):
+    return int(str(name).removeprefix('MA_'))
+
+
+def _moving_average(indicators, window):
+    column = f'MA_{window}'
+    if column in indicators:
+        return indicators[column].to_numpy(dtype=np.float64)
+    return indicators['Close'].rolling(window=window).mean().to_numpy(dtype=np.float64)
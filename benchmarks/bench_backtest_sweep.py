@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Parameter sweep benchmark
+Times backtest.sweep over a large signal rule grid against a per-rule loop on a sample of it.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backtest import backtest_signals, parameter_grid, sweep
+from market_predictor import MarketTrendPredictor, label_signals, signal_votes
+
+
+def main():
+    """Sweep roughly 10k rule sets and extrapolate the per-rule loop from a sample."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--bars', type=int, default=5000)
+    parser.add_argument('--chunk-size', type=int, default=256)
+    parser.add_argument('--loop-sample', type=int, default=50)
+    args = parser.parse_args()
+    
+    predictor = MarketTrendPredictor()
+    predictor.data['SYM'] = predictor.generate_synthetic_data('SYM', days=args.bars)
+    indicators = predictor.calculate_technical_indicators(predictor.data['SYM'])
+    grid = parameter_grid(fast_ma=[3, 5, 8, 10, 12, 15], slow_ma=[20, 30, 40, 50, 100],
+                          rsi_oversold=[20, 25, 30, 35, 40], rsi_overbought=[60, 65, 70, 75, 80],
+                          bb_std=[1.5, 2, 2.5, 3], min_votes=[1, 2, 3, 4])
+    
+    start = time.perf_counter()
+    sweep(indicators, grid, chunk_size=args.chunk_size)
+    sweep_time = time.perf_counter() - start
+    
+    # Baseline: one signal_votes + backtest call per rule set
+    close = indicators['Close'].to_numpy()
+    start = time.perf_counter()
+    for _, row in grid.head(args.loop_sample).iterrows():
+        buy_votes, sell_votes = signal_votes(
+            close, indicators['Close'].rolling(int(row['fast_ma'])).mean().to_numpy(),
+            indicators['Close'].rolling(int(row['slow_ma'])).mean().to_numpy(),
+            indicators['MACD'].to_numpy(), indicators['MACD_Signal'].to_numpy(), indicators['RSI'].to_numpy(),
+            indicators['BB_Upper'].to_numpy(), indicators['BB_Lower'].to_numpy(),
+            row['rsi_oversold'], row['rsi_overbought'])
+        backtest_signals(close, label_signals(buy_votes, sell_votes, row['min_votes']))
+    loop_time = (time.perf_counter() - start) / args.loop_sample * len(grid)
+    
+    print(f"{'mode':<10} {'rule_sets':>10} {'bars':>8} {'seconds':>10}")
+    print(f"{'sweep':<10} {len(grid):>10} {args.bars:>8} {sweep_time:>10.2f}")
+    print(f"{'loop (est)':<10} {len(grid):>10} {args.bars:>8} {loop_time:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Global vs per-symbol LSTM benchmark
+Compares total training time and mean test RMSE of one shared model against one model per symbol.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from market_predictor import MarketTrendPredictor
+
+
+def main():
+    """Train both variants on the same synthetic universe and print a comparison."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--symbols', type=int, default=10)
+    parser.add_argument('--days', type=int, default=730)
+    parser.add_argument('--epochs', type=int, default=5)
+    parser.add_argument('--batch-size', type=int, default=32)
+    args = parser.parse_args()
+    
+    predictor = MarketTrendPredictor()
+    symbols = [f'SYM{i:04d}' for i in range(args.symbols)]
+    predictor.data = predictor.generate_synthetic_universe(symbols, days=args.days)
+    
+    start = time.perf_counter()
+    per_symbol_rmse = [predictor.train_lstm_model(symbol, epochs=args.epochs, batch_size=args.batch_size)['test_rmse']
+                       for symbol in symbols]
+    per_symbol_time = time.perf_counter() - start
+    
+    global_results = predictor.train_global_lstm_model(symbols, epochs=args.epochs, batch_size=args.batch_size)
+    
+    print(f"{'mode':<12} {'train_s':>10} {'mean_test_rmse':>16} {'models':>8}")
+    print(f"{'per-symbol':<12} {per_symbol_time:>10.2f} {np.mean(per_symbol_rmse):>16.4f} {len(symbols):>8}")
+    print(f"{'global':<12} {global_results['training_time']:>10.2f} {global_results['test_rmse']:>16.4f} {1:>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Memory footprint benchmark
+Compares the resident bytes of per-symbol float64 frames, indicator frames and training results
+against a float32 PanelStore with float32 indicators and no retained result arrays.
+Training results are measured with tracemalloc over one-epoch runs of the first --train-symbols.
+"""
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from indicator_cache import IndicatorCache
+from market_data import synthetic_universe
+from market_predictor import MarketTrendPredictor
+from panel import PanelStore
+
+
+def frame_bytes(frame):
+    return int(frame.memory_usage(index=True, deep=True).sum())
+
+
+def retained_results(predictor, symbols, lookback_window):
+    """Bytes that the ``train_lstm_model`` results of ``symbols`` keep alive, measured with tracemalloc.
+    
+    The predictor keeps the models themselves, so what is freed when the
+    results are dropped is what they alone hold (arrays, history, metrics).
+    """
+    tracemalloc.start()
+    results = [predictor.train_lstm_model(symbol, epochs=1, lookback_window=lookback_window)
+               for symbol in symbols]
+    gc.collect()
+    kept, _ = tracemalloc.get_traced_memory()
+    del results
+    gc.collect()
+    dropped, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return kept - dropped
+
+
+def footprint(predictor, lookback_window, train_symbols):
+    """Bytes held by the data and indicator frames of every symbol and by the results of ``train_symbols``."""
+    data = predictor.data.nbytes if isinstance(predictor.data, PanelStore) else sum(
+        frame_bytes(frame) for frame in predictor.data.values())
+    indicators = sum(frame_bytes(predictor.calculate_technical_indicators(predictor.data[symbol], symbol))
+                     for symbol in predictor.data)
+    results = retained_results(predictor, train_symbols, lookback_window)
+    return {'data': data, 'indicators': indicators, 'results': results, 'total': data + indicators + results}
+
+
+def main():
+    """Print the footprint of both representations for a synthetic universe."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--symbols', type=int, default=200)
+    parser.add_argument('--days', type=int, default=1500)
+    parser.add_argument('--lookback', type=int, default=60)
+    parser.add_argument('--train-symbols', type=int, default=4, help='symbols trained to measure results')
+    args = parser.parse_args()
+    
+    symbols = [f'SYM{i:04d}' for i in range(args.symbols)]
+    train_symbols = symbols[:args.train_symbols]
+    cache = IndicatorCache(max_bytes=0)
+    
+    baseline = MarketTrendPredictor(indicator_cache=cache)
+    baseline.data = synthetic_universe(symbols, days=args.days)
+    compact = MarketTrendPredictor(indicator_cache=cache, compact=True)
+    compact.data = PanelStore.from_frames(baseline.data)
+    
+    results = {'float64 frames': footprint(baseline, args.lookback, train_symbols),
+               'float32 panel': footprint(compact, args.lookback, train_symbols)}
+    print(f"{args.symbols} symbols x {args.days} days, results of {len(train_symbols)} trained symbols")
+    for name, result in results.items():
+        print(f"{name:>15}: " + ', '.join(f"{key} {value / 2**20:8.2f} MiB" for key, value in result.items()))
+    print(f"Reduction: {results['float64 frames']['total'] / results['float32 panel']['total']:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+NumPy vs TensorFlow inference benchmark
+Compares forecast latency and peak RSS of the NumPy LSTM runtime against the TensorFlow rollout.
+Each runtime is measured in its own child process so import cost and memory are not shared.
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def run_numpy(args):
+    """Load exported weights and forecast every symbol with NumPy only."""
+    import numpy as np
+    from numpy_lstm import NumpyLSTMRuntime
+    
+    start = time.perf_counter()
+    runtime = NumpyLSTMRuntime({symbol: os.path.join(args.workdir, f'{symbol}.npz') for symbol in args.symbol_list})
+    closes = dict(np.load(os.path.join(args.workdir, 'closes.npz')))
+    load_time = time.perf_counter() - start
+    
+    runtime.forecast(closes, days_ahead=args.days_ahead)
+    start = time.perf_counter()
+    for _ in range(args.repeats):
+        runtime.forecast(closes, days_ahead=args.days_ahead)
+    return load_time, (time.perf_counter() - start) / args.repeats
+
+
+def run_tensorflow(args):
+    """Train-free TF path: build the same models, load the exported weights and forecast."""
+    import numpy as np
+    from market_predictor import MarketTrendPredictor
+    
+    start = time.perf_counter()
+    predictor = MarketTrendPredictor()
+    predictor.data = predictor.generate_synthetic_universe(args.symbol_list, days=args.days)
+    for symbol in args.symbol_list:
+        model = predictor.build_lstm_model((args.lookback, 1))
+        with np.load(os.path.join(args.workdir, f'{symbol}.npz')) as arrays:
+            weights = []
+            for k in range(int(arrays['n_lstm_layers'])):
+                weights += [arrays[f'lstm{k}_kernel'], arrays[f'lstm{k}_recurrent_kernel'], arrays[f'lstm{k}_bias']]
+            model.set_weights(weights + [arrays['dense_kernel'], arrays['dense_bias']])
+        predictor.models[f'{symbol}_lstm'] = model
+        predictor.scalers[f'{symbol}_lstm'] = _scaler(predictor.data[symbol]['Close'])
+    load_time = time.perf_counter() - start
+    
+    predictor.predict_future_prices_batch(args.symbol_list, days_ahead=args.days_ahead, lookback_window=args.lookback)
+    start = time.perf_counter()
+    for _ in range(args.repeats):
+        predictor.predict_future_prices_batch(args.symbol_list, days_ahead=args.days_ahead,
+                                              lookback_window=args.lookback)
+    return load_time, (time.perf_counter() - start) / args.repeats
+
+
+def _scaler(close):
+    from sklearn.preprocessing import MinMaxScaler
+    return MinMaxScaler().fit(close.to_frame())
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process.
+    
+    ``ru_maxrss`` survives ``exec`` on Linux and would report the parent's peak,
+    so ``VmHWM`` is preferred where available.
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def prepare(args):
+    """Export randomly initialised models and their close histories to ``args.workdir``."""
+    import numpy as np
+    from market_predictor import MarketTrendPredictor
+    from numpy_lstm import export_lstm_model
+    
+    predictor = MarketTrendPredictor()
+    data = predictor.generate_synthetic_universe(args.symbol_list, days=args.days)
+    closes = {}
+    for symbol in args.symbol_list:
+        model = predictor.build_lstm_model((args.lookback, 1))
+        export_lstm_model(model, _scaler(data[symbol]['Close']), os.path.join(args.workdir, f'{symbol}.npz'))
+        closes[symbol] = data[symbol]['Close'].to_numpy()
+    np.savez(os.path.join(args.workdir, 'closes.npz'), **closes)
+
+
+def main():
+    """Prepare exported models once, then time each runtime in a fresh child process."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--symbols', type=int, default=10)
+    parser.add_argument('--days', type=int, default=730)
+    parser.add_argument('--lookback', type=int, default=60)
+    parser.add_argument('--days-ahead', type=int, default=30)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--runtime', choices=['numpy', 'tensorflow'], help=argparse.SUPPRESS)
+    parser.add_argument('--workdir', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    args.symbol_list = [f'SYM{i:04d}' for i in range(args.symbols)]
+    
+    if args.runtime:
+        start = time.perf_counter()
+        load_time, forecast_time = (run_numpy if args.runtime == 'numpy' else run_tensorflow)(args)
+        print(json.dumps({
+            'runtime': args.runtime,
+            'total_s': time.perf_counter() - start,
+            'load_s': load_time,
+            'forecast_s': forecast_time,
+            'max_rss_mb': peak_rss_mb(),
+            'tensorflow_imported': 'tensorflow' in sys.modules,
+        }))
+        return
+    
+    with tempfile.TemporaryDirectory() as workdir:
+        args.workdir = workdir
+        prepare(args)
+        
+        print(f"{'runtime':<12} {'load_s':>8} {'forecast_ms':>12} {'max_rss_mb':>11} {'tf_loaded':>10}")
+        for runtime in ('numpy', 'tensorflow'):
+            output = subprocess.run(
+                [sys.executable, __file__, '--runtime', runtime, '--workdir', workdir,
+                 '--symbols', str(args.symbols), '--days', str(args.days), '--lookback', str(args.lookback),
+                 '--days-ahead', str(args.days_ahead), '--repeats', str(args.repeats)],
+                check=True, capture_output=True, text=True).stdout
+            row = json.loads(output.strip().splitlines()[-1])
+            print(f"{runtime:<12} {row['load_s']:>8.2f} {row['forecast_s'] * 1000:>12.1f} "
+                  f"{row['max_rss_mb']:>11.0f} {str(row['tensorflow_imported']):>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Out-of-core training benchmark
+Trains on synthetic minute bars stored in a MarketDataCache, once through the in-memory
+train_lstm_model path and once through train_lstm_model_from_cache, each in a fresh child
+process, and reports how far peak RSS grows during training for growing history lengths.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from bench_numpy_runtime import peak_rss_mb
+
+
+def write_minute_bars(cache, symbol, rows, chunk_rows=1_000_000):
+    """Write ``rows`` synthetic one-minute bars (a driftless random walk) to ``cache`` in slices."""
+    import numpy as np
+    import pandas as pd
+    from market_data import symbol_seed
+    
+    rng = np.random.default_rng(symbol_seed(symbol))
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 5e-4, rows)))
+    index = pd.date_range(end=pd.Timestamp('2025-01-01'), periods=rows, freq='min')
+    for start in range(0, rows, chunk_rows):
+        stop = min(start + chunk_rows, rows)
+        price = close[start:stop]
+        frame = pd.DataFrame({'Open': price, 'High': price * 1.0005, 'Low': price * 0.9995, 'Close': price,
+                              'Volume': rng.integers(1000, 100000, stop - start)}, index=index[start:stop])
+        cache.append(symbol, frame)
+
+
+def run(args):
+    """Train one model in this process; returns time, test RMSE and peak RSS before training."""
+    from market_data import MarketDataCache
+    from market_predictor import MarketTrendPredictor
+    
+    cache = MarketDataCache(args.workdir)
+    predictor = MarketTrendPredictor()
+    predictor.build_lstm_model((args.lookback, 1))  # Import TensorFlow and build once before the baseline
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    if args.mode == 'in_memory':
+        predictor.data['SYM'] = cache.read('SYM')
+        results = predictor.train_lstm_model('SYM', epochs=args.epochs, batch_size=args.batch_size,
+                                             lookback_window=args.lookback)
+    else:
+        results = predictor.train_lstm_model_from_cache('SYM', cache, epochs=args.epochs, batch_size=args.batch_size,
+                                                        lookback_window=args.lookback, chunk_rows=args.chunk_rows)
+    return time.perf_counter() - start, float(results['test_rmse']), baseline
+
+
+def main():
+    """Write each history once, then train it in both modes in child processes."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, nargs='+', default=[25_000, 100_000])
+    parser.add_argument('--epochs', type=int, default=1)
+    parser.add_argument('--batch-size', type=int, default=512)
+    parser.add_argument('--lookback', type=int, default=60)
+    parser.add_argument('--chunk-rows', type=int, default=65536)
+    parser.add_argument('--modes', nargs='+', default=['in_memory', 'out_of_core'])
+    parser.add_argument('--mode', help=argparse.SUPPRESS)
+    parser.add_argument('--workdir', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.mode:
+        train_time, test_rmse, baseline = run(args)
+        print(json.dumps({'train_s': train_time, 'test_rmse': test_rmse, 'baseline_rss_mb': baseline,
+                          'max_rss_mb': peak_rss_mb()}))
+        return
+    
+    from market_data import MarketDataCache
+    
+    print(f"{'rows':>10} {'mode':<12} {'train_s':>8} {'test_rmse':>10} {'max_rss_mb':>11} {'growth_mb':>10}")
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as workdir:
+            write_minute_bars(MarketDataCache(workdir), 'SYM', rows)
+            for mode in args.modes:
+                output = subprocess.run(
+                    [sys.executable, __file__, '--mode', mode, '--workdir', workdir, '--epochs', str(args.epochs),
+                     '--batch-size', str(args.batch_size), '--lookback', str(args.lookback),
+                     '--chunk-rows', str(args.chunk_rows)],
+                    check=True, capture_output=True, text=True).stdout
+                row = json.loads(output.strip().splitlines()[-1])
+                print(f"{rows:>10} {mode:<12} {row['train_s']:>8.1f} {row['test_rmse']:>10.4f} "
+                      f"{row['max_rss_mb']:>11.0f} {row['max_rss_mb'] - row['baseline_rss_mb']:>10.0f}")
+
+
+if __name__ == '__main__':
+    main()
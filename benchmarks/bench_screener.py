@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Screener benchmark
+Times the panel screener over a whole synthetic universe against the per-symbol
+generate_trading_signals loop (timed on a sample and extrapolated to the universe).
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from indicator_cache import IndicatorCache
+from market_data import synthetic_universe
+from market_predictor import MarketTrendPredictor
+from panel import PanelStore
+from screener import screen
+
+
+def main():
+    """Print screener and per-symbol loop timings."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--symbols', type=int, default=5000)
+    parser.add_argument('--days', type=int, default=730)
+    parser.add_argument('--sample', type=int, default=100, help='symbols timed in the per-symbol loop')
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+    
+    symbols = [f'SYM{i:04d}' for i in range(args.symbols)]
+    predictor = MarketTrendPredictor(indicator_cache=IndicatorCache(max_bytes=0))
+    predictor.data = synthetic_universe(symbols, days=args.days)
+    panel = PanelStore.from_frames(predictor.data)
+    
+    timings = {}
+    for name, data in (('panel screen (frames)', predictor.data), ('panel screen (PanelStore)', panel)):
+        best = float('inf')
+        for _ in range(args.repeats):
+            start = time.perf_counter()
+            snapshot = screen(data)
+            best = min(best, time.perf_counter() - start)
+        timings[name] = best
+    
+    sample = symbols[:args.sample]
+    start = time.perf_counter()
+    for symbol in sample:
+        predictor.generate_trading_signals(symbol)
+    timings['per-symbol loop (extrapolated)'] = (time.perf_counter() - start) / len(sample) * len(symbols)
+    
+    print(f"{args.symbols} symbols x {args.days} days, signals: "
+          + ', '.join(f"{signal} {count}" for signal, count in snapshot['Signal'].value_counts().items()))
+    for name, seconds in timings.items():
+        print(f"{name:>30}: {seconds:8.3f}s")
+    print(f"Speedup: {timings['per-symbol loop (extrapolated)'] / timings['panel screen (PanelStore)']:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Synthetic data generator benchmark
+Times MarketTrendPredictor.generate_synthetic_universe across symbol and bar counts.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from market_predictor import MarketTrendPredictor
+
+
+def time_universe(predictor, n_symbols, n_bars, dtype, repeats=3):
+    """Best-of-``repeats`` wall time for one universe generation."""
+    symbols = [f'SYM{i:05d}' for i in range(n_symbols)]
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        predictor.generate_synthetic_universe(symbols, days=n_bars, dtype=dtype, as_frames=False)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    """Run the N x T scaling sweep and print a table."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--symbols', type=int, nargs='+', default=[1, 10, 100, 1000])
+    parser.add_argument('--bars', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--dtype', choices=['float64', 'float32'], default='float64')
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+    
+    predictor = MarketTrendPredictor()
+    
+    print(f"{'symbols':>8} {'bars':>8} {'seconds':>10} {'Mbars/s':>10}")
+    for n_symbols in args.symbols:
+        for n_bars in args.bars:
+            seconds = time_universe(predictor, n_symbols, n_bars, args.dtype, args.repeats)
+            throughput = n_symbols * n_bars / seconds / 1e6
+            print(f"{n_symbols:>8} {n_bars:>8} {seconds:>10.4f} {throughput:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Prediction service load test
+Fires concurrent forecast and signal requests at a prediction service (started in-process on
+synthetic data unless --url is given) and reports throughput, client-side latency
+percentiles and the server's batching metrics.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def get(url):
+    with urllib.request.urlopen(url, timeout=60) as response:
+        return json.loads(response.read())
+
+
+def client(base_url, symbols, deadline, signal_ratio, days, seed, latencies, errors):
+    """Issue requests back to back until ``deadline``."""
+    rng = random.Random(seed)
+    while time.perf_counter() < deadline:
+        symbol = rng.choice(symbols)
+        if rng.random() < signal_ratio:
+            url = f'{base_url}/signals?symbol={symbol}'
+        else:
+            url = f'{base_url}/forecast?symbol={symbol}&days={days}'
+        start = time.perf_counter()
+        try:
+            get(url)
+        except (urllib.error.URLError, OSError):
+            errors.append(url)
+        else:
+            latencies.append(time.perf_counter() - start)
+
+
+def main():
+    """Run the load test and print a summary."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('symbols', nargs='*', help='symbols to request (required with --url)')
+    parser.add_argument('--url', help='existing service, e.g. http://127.0.0.1:8000')
+    parser.add_argument('--n-symbols', type=int, default=20, help='synthetic symbols for the in-process service')
+    parser.add_argument('--epochs', type=int, default=1)
+    parser.add_argument('--lookback', type=int, default=30)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--signal-ratio', type=float, default=0.2)
+    parser.add_argument('--max-batch-size', type=int, default=64)
+    parser.add_argument('--max-delay-ms', type=float, default=5.0)
+    args = parser.parse_args()
+    
+    server = service = None
+    if args.url:
+        if not args.symbols:
+            parser.error('--url needs the symbols the service serves')
+        base_url = args.url.rstrip('/')
+        symbols = args.symbols
+    else:
+        from prediction_service import PredictionService, load_predictor, make_server
+        
+        symbols = args.symbols or [f'SYM{i:03d}' for i in range(args.n_symbols)]
+        predictor = load_predictor(symbols, synthetic=True, days=500, epochs=args.epochs,
+                                   lookback_window=args.lookback)
+        service = PredictionService(predictor, args.lookback, args.max_batch_size, args.max_delay_ms / 1000)
+        service.warm_up(args.days)
+        server = make_server(service, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f'http://127.0.0.1:{server.server_address[1]}'
+    
+    latencies, errors = [], []
+    deadline = time.perf_counter() + args.duration
+    threads = [threading.Thread(target=client, args=(base_url, symbols, deadline, args.signal_ratio, args.days,
+                                                     seed, latencies, errors))
+               for seed in range(args.concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    
+    metrics = get(f'{base_url}/metrics')
+    print(f"{len(latencies)} requests in {elapsed:.1f}s ({len(latencies) / elapsed:.1f} req/s), "
+          f"{len(errors)} errors, concurrency {args.concurrency}")
+    if latencies:
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+        print(f"Client latency: p50 {p50:.1f} ms, p95 {p95:.1f} ms, p99 {p99:.1f} ms")
+    print(f"Server: {metrics['batches']} batches, mean batch size {metrics['mean_batch_size']}, "
+          f"largest {metrics['largest_batch']}, max queue depth {metrics['max_queue_depth']}")
+    print(json.dumps(metrics['endpoints'], indent=2))
+    
+    if server is not None:
+        server.shutdown()
+        server.server_close()
+        service.close()
+
+
+if __name__ == '__main__':
+    main()
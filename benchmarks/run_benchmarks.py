@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Pipeline benchmark suite
+Times every MarketTrendPredictor stage on synthetic data across bar and symbol counts.
+Results (wall time, tracemalloc peak, throughput) are written as JSON; --compare flags
+regressions against a stored baseline and exits non-zero when any are found.
+The indicator cache is disabled for every stage except ``cached``, which times cache hits.
+``predict`` forecasts with one model per symbol, i.e. one rollout call per symbol.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from indicator_cache import IndicatorCache
+from market_predictor import MarketTrendPredictor
+
+MODEL_STAGES = ('train', 'predict')
+# Bumped whenever stages change meaning; baselines of another version must be regenerated
+SUITE_VERSION = 2
+
+
+def stage_synthetic(predictor, symbols, n_bars, args):
+    return lambda: predictor.generate_synthetic_universe(symbols, days=n_bars)
+
+
+def stage_indicators(predictor, symbols, n_bars, args):
+    return lambda: [predictor.calculate_technical_indicators(predictor.data[symbol]) for symbol in symbols]
+
+
+def stage_signals(predictor, symbols, n_bars, args):
+    return lambda: [predictor.generate_trading_signals(symbol) for symbol in symbols]
+
+
+def stage_cached(predictor, symbols, n_bars, args):
+    # Repeat signal requests served by a default-size indicator cache (hits once the warm-up filled it)
+    cached = MarketTrendPredictor()
+    cached.data = predictor.data
+    return lambda: [cached.generate_trading_signals(symbol) for symbol in symbols]
+
+
+def stage_prepare(predictor, symbols, n_bars, args):
+    return lambda: [predictor.prepare_lstm_data(predictor.data[symbol], args.lookback) for symbol in symbols]
+
+
+def stage_train(predictor, symbols, n_bars, args):
+    return lambda: [predictor.train_lstm_model(symbol, epochs=args.epochs, lookback_window=args.lookback)
+                    for symbol in symbols]
+
+
+def stage_predict(predictor, symbols, n_bars, args):
+    # Untrained models forecast exactly as fast as trained ones. One model per symbol: rollouts are not
+    # batched across symbols, so this times N sequential calls
+    for symbol in symbols:
+        _, _, scaler = predictor.prepare_lstm_data(predictor.data[symbol], args.lookback)
+        predictor.models[f'{symbol}_lstm'] = predictor.build_lstm_model((args.lookback, 1))
+        predictor.scalers[f'{symbol}_lstm'] = scaler
+    return lambda: predictor.predict_future_prices_batch(symbols, days_ahead=args.days_ahead,
+                                                         lookback_window=args.lookback)
+
+
+STAGES = {
+    'synthetic': stage_synthetic,
+    'indicators': stage_indicators,
+    'signals': stage_signals,
+    'cached': stage_cached,
+    'prepare': stage_prepare,
+    'train': stage_train,
+    'predict': stage_predict,
+}
+
+
+def measure(fn, repeats):
+    """Best-of-``repeats`` wall time, then one extra run under tracemalloc for the peak.
+    
+    tracemalloc sees Python and NumPy allocations but not TensorFlow's own
+    allocator, so peaks for the model stages cover only the host-side work.
+    """
+    fn()  # Warm-up: imports, graph tracing and caches are not part of the measurement
+    best = float('inf')
+    for _ in range(repeats):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    
+    gc.collect()
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def run_suite(args):
+    """Run every selected (stage, symbols, bars) case and return the result records."""
+    results = []
+    for n_symbols in args.symbols:
+        for n_bars in args.bars:
+            stages = [stage for stage in args.stages
+                      if n_symbols * n_bars <= args.max_symbol_bars
+                      and (stage not in MODEL_STAGES
+                           or (n_symbols <= args.model_max_symbols and n_bars <= args.model_max_bars))]
+            if not stages:
+                continue
+            
+            symbols = [f'SYM{i:05d}' for i in range(n_symbols)]
+            # No indicator cache: the warm-up call would otherwise turn every timed run into cache hits
+            predictor = MarketTrendPredictor(indicator_cache=IndicatorCache(max_bytes=0))
+            predictor.data = predictor.generate_synthetic_universe(symbols, days=n_bars)
+            for stage in stages:
+                fn = STAGES[stage](predictor, symbols, n_bars, args)
+                seconds, peak = measure(fn, args.model_repeats if stage in MODEL_STAGES else args.repeats)
+                record = {
+                    'stage': stage,
+                    'symbols': n_symbols,
+                    'bars': n_bars,
+                    'seconds': seconds,
+                    'peak_mb': peak / 2**20,
+                    'bars_per_s': n_symbols * n_bars / seconds,
+                }
+                results.append(record)
+                print(f"{stage:<11} {n_symbols:>7} {n_bars:>9} {seconds:>10.4f} {record['peak_mb']:>10.1f} "
+                      f"{record['bars_per_s'] / 1e6:>10.3f}", flush=True)
+            del predictor
+    return results
+
+
+def compare(results, baseline, tolerance, min_seconds):
+    """Return the cases that got slower or used more memory than ``baseline`` allows.
+    
+    A case regresses when its time or peak memory exceeds the baseline by
+    more than ``tolerance`` (a fraction). Cases faster than ``min_seconds``
+    in the baseline are too noisy to judge on time and are only checked for
+    memory. Raises ``ValueError`` for a baseline recorded by another
+    ``SUITE_VERSION``, whose stages are not comparable.
+    """
+    version = baseline['meta'].get('suite_version', 1)
+    if version != SUITE_VERSION:
+        raise ValueError(f"baseline was recorded by suite version {version}, not {SUITE_VERSION}")
+    
+    reference = {(r['stage'], r['symbols'], r['bars']): r for r in baseline['results']}
+    regressions = []
+    for record in results:
+        base = reference.get((record['stage'], record['symbols'], record['bars']))
+        if base is None:
+            continue
+        time_ratio = record['seconds'] / base['seconds']
+        memory_ratio = record['peak_mb'] / base['peak_mb'] if base['peak_mb'] > 0 else 1.0
+        slower = base['seconds'] >= min_seconds and time_ratio > 1 + tolerance
+        bigger = memory_ratio > 1 + tolerance
+        if slower or bigger:
+            regressions.append({**record, 'time_ratio': time_ratio, 'memory_ratio': memory_ratio})
+    return regressions
+
+
+def main():
+    """Run the sweep, write JSON and optionally compare with a baseline."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--stages', nargs='+', choices=list(STAGES), default=list(STAGES))
+    parser.add_argument('--symbols', type=int, nargs='+', default=[1, 10, 100, 1000, 5000])
+    parser.add_argument('--bars', type=int, nargs='+', default=[1000, 10000, 100000, 1000000])
+    parser.add_argument('--max-symbol-bars', type=float, default=2e7,
+                        help='skip cases whose symbols * bars exceed this')
+    parser.add_argument('--model-max-symbols', type=int, default=10)
+    parser.add_argument('--model-max-bars', type=int, default=10000)
+    parser.add_argument('--epochs', type=int, default=1)
+    parser.add_argument('--lookback', type=int, default=60)
+    parser.add_argument('--days-ahead', type=int, default=30)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--model-repeats', type=int, default=1, help='timed repeats for train and predict')
+    parser.add_argument('--quick', action='store_true', help='small sweep for smoke runs')
+    parser.add_argument('--output', help='write results to this JSON file')
+    parser.add_argument('--compare', metavar='BASELINE', help='JSON file from an earlier --output run')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    parser.add_argument('--min-seconds', type=float, default=0.01)
+    args = parser.parse_args()
+    if args.quick:
+        args.symbols, args.bars, args.repeats = [1, 10], [1000, 10000], 1
+        args.model_max_symbols, args.model_max_bars = 1, 1000
+    
+    print(f"{'stage':<11} {'symbols':>7} {'bars':>9} {'seconds':>10} {'peak_mb':>10} {'Mbars/s':>10}")
+    results = run_suite(args)
+    report = {
+        'meta': {
+            'suite_version': SUITE_VERSION,
+            'timestamp': time.time(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'args': {name: value for name, value in vars(args).items() if name not in ('output', 'compare')},
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        try:
+            regressions = compare(results, baseline, args.tolerance, args.min_seconds)
+        except ValueError as e:
+            print(f"{args.compare}: {e}; regenerate it with --output")
+            sys.exit(2)
+        for record in regressions:
+            print(f"REGRESSION {record['stage']} symbols={record['symbols']} bars={record['bars']}: "
+                  f"time x{record['time_ratio']:.2f}, memory x{record['memory_ratio']:.2f}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {args.compare} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == '__main__':
+    main()
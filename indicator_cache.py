@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Indicator Cache
+In-memory LRU cache of technical indicator frames keyed by symbol, a fingerprint of the
+input bars and the indicator parameters, bounded by total frame size in bytes.
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+# With Copy-on-Write (always on from pandas 3) a shallow copy is safe to hand out: in-place edits copy first
+COPY_ON_WRITE = int(pd.__version__.split('.')[0]) >= 3
+
+
+class IndicatorCache:
+    """Memory-bounded LRU cache of indicator DataFrames with hit/miss statistics.
+    
+    Entries are evicted least recently used first once the summed
+    ``memory_usage`` of the stored frames exceeds ``max_bytes``; a frame
+    larger than the whole budget is not stored. ``max_bytes=0`` disables
+    caching while still counting misses; callers then skip ``make_key`` and
+    pass a None key, so the input frame is never hashed. Lookups and
+    stores are thread-safe.
+    """
+    
+    def __init__(self, max_bytes=64 * 2**20):
+        """Create an empty cache holding at most ``max_bytes`` of frames."""
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+    
+    @property
+    def enabled(self):
+        """Whether frames can be stored at all (``max_bytes`` > 0)."""
+        return self.max_bytes > 0
+    
+    @staticmethod
+    def fingerprint(data):
+        """Content hash of a frame's values, index and column names."""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+        digest.update(json.dumps([str(column) for column in data.columns]).encode('utf-8'))
+        return digest.hexdigest()
+    
+    def make_key(self, symbol, data, params):
+        """Cache key for indicators of ``data`` (belonging to ``symbol``) computed with ``params``."""
+        return symbol, self.fingerprint(data), json.dumps(params, sort_keys=True, default=str)
+    
+    def get(self, key):
+        """Cached frame for ``key`` (marked most recently used), or None; a None key always misses."""
+        with self._lock:
+            entry = self._entries.get(key) if key is not None else None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+    
+    def put(self, key, frame):
+        """Store ``frame`` under ``key`` and evict old entries if over budget; a None key is not stored."""
+        if key is None:
+            return
+        size = int(frame.memory_usage(index=True).sum())
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self.bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (frame, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.bytes -= evicted_size
+                self.evictions += 1
+    
+    def invalidate(self, symbol=None):
+        """Drop every entry, or only those of ``symbol``."""
+        with self._lock:
+            for key in [key for key in self._entries if symbol is None or key[0] == symbol]:
+                self.bytes -= self._entries.pop(key)[1]
+    
+    def stats(self):
+        """Hit/miss counts, hit rate, evictions, entry count and bytes in use."""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'entries': len(self._entries),
+            'bytes': self.bytes,
+            'max_bytes': self.max_bytes,
+        }
+    
+    def __len__(self):
+        return len(self._entries)
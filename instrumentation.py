@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Instrumentation
+Timing spans, counters and peak-memory samples for the analysis pipeline, exported
+through pluggable sinks (JSON lines, Prometheus text exposition) with an optional
+cProfile hook. NULL_INSTRUMENTATION is the no-op default when disabled.
+"""
+
+import cProfile
+import json
+import pstats
+import re
+import resource
+import sys
+import time
+
+
+def peak_rss_bytes():
+    """Peak resident set size of this process so far."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024  # Linux reports KiB
+
+
+class Span:
+    """Context manager that times one stage and records it on exit."""
+    
+    __slots__ = ('instrumentation', 'name', 'labels', 'start', 'duration', 'parent')
+    
+    def __init__(self, instrumentation, name, labels):
+        self.instrumentation = instrumentation
+        self.name = name
+        self.labels = labels
+        self.start = None
+        self.duration = None
+        self.parent = None
+    
+    def __enter__(self):
+        self.instrumentation._enter(self)
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.duration = time.perf_counter() - self.start
+        self.instrumentation._exit(self, error=exc_type is not None)
+        return False
+
+
+class Instrumentation:
+    """Collects spans and counters for one run and exports them to sinks.
+    
+    Spans nest: each record keeps the name of its enclosing span. Every
+    span samples the process peak RSS when it closes, which costs one
+    ``getrusage`` call. With ``profile=True`` a ``cProfile`` profiler runs
+    while any span is open; read it with ``profile_stats`` or
+    ``dump_profile``.
+    """
+    
+    enabled = True
+    
+    def __init__(self, sinks=(), profile=False):
+        """Create an instrumentation that exports to ``sinks`` on ``flush``."""
+        self.sinks = list(sinks)
+        self.spans = []
+        self.counters = {}
+        self._stack = []
+        self._profiler = cProfile.Profile() if profile else None
+    
+    def span(self, name, **labels):
+        """Time a block: ``with instrumentation.span('train', symbol='AAPL'): ...``."""
+        return Span(self, name, labels)
+    
+    def record_span(self, name, duration, **labels):
+        """Record a span measured elsewhere, e.g. in a worker process."""
+        self.spans.append(self._record(name, labels, duration, parent=None, error=False))
+    
+    def count(self, name, value=1, **labels):
+        """Add ``value`` to the counter ``name`` with the given labels."""
+        key = (name, tuple(sorted(labels.items())))
+        self.counters[key] = self.counters.get(key, 0) + value
+    
+    def merge(self, spans, counters):
+        """Add spans and counters collected by another instrumentation, e.g. in a worker process.
+        
+        Top-level spans are nested under the span open here, as if they had
+        been recorded in this process.
+        """
+        parent = self._stack[-1].name if self._stack else None
+        for span in spans:
+            self.spans.append(span if span['parent'] is not None else {**span, 'parent': parent})
+        for key, value in counters.items():
+            self.counters[key] = self.counters.get(key, 0) + value
+    
+    def counter(self, name, **labels):
+        """Current value of a counter (0 if never incremented)."""
+        return self.counters.get((name, tuple(sorted(labels.items()))), 0)
+    
+    def flush(self):
+        """Export everything recorded so far to every sink."""
+        for sink in self.sinks:
+            sink.export(self.spans, self.counters)
+    
+    def profile_stats(self, sort='cumulative'):
+        """``pstats.Stats`` of the profiled spans, or None without ``profile=True``."""
+        if self._profiler is None:
+            return None
+        return pstats.Stats(self._profiler).sort_stats(sort)
+    
+    def dump_profile(self, path):
+        """Write the profile in ``pstats`` format (readable by snakeviz, pstats, etc.)."""
+        if self._profiler is not None:
+            self._profiler.dump_stats(path)
+    
+    def _enter(self, span):
+        span.parent = self._stack[-1].name if self._stack else None
+        if not self._stack and self._profiler is not None:
+            self._profiler.enable()
+        self._stack.append(span)
+    
+    def _exit(self, span, error):
+        self._stack.pop()
+        if not self._stack and self._profiler is not None:
+            self._profiler.disable()
+        self.spans.append(self._record(span.name, span.labels, span.duration, span.parent, error))
+    
+    @staticmethod
+    def _record(name, labels, duration, parent, error):
+        return {
+            'name': name,
+            'labels': labels,
+            'duration': duration,
+            'parent': parent,
+            'error': error,
+            'peak_rss_bytes': peak_rss_bytes(),
+            'timestamp': time.time(),
+        }
+
+
+class _NullSpan:
+    __slots__ = ()
+    duration = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class NullInstrumentation:
+    """Disabled instrumentation: every call is a no-op returning shared objects."""
+    
+    enabled = False
+    spans = ()
+    counters = {}
+    
+    def span(self, name, **labels):
+        return _NULL_SPAN
+    
+    def record_span(self, name, duration, **labels):
+        pass
+    
+    def count(self, name, value=1, **labels):
+        pass
+    
+    def merge(self, spans, counters):
+        pass
+    
+    def counter(self, name, **labels):
+        return 0
+    
+    def flush(self):
+        pass
+    
+    def profile_stats(self, sort='cumulative'):
+        return None
+    
+    def dump_profile(self, path):
+        pass
+
+
+NULL_INSTRUMENTATION = NullInstrumentation()
+
+
+class JsonLinesSink:
+    """Append one JSON object per span and per counter to a file."""
+    
+    def __init__(self, path):
+        self.path = path
+        self._written = 0
+    
+    def export(self, spans, counters):
+        """Write spans recorded since the last export, then a snapshot of every counter."""
+        with open(self.path, 'a') as f:
+            for span in spans[self._written:]:
+                f.write(json.dumps({'type': 'span', **span}, default=str) + '\n')
+            for (name, labels), value in counters.items():
+                f.write(json.dumps({'type': 'counter', 'name': name, 'labels': dict(labels), 'value': value,
+                                    'timestamp': time.time()}, default=str) + '\n')
+        self._written = len(spans)
+
+
+class PrometheusTextSink:
+    """Write spans and counters in the Prometheus text exposition format.
+    
+    Spans are aggregated per name and labels into ``<prefix>_span_seconds``
+    (sum/count, like a summary without quantiles) and the largest peak RSS
+    seen, so the file can be scraped via a textfile collector.
+    """
+    
+    def __init__(self, path, prefix='market_predictor'):
+        self.path = path
+        self.prefix = prefix
+    
+    def export(self, spans, counters):
+        """Rewrite ``path`` with the current totals."""
+        totals = {}
+        for span in spans:
+            key = tuple(sorted({'span': span['name'], **span['labels']}.items()))
+            total = totals.setdefault(key, {'sum': 0.0, 'count': 0, 'rss': 0})
+            total['sum'] += span['duration']
+            total['count'] += 1
+            total['rss'] = max(total['rss'], span['peak_rss_bytes'])
+        
+        lines = [f'# TYPE {self.prefix}_span_seconds summary']
+        for key, total in totals.items():
+            lines.append(f"{self.prefix}_span_seconds_sum{_labels(key)} {total['sum']:.6f}")
+            lines.append(f"{self.prefix}_span_seconds_count{_labels(key)} {total['count']}")
+        lines.append(f'# TYPE {self.prefix}_span_peak_rss_bytes gauge')
+        for key, total in totals.items():
+            lines.append(f"{self.prefix}_span_peak_rss_bytes{_labels(key)} {total['rss']}")
+        
+        for name in sorted({name for name, _ in counters}):
+            metric = f'{self.prefix}_{_metric_name(name)}_total'
+            lines.append(f'# TYPE {metric} counter')
+            for (counter_name, labels), value in counters.items():
+                if counter_name == name:
+                    lines.append(f'{metric}{_labels(labels)} {value}')
+        
+        with open(self.path, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+
+
+def _metric_name(name):
+    return re.sub(r'[^a-zA-Z0-9_]', '_', name)
+
+
+def _labels(items):
+    if not items:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in items)
+    return '{' + ','.join(f'{_metric_name(key)}="{value}"' for (key, _), value in zip(items, escaped)) + '}'
@@ -0,0 +1,466 @@
+#!/usr/bin/env python3
+"""
+Market Data
+Pluggable market data providers and a local columnar cache with incremental refresh.
+Each symbol is stored as one partition of raw column files that are memory-mapped on read.
+"""
+
+import json
+import os
+import random
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+def symbol_seed(symbol):
+    """Stable 32-bit seed for a symbol (unlike ``hash``, independent of PYTHONHASHSEED)."""
+    return zlib.crc32(str(symbol).encode('utf-8'))
+
+
+def synthetic_ohlcv_arrays(seeds, days, dtype=np.float64):
+    """Generate OHLCV arrays of shape (len(seeds), days), one generator per seed."""
+    n = len(seeds)
+    initial = np.empty(n)
+    log_growth = np.empty((n, days))
+    open_factor = np.empty((n, days))
+    high_factor = np.empty((n, days))
+    low_factor = np.empty((n, days))
+    volume = np.empty((n, days), dtype=np.int64)
+    
+    for i, seed in enumerate(seeds):
+        rng = np.random.default_rng(seed)
+        initial[i] = rng.uniform(50, 500)
+        log_growth[i] = rng.normal(0.001, 0.02, days)  # Daily returns
+        open_factor[i] = rng.uniform(0.98, 1.02, days)
+        high_factor[i] = rng.uniform(1.00, 1.05, days)
+        low_factor[i] = rng.uniform(0.95, 1.00, days)
+        volume[i] = rng.integers(1000000, 10000000, days)
+    
+    # Compound returns in log space; the first bar is the initial price.
+    log_growth[:, 0] = 0.0
+    np.log1p(np.maximum(log_growth, -0.999999), out=log_growth)
+    walk = np.log(initial)[:, None] + np.cumsum(log_growth, axis=1)
+    # Flooring every step at $1 is a reflected random walk in log space:
+    # lifting the path by its running minimum below zero reproduces
+    # ``price = max(price * (1 + ret), 1)`` without a per-bar loop.
+    walk -= np.minimum(np.minimum.accumulate(walk, axis=1), 0.0)
+    close = np.exp(walk)
+    
+    # Ensure OHLC consistency
+    open_ = close * open_factor
+    high = np.maximum(close * high_factor, np.maximum(open_, close))
+    low = np.minimum(close * low_factor, np.minimum(open_, close))
+    
+    return {
+        'Open': open_.astype(dtype, copy=False),
+        'High': high.astype(dtype, copy=False),
+        'Low': low.astype(dtype, copy=False),
+        'Close': close.astype(dtype, copy=False),
+        'Volume': volume,
+    }
+
+
+def synthetic_universe(symbols, days=730, dtype=np.float64, as_frames=True):
+    """Synthetic daily OHLCV frames ending today, keyed by symbol (see ``synthetic_ohlcv_arrays``)."""
+    symbols = list(symbols)
+    dates = pd.date_range(end=pd.Timestamp.now().normalize(), periods=days, freq='D')
+    fields = synthetic_ohlcv_arrays([symbol_seed(s) for s in symbols], days, dtype=dtype)
+    
+    if not as_frames:
+        return dates, fields
+    
+    return {
+        symbol: pd.DataFrame({name: values[i] for name, values in fields.items()}, index=dates)
+        for i, symbol in enumerate(symbols)
+    }
+
+
+class DataProvider:
+    """Source of OHLCV bars for a symbol.
+    
+    Providers that can serve several tickers in one request set
+    ``supports_batch`` and override ``fetch_batch``.
+    """
+    
+    supports_batch = False
+    
+    def fetch(self, symbol, start=None, period='2y'):
+        """Return an OHLCV DataFrame indexed by timestamp.
+        
+        When ``start`` is given only bars on or after it are required;
+        otherwise ``period`` of history is returned.
+        """
+        raise NotImplementedError
+    
+    def fetch_batch(self, symbols, period='2y'):
+        """Return ``{symbol: DataFrame}``; symbols that could not be fetched are left out."""
+        return {symbol: self.fetch(symbol, period=period) for symbol in symbols}
+
+
+class YFinanceProvider(DataProvider):
+    """Daily bars from Yahoo Finance.
+    
+    With ``batch=True`` ``fetch_many`` asks for several tickers per
+    ``yf.download`` request. Its frames hold only the OHLCV columns and, for
+    daily bars, a tz-naive index, unlike the tz-aware ``Ticker.history``
+    frames served by default, so batching is opt-in.
+    """
+    
+    def __init__(self, batch=False):
+        self.supports_batch = batch
+    
+    def fetch(self, symbol, start=None, period='2y'):
+        """Fetch history through ``yf.Ticker(symbol).history``."""
+        import yfinance as yf
+        
+        ticker = yf.Ticker(symbol)
+        if start is not None:
+            return ticker.history(start=start)
+        return ticker.history(period=period)
+    
+    def fetch_batch(self, symbols, period='2y'):
+        """Fetch several tickers with one ``yf.download`` request."""
+        import yfinance as yf
+        
+        data = yf.download(list(symbols), period=period, group_by='ticker', auto_adjust=True,
+                           threads=False, progress=False)
+        frames = {}
+        for symbol in symbols:
+            if symbol in data.columns.get_level_values(0):
+                frame = data[symbol][OHLCV_COLUMNS].dropna(how='all')
+                if len(frame) > 0:
+                    frames[symbol] = frame
+        return frames
+
+
+class SimulatedProvider(DataProvider):
+    """Offline stand-in provider serving synthetic bars with simulated latency and failures.
+    
+    ``fail_first`` makes the first N requests for every symbol fail
+    (transient errors), ``failure_rate`` fails requests at random and
+    ``fail_symbols`` always fail. Every request is recorded in ``calls``.
+    """
+    
+    def __init__(self, latency=0.0, failure_rate=0.0, fail_first=0, fail_symbols=(), supports_batch=False,
+                 days=730, seed=0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.fail_first = fail_first
+        self.fail_symbols = set(fail_symbols)
+        self.supports_batch = supports_batch
+        self.days = days
+        self.calls = []
+        self._attempts = {}
+        self._rng = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+    
+    def fetch(self, symbol, start=None, period='2y'):
+        """Return synthetic bars after sleeping ``latency`` seconds, or raise a simulated failure."""
+        self._request([symbol])
+        self._check(symbol)
+        data = synthetic_universe([symbol], days=self.days)[symbol]
+        return data if start is None else data[data.index >= pd.Timestamp(start)]
+    
+    def fetch_batch(self, symbols, period='2y'):
+        """Serve several symbols in one simulated request; failing symbols are left out."""
+        self._request(symbols)
+        healthy = []
+        for symbol in symbols:
+            try:
+                self._check(symbol)
+                healthy.append(symbol)
+            except ConnectionError:
+                pass
+        return synthetic_universe(healthy, days=self.days)
+    
+    def _request(self, symbols):
+        with self._lock:
+            self.calls.append(list(symbols))
+        if self.latency:
+            time.sleep(self.latency)
+    
+    def _check(self, symbol):
+        with self._lock:
+            attempt = self._attempts[symbol] = self._attempts.get(symbol, 0) + 1
+            unlucky = self._rng.random() < self.failure_rate
+        if symbol in self.fail_symbols or attempt <= self.fail_first or unlucky:
+            raise ConnectionError(f"simulated failure fetching {symbol}")
+
+
+def fetch_many(symbols, provider=None, cache=None, period='2y', max_workers=8, retries=2, backoff=0.5,
+               batch_size=50, fallback=None):
+    """Fetch many symbols concurrently with bounded concurrency and retries.
+    
+    Up to ``max_workers`` requests run at once on a thread pool. Failed
+    requests are retried ``retries`` times with jittered exponential backoff
+    starting at ``backoff`` seconds. Providers with ``supports_batch`` are
+    asked for ``batch_size`` tickers per request; symbols missing from a
+    batch are retried one by one. With a ``cache`` each symbol is refreshed
+    through it (falling back to stale cached bars on failure) and ``provider``
+    is ignored. Symbols that still fail use ``fallback(symbol)`` if given.
+    
+    Returns ``(data, report)`` where ``report[symbol]`` records the
+    ``source`` ('provider', 'cache', 'fallback' or 'failed'), ``latency``
+    in seconds, ``attempts``, ``rows`` and the last ``error``.
+    """
+    provider = provider if provider is not None else YFinanceProvider()
+    symbols = list(dict.fromkeys(symbols))
+    data, report = {}, {}
+    
+    def fetch_one(symbol):
+        start = time.perf_counter()
+        if cache is not None:
+            frame, attempts, error = _with_retries(lambda: _non_empty(cache.refresh(symbol, period)), retries, backoff)
+        else:
+            frame, attempts, error = _with_retries(lambda: _non_empty(provider.fetch(symbol, period=period)),
+                                                   retries, backoff)
+        return symbol, frame, {'latency': time.perf_counter() - start, 'attempts': attempts, 'error': error}
+    
+    def fetch_batch(batch):
+        start = time.perf_counter()
+        frames, attempts, error = _with_retries(lambda: provider.fetch_batch(batch, period=period), retries, backoff)
+        latency = time.perf_counter() - start
+        return {symbol: (frames[symbol], {'latency': latency, 'attempts': attempts, 'error': None, 'batch': True})
+                for symbol in batch if frames and symbol in frames and len(frames[symbol]) > 0}
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pending = symbols
+        if cache is None and provider.supports_batch and len(symbols) > 1:
+            batches = [symbols[i:i + batch_size] for i in range(0, len(symbols), batch_size)]
+            for fetched in pool.map(fetch_batch, batches):
+                for symbol, (frame, stats) in fetched.items():
+                    data[symbol] = frame
+                    report[symbol] = stats
+            pending = [symbol for symbol in symbols if symbol not in data]
+        
+        for symbol, frame, stats in pool.map(fetch_one, pending):
+            if frame is not None:
+                data[symbol] = frame
+            report[symbol] = stats
+    
+    for symbol in symbols:
+        stats = report[symbol]
+        cached = cache.read(symbol) if cache is not None and symbol not in data else None
+        if symbol in data:
+            stats['source'] = 'provider'
+        elif cached is not None and len(cached) > 0:
+            data[symbol] = cached
+            stats['source'] = 'cache'
+        elif fallback is not None:
+            data[symbol] = fallback(symbol)
+            stats['source'] = 'fallback'
+        else:
+            stats['source'] = 'failed'
+        stats['rows'] = len(data[symbol]) if symbol in data else 0
+    
+    return {symbol: data[symbol] for symbol in symbols if symbol in data}, report
+
+
+def _with_retries(fetch, retries, backoff):
+    """Call ``fetch`` up to ``retries + 1`` times; returns (result or None, attempts, last error)."""
+    error = None
+    for attempt in range(retries + 1):
+        if attempt > 0:
+            time.sleep(backoff * 2 ** (attempt - 1) * random.uniform(0.5, 1.0))
+        try:
+            return fetch(), attempt + 1, None
+        except Exception as e:
+            error = str(e)
+    return None, retries + 1, error
+
+
+def _non_empty(frame):
+    if frame is None or len(frame) == 0:
+        raise ValueError("no data returned")
+    return frame
+
+
+class MarketDataCache:
+    """On-disk columnar cache of OHLCV bars, one partition per symbol.
+    
+    A partition is a directory holding ``meta.json``, an int64 file of UTC
+    nanosecond timestamps and one raw file per column. Reads memory-map the
+    column files, so a warm start costs a metadata read per symbol. Refreshes
+    ask the provider only for bars after the last cached timestamp and append
+    them to the column files.
+    """
+    
+    def __init__(self, root, provider=None):
+        """Create a cache rooted at ``root`` backed by ``provider`` (Yahoo Finance by default)."""
+        self.root = root
+        self.provider = provider if provider is not None else YFinanceProvider()
+        os.makedirs(root, exist_ok=True)
+    
+    def symbols(self):
+        """List cached symbols."""
+        return sorted(meta['symbol'] for meta in map(self._read_meta_dir, os.listdir(self.root)) if meta)
+    
+    def read(self, symbol):
+        """Return the cached bars for ``symbol`` as memory-mapped columns, or None if not cached."""
+        meta = self._read_meta(symbol)
+        if meta is None:
+            return None
+        
+        path = self._partition(symbol)
+        rows = meta['rows']
+        index = pd.DatetimeIndex(self._map(os.path.join(path, 'index.bin'), 'int64', rows), tz='UTC')
+        if meta['tz'] is None:
+            index = index.tz_localize(None)
+        elif meta['tz'] != 'UTC':
+            index = index.tz_convert(meta['tz'])
+        
+        columns = {
+            column: self._map(os.path.join(path, f'{column}.bin'), dtype, rows)
+            for column, dtype in meta['columns'].items()
+        }
+        return pd.DataFrame(columns, index=index, copy=False)
+    
+    def rows(self, symbol):
+        """Number of cached bars for ``symbol`` (0 if not cached)."""
+        meta = self._read_meta(symbol)
+        return 0 if meta is None else meta['rows']
+    
+    def read_column(self, symbol, column, start=0, stop=None):
+        """Rows ``start:stop`` of one cached column, read into a new array.
+        
+        Unlike ``read`` this does not map the file, so scanning a long
+        history in slices keeps only the current slice resident.
+        """
+        meta = self._read_meta(symbol)
+        if meta is None:
+            raise KeyError(symbol)
+        dtype = np.dtype(meta['columns'][column])
+        stop = meta['rows'] if stop is None else min(stop, meta['rows'])
+        count = max(stop - start, 0)
+        if count == 0:
+            return np.empty(0, dtype=dtype)
+        return np.fromfile(os.path.join(self._partition(symbol), f'{column}.bin'), dtype=dtype, count=count,
+                           offset=start * dtype.itemsize)
+    
+    def last_timestamp(self, symbol):
+        """Timestamp of the newest cached bar, or None."""
+        meta = self._read_meta(symbol)
+        if meta is None or meta['rows'] == 0:
+            return None
+        last = np.fromfile(os.path.join(self._partition(symbol), 'index.bin'), dtype='int64', count=1,
+                           offset=(meta['rows'] - 1) * 8)[0]
+        timestamp = pd.Timestamp(int(last), tz='UTC')
+        return timestamp.tz_localize(None) if meta['tz'] is None else timestamp.tz_convert(meta['tz'])
+    
+    def write(self, symbol, data):
+        """Replace the partition for ``symbol`` with ``data``."""
+        data = self._normalize(data)
+        path = self._partition(symbol)
+        os.makedirs(path, exist_ok=True)
+        
+        self._write_meta(symbol, {
+            'symbol': symbol,
+            'rows': 0,
+            'tz': None if data.index.tz is None else str(data.index.tz),
+            'columns': {column: str(data[column].dtype) for column in data.columns},
+        })
+        for name in ['index'] + list(data.columns):
+            open(os.path.join(path, f'{name}.bin'), 'wb').close()
+        return self.append(symbol, data)
+    
+    def append(self, symbol, data):
+        """Append bars newer than the last cached timestamp; returns the number of rows added."""
+        meta = self._read_meta(symbol)
+        if meta is None:
+            return self.write(symbol, data)
+        
+        data = self._normalize(data)
+        timestamps = self._utc_ns(data.index)
+        path = self._partition(symbol)
+        rows = meta['rows']
+        if rows > 0:
+            last = self._map(os.path.join(path, 'index.bin'), 'int64', rows)[-1]
+            keep = timestamps > last
+            data, timestamps = data[keep], timestamps[keep]
+        if len(data) == 0:
+            return 0
+        
+        # Data first, then metadata: bytes past meta['rows'] from an interrupted
+        # append are ignored by readers and truncated before the next append.
+        columns = {'index': ('int64', timestamps)}
+        columns.update({column: (dtype, data[column].to_numpy()) for column, dtype in meta['columns'].items()})
+        for name, (dtype, values) in columns.items():
+            file_path = os.path.join(path, f'{name}.bin')
+            values = np.ascontiguousarray(values, dtype=dtype)
+            with open(file_path, 'r+b') as f:
+                f.truncate(rows * values.itemsize)
+                f.seek(0, os.SEEK_END)
+                f.write(values.tobytes())
+        
+        meta['rows'] = rows + len(data)
+        self._write_meta(symbol, meta)
+        return len(data)
+    
+    def refresh(self, symbol, period='2y'):
+        """Bring ``symbol`` up to date from the provider and return its cached bars.
+        
+        Uncached symbols are fetched for the whole ``period``; cached symbols
+        only from their last cached date onwards.
+        """
+        last = self.last_timestamp(symbol)
+        if last is None:
+            self.write(symbol, self.provider.fetch(symbol, period=period))
+        else:
+            self.append(symbol, self.provider.fetch(symbol, start=last.date()))
+        return self.read(symbol)
+    
+    def purge(self, symbol):
+        """Delete the partition for ``symbol``."""
+        path = self._partition(symbol)
+        if os.path.isdir(path):
+            for name in os.listdir(path):
+                os.remove(os.path.join(path, name))
+            os.rmdir(path)
+    
+    def _partition(self, symbol):
+        return os.path.join(self.root, quote(symbol, safe=''))
+    
+    def _read_meta(self, symbol):
+        return self._read_meta_dir(quote(symbol, safe=''))
+    
+    def _read_meta_dir(self, name):
+        meta_path = os.path.join(self.root, name, 'meta.json')
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path) as f:
+            return json.load(f)
+    
+    def _write_meta(self, symbol, meta):
+        meta_path = os.path.join(self._partition(symbol), 'meta.json')
+        with open(meta_path + '.tmp', 'w') as f:
+            json.dump(meta, f)
+        os.replace(meta_path + '.tmp', meta_path)
+    
+    @staticmethod
+    def _map(file_path, dtype, rows):
+        if rows == 0:
+            return np.empty(0, dtype=dtype)
+        # Plain ndarray view so pandas and numpy results are not memmap subclasses
+        return np.memmap(file_path, dtype=dtype, mode='r', shape=(rows,)).view(np.ndarray)
+    
+    @staticmethod
+    def _normalize(data):
+        """Keep the OHLCV columns, sorted by time without duplicate timestamps."""
+        columns = [column for column in OHLCV_COLUMNS if column in data.columns]
+        data = data[columns].sort_index()
+        return data[~data.index.duplicated(keep='last')]
+    
+    @staticmethod
+    def _utc_ns(index):
+        index = pd.DatetimeIndex(index)
+        if index.tz is not None:
+            index = index.tz_convert('UTC').tz_localize(None)
+        return index.to_numpy(dtype='datetime64[ns]').view('int64')
@@ -7,115 +7,587 @@ Fetches data via yfinance, trains an LSTM neural network, and predicts future pr
 
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from sklearn.preprocessing import MinMaxScaler
-from sklearn.metrics import mean_squared_error, mean_absolute_error
-import tensorflow as tf
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import LSTM, Dense, Dropout
-import yfinance as yf
-from datetime import datetime, timedelta
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import timedelta
+import multiprocessing
+import time
+import warnings
+
+from market_data import fetch_many, synthetic_universe
+from indicator_cache import COPY_ON_WRITE, IndicatorCache
+from instrumentation import NULL_INSTRUMENTATION, Instrumentation
+from numpy_lstm import export_lstm_model
+from panel import PanelStore
+
+
+LSTM_UNITS = (50, 50, 50)
+DROPOUT_RATE = 0.2
+RESULT_METRICS = ('train_rmse', 'test_rmse', 'train_mae', 'test_mae')
+RESULT_ARRAYS = ('train_predictions', 'test_predictions', 'y_train_actual', 'y_test_actual')
+DEFAULT_QUANTILES = (0.05, 0.5, 0.95)
+RECENT_WINDOW = 250  # Windows fine-tuned by ``update_lstm_model``; registry entries keep these bars
+
+
+def make_lstm_windows(values, lookback_window):
+    """Return a read-only (n_windows, lookback_window, n_features) view over a 2-D series.
+    
+    Window ``i`` covers rows ``i .. i + lookback_window - 1``; its target is
+    row ``i + lookback_window``, so the final full window is left out.
+    """
+    values = np.asarray(values)
+    if values.ndim == 1:
+        values = values[:, None]
+    windows = np.lib.stride_tricks.sliding_window_view(values, lookback_window, axis=0)[:-1]
+    return windows.transpose(0, 2, 1)
+
+
+class PooledWindows:
+    """LSTM windows over several series concatenated into one array, gathered on demand.
+    
+    Indexing returns the same ``(n, lookback_window, n_features)`` blocks as
+    ``make_lstm_windows`` would for each series, but only for the requested
+    windows, so pooling thousands of symbols costs O(total bars).
+    """
+    
+    def __init__(self, values, starts, lookback_window):
+        self.values = values if values.ndim == 2 else values[:, None]
+        self.starts = np.asarray(starts)
+        self.lookback_window = lookback_window
+        self.shape = (len(self.starts), lookback_window, self.values.shape[1])
+    
+    def __len__(self):
+        return len(self.starts)
+    
+    def __getitem__(self, index):
+        return self.values[self.starts[index][:, None] + np.arange(self.lookback_window)]
+    
+    def targets(self, column=0):
+        """Value following each window, i.e. the training target."""
+        return self.values[self.starts + self.lookback_window, column]
+
+
+INDICATOR_PARAMS = {
+    'ma_windows': (5, 10, 20, 50),
+    'ema_spans': (12, 26),
+    'macd_signal_span': 9,
+    'rsi_window': 14,
+    'bb_window': 20,
+    'bb_std': 2,
+    'volume_window': 20,
+}
+
+DEFAULT_SIGNAL_RULES = {
+    'fast_ma': 'MA_5',
+    'slow_ma': 'MA_20',
+    'rsi_oversold': 30,
+    'rsi_overbought': 70,
+    'bb_std': 2,
+    'min_votes': 2,
+    'warmup': 50,  # Need enough data for indicators
+}
+
+
+def _crossed(fast, slow):
+    """Boolean arrays marking where ``fast`` crosses above / below ``slow`` (time on the last axis)."""
+    above = np.zeros(np.broadcast_shapes(fast.shape, slow.shape), dtype=bool)
+    below = np.zeros_like(above)
+    current_fast, previous_fast = fast[..., 1:], fast[..., :-1]
+    current_slow, previous_slow = slow[..., 1:], slow[..., :-1]
+    above[..., 1:] = (current_fast > current_slow) & (previous_fast <= previous_slow)
+    below[..., 1:] = (current_fast < current_slow) & (previous_fast >= previous_slow)
+    return above, below
+
+
+def signal_votes(close, fast_ma, slow_ma, macd, macd_signal, rsi, bb_upper, bb_lower,
+                 rsi_oversold=30, rsi_overbought=70):
+    """Count buy and sell votes for every bar in one vectorized pass.
+    
+    Inputs are arrays with time on the last axis. Thresholds broadcast
+    against them, so passing e.g. ``rsi_oversold`` with shape (P, 1)
+    evaluates P rule sets over the whole history at once. NaN indicator
+    values never vote, as in the original per-row comparisons. RSI and the
+    bands give at most one vote each, buy first, as the original ``if/elif``
+    did even when ``rsi_oversold >= rsi_overbought``.
+    """
+    ma_buy, ma_sell = _crossed(fast_ma, slow_ma)
+    macd_buy, macd_sell = _crossed(macd, macd_signal)
+    rsi_buy = rsi < rsi_oversold  # Oversold
+    rsi_sell = (rsi > rsi_overbought) & ~rsi_buy  # Overbought
+    bb_buy = close < bb_lower  # Below lower band
+    bb_sell = (close > bb_upper) & ~bb_buy  # Above upper band
+    
+    buy_votes = ma_buy.astype(np.int8) + macd_buy + rsi_buy + bb_buy
+    sell_votes = ma_sell.astype(np.int8) + macd_sell + rsi_sell + bb_sell
+    return buy_votes, sell_votes
+
+
+def label_signals(buy_votes, sell_votes, min_votes=2, warmup=50):
+    """Turn vote counts into BUY/SELL/HOLD labels; the first ``warmup`` bars are HOLD."""
+    labels = np.where(buy_votes >= min_votes, 'BUY', np.where(sell_votes >= min_votes, 'SELL', 'HOLD'))
+    labels[..., :warmup] = 'HOLD'
+    return labels
+
+
+def rule_votes(column, rules):
+    """Buy and sell vote counts of a full rule dict, reading indicators through ``column(name)``."""
+    bb_upper, bb_lower = column('BB_Upper'), column('BB_Lower')
+    if rules['bb_std'] != 2:
+        bb_middle = column('BB_Middle')
+        bb_upper = bb_middle + (bb_upper - bb_middle) * (rules['bb_std'] / 2)
+        bb_lower = bb_middle - (bb_middle - bb_lower) * (rules['bb_std'] / 2)
+    
+    return signal_votes(
+        column('Close'), column(rules['fast_ma']), column(rules['slow_ma']),
+        column('MACD'), column('MACD_Signal'), column('RSI'), bb_upper, bb_lower,
+        rsi_oversold=rules['rsi_oversold'], rsi_overbought=rules['rsi_overbought'])
+
+
+def signals_from_indicators(df, rules=None):
+    """Label every row of a ``calculate_technical_indicators`` frame."""
+    rules = {**DEFAULT_SIGNAL_RULES, **(rules or {})}
+    buy_votes, sell_votes = rule_votes(lambda name: df[name].to_numpy(dtype=np.float64), rules)
+    return label_signals(buy_votes, sell_votes, rules['min_votes'], rules['warmup'])
+
+
+def quantile_column(q):
+    """Forecast column name of quantile ``q``: ``Q05`` for 0.05, ``Q2.5`` for 0.025."""
+    return f'Q{q * 100:02g}'
+
+
+def compile_forecast_fn(model):
+    """Wrap ``model`` in a compiled autoregressive forecast.
+    
+    The returned function maps scaled windows of shape (batch, lookback, 1),
+    a step count and (batch, 1) symbol ids (ignored unless the model is the
+    global model) to a (batch, steps) tensor of scaled predictions. The
+    whole rollout runs inside one ``tf.function`` graph, calling the model
+    directly instead of going through ``model.predict`` once per step.
+    ``training=True`` keeps the Dropout layers active, so every row of the
+    batch follows its own Monte Carlo dropout path.
+    """
+    import tensorflow as tf
+    
+    takes_symbol_ids = len(model.inputs) > 1
+    
+    @tf.function(reduce_retracing=True)
+    def rollout(sequences, days_ahead, symbol_ids, training=False):
+        predictions = tf.TensorArray(sequences.dtype, size=days_ahead)
+        window = sequences
+        for step in tf.range(days_ahead):
+            inputs = [window, symbol_ids] if takes_symbol_ids else window
+            next_pred = model(inputs, training=training)
+            predictions = predictions.write(step, next_pred[:, 0])
+            
+            # Slide the window: drop the oldest bar, append the prediction
+            window = tf.concat([window[:, 1:, :], next_pred[:, None, :]], axis=1)
+        return tf.transpose(predictions.stack())
+    
+    return rollout
+
+
+class StreamingIndicators:
+    """Technical indicators updated in constant time per bar for live feeds.
+    
+    Keeps running window sums, adjusted-EWM numerator/denominator pairs and a
+    sliding Welford mean/M2 for the Bollinger window, so ``update`` does not
+    depend on history length. Values match ``calculate_technical_indicators``
+    on the same bars up to floating point rounding.
+    """
+    
+    MA_WINDOWS = (5, 10, 20, 50)
+    EMA_SPANS = {'EMA_12': 12, 'EMA_26': 26, 'MACD_Signal': 9}
+    RSI_WINDOW = 14
+    BB_WINDOW = 20
+    VOLUME_WINDOW = 20
+    RESYNC_INTERVAL = 1024  # Recompute window sums from scratch to bound rounding drift
+    
+    def __init__(self, history=None):
+        """Create empty state, or seed it from an OHLCV history."""
+        self.closes = deque(maxlen=max(self.MA_WINDOWS))
+        self.volumes = deque(maxlen=self.VOLUME_WINDOW)
+        self.gains = deque(maxlen=self.RSI_WINDOW)
+        self.losses = deque(maxlen=self.RSI_WINDOW)
+        self.close_sums = {window: 0.0 for window in self.MA_WINDOWS}
+        self.gain_sum = 0.0
+        self.loss_sum = 0.0
+        self.volume_sum = 0.0
+        self.bb_mean = 0.0
+        self.bb_m2 = 0.0
+        self.ema_state = {name: [0.0, 0.0] for name in self.EMA_SPANS}  # [numerator, denominator]
+        self.bars = 0
+        self.last_close = None
+        self.previous = None
+        self.current = None
+        
+        if history is not None and len(history) > 0:
+            self.seed(history)
+    
+    def seed(self, history):
+        """Initialize state from a history frame using vectorized batch passes.
+        
+        All bars but the last are loaded in bulk; the last goes through
+        ``update`` so that ``previous`` and ``current`` are both populated.
+        """
+        head = history.iloc[:-1]
+        if len(head) > 0:
+            close = head['Close'].to_numpy(dtype=np.float64)
+            volume = head['Volume'].to_numpy(dtype=np.float64)
+            delta = np.diff(close, prepend=close[0])
+            
+            self.closes.extend(close[-self.closes.maxlen:])
+            self.volumes.extend(volume[-self.VOLUME_WINDOW:])
+            self.gains.extend(np.maximum(delta, 0)[-self.RSI_WINDOW:])
+            self.losses.extend(np.maximum(-delta, 0)[-self.RSI_WINDOW:])
+            self.bars = len(close)
+            self.last_close = close[-1]
+            self._resync()
+            
+            # Adjusted EWM: mean = numerator / denominator, denominator = sum of decay weights.
+            close_series = pd.Series(close)
+            macd = close_series.ewm(span=12).mean() - close_series.ewm(span=26).mean()
+            sources = {'EMA_12': close_series, 'EMA_26': close_series, 'MACD_Signal': macd}
+            for name, span in self.EMA_SPANS.items():
+                decay = 1 - 2 / (span + 1)
+                denominator = (1 - decay ** len(close)) / (1 - decay)
+                mean = sources[name].ewm(span=span).mean().iloc[-1]
+                self.ema_state[name] = [mean * denominator, denominator]
+            
+            self.current = self._snapshot(close[-1], volume[-1])
+        
+        last = history.iloc[-1]
+        self.update(last['Close'], last['Volume'])
+    
+    def update(self, close, volume):
+        """Add one bar and return its indicator values."""
+        close = float(close)
+        volume = float(volume)
+        delta = 0.0 if self.last_close is None else close - self.last_close
+        
+        for window in self.MA_WINDOWS:
+            if len(self.closes) >= window:
+                self.close_sums[window] -= self.closes[-window]
+            self.close_sums[window] += close
+        
+        # Sliding Welford update for the Bollinger window
+        if len(self.closes) >= self.BB_WINDOW:
+            outgoing = self.closes[-self.BB_WINDOW]
+            new_mean = self.bb_mean + (close - outgoing) / self.BB_WINDOW
+            self.bb_m2 += (close - outgoing) * (close - new_mean + outgoing - self.bb_mean)
+            self.bb_mean = new_mean
+        else:
+            count = len(self.closes) + 1
+            diff = close - self.bb_mean
+            self.bb_mean += diff / count
+            self.bb_m2 += diff * (close - self.bb_mean)
+        
+        gain, loss = max(delta, 0.0), max(-delta, 0.0)
+        if len(self.gains) == self.RSI_WINDOW:
+            self.gain_sum -= self.gains[0]
+            self.loss_sum -= self.losses[0]
+        self.gain_sum += gain
+        self.loss_sum += loss
+        
+        if len(self.volumes) == self.VOLUME_WINDOW:
+            self.volume_sum -= self.volumes[0]
+        self.volume_sum += volume
+        
+        self.closes.append(close)
+        self.volumes.append(volume)
+        self.gains.append(gain)
+        self.losses.append(loss)
+        self.bars += 1
+        self.last_close = close
+        
+        self._update_ema('EMA_12', close)
+        self._update_ema('EMA_26', close)
+        macd = self._ema('EMA_12') - self._ema('EMA_26')
+        self._update_ema('MACD_Signal', macd)
+        
+        if self.bars % self.RESYNC_INTERVAL == 0:
+            self._resync()
+        
+        self.previous = self.current
+        self.current = self._snapshot(close, volume)
+        return self.current
+    
+    def signal(self, rules=None):
+        """BUY/SELL/HOLD label for the latest bar using the batch signal rules."""
+        rules = {**DEFAULT_SIGNAL_RULES, **(rules or {})}
+        if self.current is None or self.previous is None or self.bars <= rules['warmup']:
+            return 'HOLD'
+        
+        previous, current = self.previous, self.current
+        buy_votes, sell_votes = rule_votes(lambda name: np.array((previous[name], current[name])), rules)
+        return label_signals(buy_votes[-1:], sell_votes[-1:], rules['min_votes'], warmup=0)[0]
+    
+    def _update_ema(self, name, value):
+        decay = 1 - 2 / (self.EMA_SPANS[name] + 1)
+        state = self.ema_state[name]
+        state[0] = value + decay * state[0]
+        state[1] = 1.0 + decay * state[1]
+    
+    def _ema(self, name):
+        numerator, denominator = self.ema_state[name]
+        return numerator / denominator
+    
+    def _resync(self):
+        closes = np.fromiter(self.closes, dtype=np.float64)
+        for window in self.MA_WINDOWS:
+            self.close_sums[window] = closes[-window:].sum()
+        bb_window = closes[-self.BB_WINDOW:]
+        self.bb_mean = bb_window.mean() if len(bb_window) else 0.0
+        self.bb_m2 = ((bb_window - self.bb_mean) ** 2).sum()
+        self.gain_sum = sum(self.gains)
+        self.loss_sum = sum(self.losses)
+        self.volume_sum = sum(self.volumes)
+    
+    def _snapshot(self, close, volume):
+        """Indicator values for the latest bar, keyed like the batch columns."""
+        nan = np.float64('nan')
+        values = {'Close': close, 'Volume': volume}
+        for window in self.MA_WINDOWS:
+            values[f'MA_{window}'] = self.close_sums[window] / window if self.bars >= window else nan
+        
+        values['EMA_12'] = self._ema('EMA_12')
+        values['EMA_26'] = self._ema('EMA_26')
+        values['MACD'] = values['EMA_12'] - values['EMA_26']
+        values['MACD_Signal'] = self._ema('MACD_Signal')
+        values['MACD_Histogram'] = values['MACD'] - values['MACD_Signal']
+        
+        if self.bars >= self.RSI_WINDOW:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                rs = np.float64(self.gain_sum) / np.float64(self.loss_sum)
+                values['RSI'] = 100 - (100 / (1 + rs))
+        else:
+            values['RSI'] = nan
+        
+        values['BB_Middle'] = values[f'MA_{self.BB_WINDOW}']
+        if self.bars >= self.BB_WINDOW:
+            bb_std = np.sqrt(max(self.bb_m2, 0.0) / (self.BB_WINDOW - 1))
+        else:
+            bb_std = nan
+        values['BB_Upper'] = values['BB_Middle'] + (bb_std * 2)
+        values['BB_Lower'] = values['BB_Middle'] - (bb_std * 2)
+        
+        values['Volume_MA'] = self.volume_sum / self.VOLUME_WINDOW if self.bars >= self.VOLUME_WINDOW else nan
+        with np.errstate(divide='ignore', invalid='ignore'):
+            values['Volume_Ratio'] = np.float64(volume) / values['Volume_MA']
+        return values
+
 
 class MarketTrendPredictor:
-    def __init__(self):
-        """Initialize the market trend predictor."""
+    def __init__(self, registry=None, instrumentation=None, indicator_cache=None, compact=False):
+        """Initialize the market trend predictor.
+        
+        An optional ``ModelRegistry`` lets ``train_lstm_model`` reuse models
+        trained earlier on the same data with the same hyperparameters. An
+        optional ``instrumentation.Instrumentation`` records per-stage and
+        per-symbol spans and counters; without one nothing is recorded.
+        Indicator frames are memoized in ``indicator_cache`` (a default
+        ``IndicatorCache`` unless one is given; ``IndicatorCache(max_bytes=0)``
+        disables it).
+        
+        With ``compact=True`` fetched bars are kept in a float32
+        ``PanelStore``, indicator columns are float32 and training results
+        leave out the prediction/actual arrays unless ``keep_arrays`` is set.
+        """
+        self.registry = registry
+        self.instrumentation = instrumentation if instrumentation is not None else NULL_INSTRUMENTATION
+        self.indicator_cache = indicator_cache if indicator_cache is not None else IndicatorCache()
+        self.compact = compact
         self.models = {}
         self.scalers = {}
         self.data = {}
         self.predictions = {}
+        self._forecast_fns = {}
+        self.timings = {}
+        self.global_symbols = {}
+        self.fetch_report = {}
+        self.training_report = None
+        self.trained_until = {}
+        self._restored_since = {}
         
-    def fetch_market_data(self, symbols=['AAPL', 'GOOGL', 'MSFT', 'TSLA', 'AMZN'], period='2y'):
-        """Fetch real market data from Yahoo Finance."""
-        market_data = {}
+    def fetch_market_data(self, symbols=['AAPL', 'GOOGL', 'MSFT', 'TSLA', 'AMZN'], period='2y',
+                          provider=None, cache=None, max_workers=8, retries=2):
+        """Fetch real market data (from Yahoo Finance unless another provider is given).
+        
+        Symbols are fetched concurrently by ``fetch_many``. With a
+        ``MarketDataCache`` only bars newer than the cached history are
+        downloaded; if that refresh fails the cached bars are used as-is.
+        Per-symbol latency and data source are kept in ``self.fetch_report``.
+        """
+        market_data, report = fetch_many(symbols, provider=provider, cache=cache, period=period,
+                                         max_workers=max_workers, retries=retries,
+                                         fallback=self.generate_synthetic_data)
         
         for symbol in symbols:
-            try:
-                ticker = yf.Ticker(symbol)
-                data = ticker.history(period=period)
-                market_data[symbol] = data
-                print(f"Fetched data for {symbol}: {len(data)} records")
-            except Exception as e:
-                print(f"Error fetching data for {symbol}: {e}")
-                # Generate synthetic data as fallback
-                market_data[symbol] = self.generate_synthetic_data(symbol)
-        
-        self.data = market_data
-        return market_data
-    
-    def generate_synthetic_data(self, symbol, days=730):
+            self.instrumentation.record_span('fetch', report[symbol]['latency'], symbol=symbol)
+            self.instrumentation.count('bars_processed', report[symbol]['rows'], stage='fetch')
+            if report[symbol]['source'] == 'provider':
+                print(f"Fetched data for {symbol}: {len(market_data[symbol])} records")
+            else:
+                # Synthetic data (or stale cached bars) used as fallback
+                print(f"Error fetching data for {symbol}: {report[symbol]['error']}")
+        
+        self.data = PanelStore.from_frames(market_data) if self.compact and market_data else market_data
+        self.fetch_report = report
+        return self.data
+    
+    def generate_synthetic_data(self, symbol, days=730, dtype=np.float64):
         """Generate synthetic market data for testing."""
-        np.random.seed(hash(symbol) % 2**32)
-        
-        dates = pd.date_range(start=datetime.now() - timedelta(days=days), 
-                             end=datetime.now(), freq='D')
-        
-        # Generate realistic price movements
-        initial_price = np.random.uniform(50, 500)
-        returns = np.random.normal(0.001, 0.02, len(dates))  # Daily returns
-        
-        prices = [initial_price]
-        for ret in returns[1:]:
-            new_price = prices[-1] * (1 + ret)
-            prices.append(max(new_price, 1))  # Ensure positive prices
-        
-        # Generate OHLCV data
-        data = pd.DataFrame({
-            'Open': [p * np.random.uniform(0.98, 1.02) for p in prices],
-            'High': [p * np.random.uniform(1.00, 1.05) for p in prices],
-            'Low': [p * np.random.uniform(0.95, 1.00) for p in prices],
-            'Close': prices,
-            'Volume': [np.random.randint(1000000, 10000000) for _ in prices]
-        }, index=dates)
-        
-        # Ensure OHLC consistency
-        for i in range(len(data)):
-            high = max(data.iloc[i]['Open'], data.iloc[i]['Close'])
-            low = min(data.iloc[i]['Open'], data.iloc[i]['Close'])
-            data.iloc[i, data.columns.get_loc('High')] = max(data.iloc[i]['High'], high)
-            data.iloc[i, data.columns.get_loc('Low')] = min(data.iloc[i]['Low'], low)
+        return self.generate_synthetic_universe([symbol], days=days, dtype=dtype)[symbol]
+    
+    def generate_synthetic_universe(self, symbols, days=730, dtype=np.float64, as_frames=True):
+        """Generate synthetic OHLCV data for many symbols in one vectorized pass.
         
-        return data
+        Each symbol draws from its own generator seeded by ``symbol_seed`` so a
+        symbol's bars do not depend on the rest of the universe or on
+        PYTHONHASHSEED. With ``as_frames=False`` returns ``(dates, fields)``
+        where ``fields`` maps each OHLCV column to an (N symbols, T bars) array.
+        """
+        return synthetic_universe(symbols, days=days, dtype=dtype, as_frames=as_frames)
     
-    def prepare_lstm_data(self, data, lookback_window=60, target_column='Close'):
-        """Prepare data for LSTM model."""
+    def prepare_lstm_data(self, data, lookback_window=60, target_column='Close', feature_columns=None):
+        """Prepare data for LSTM model.
+        
+        ``X`` is a read-only strided view over the scaled series, so building
+        it costs O(T) memory instead of O(T * lookback_window). Only
+        ``lstm_dataset`` (``train_lstm_model(streaming=True)``) keeps it that
+        way; passing ``X`` to ``model.fit`` or ``np.asarray`` materializes
+        every window. Pass ``feature_columns``
+        (which must include ``target_column``) to build multi-feature windows,
+        e.g. from ``calculate_technical_indicators``; leading rows with NaN
+        indicator values are dropped.
+        """
+        columns = [target_column] if feature_columns is None else list(feature_columns)
+        if target_column not in columns:
+            raise ValueError(f"target_column {target_column} must be one of the feature columns")
+        
+        from sklearn.preprocessing import MinMaxScaler
+        
         # Scale the data
         scaler = MinMaxScaler(feature_range=(0, 1))
-        scaled_data = scaler.fit_transform(data[[target_column]])
+        scaled_data = scaler.fit_transform(data[columns].dropna())
         
         # Create sequences
-        X, y = [], []
-        for i in range(lookback_window, len(scaled_data)):
-            X.append(scaled_data[i-lookback_window:i, 0])
-            y.append(scaled_data[i, 0])
-        
-        X, y = np.array(X), np.array(y)
-        X = np.reshape(X, (X.shape[0], X.shape[1], 1))
+        X = make_lstm_windows(scaled_data, lookback_window)
+        y = scaled_data[lookback_window:, columns.index(target_column)]
+        self.instrumentation.count('windows_built', len(X))
         
         return X, y, scaler
     
+    def lstm_dataset(self, X, y=None, batch_size=32, shuffle=False, seed=None, symbol_ids=None):
+        """Stream LSTM windows through a prefetching ``tf.data`` pipeline.
+        
+        Only the current batch of windows is copied out of ``X``, so strided
+        views from ``prepare_lstm_data`` (or ``PooledWindows``) are never
+        materialized in full. When ``symbol_ids`` is given each batch input
+        is a ``(windows, ids)`` pair for the global model.
+        """
+        import tensorflow as tf
+        
+        rng = np.random.default_rng(seed)
+        n_windows = len(X)
+        
+        def batches():
+            order = rng.permutation(n_windows) if shuffle else None
+            for start in range(0, n_windows, batch_size):
+                index = slice(start, start + batch_size) if order is None else order[start:start + batch_size]
+                inputs = np.ascontiguousarray(X[index], dtype=np.float32)
+                if symbol_ids is not None:
+                    inputs = (inputs, np.asarray(symbol_ids[index], dtype=np.int32)[:, None])
+                if y is None:
+                    # Nest a (windows, ids) pair so Keras does not mistake it for (x, y)
+                    yield inputs if symbol_ids is None else (inputs,)
+                else:
+                    yield inputs, np.asarray(y[index], dtype=np.float32)
+        
+        x_spec = tf.TensorSpec(shape=(None,) + tuple(X.shape[1:]), dtype=tf.float32)
+        if symbol_ids is not None:
+            x_spec = (x_spec, tf.TensorSpec(shape=(None, 1), dtype=tf.int32))
+        if y is None:
+            signature = (x_spec,) if symbol_ids is not None else x_spec
+        else:
+            signature = (x_spec, tf.TensorSpec(shape=(None,), dtype=tf.float32))
+        dataset = tf.data.Dataset.from_generator(batches, output_signature=signature)
+        dataset = dataset.apply(tf.data.experimental.assert_cardinality(-(-n_windows // batch_size)))
+        return dataset.prefetch(tf.data.AUTOTUNE)
+    
     def build_lstm_model(self, input_shape):
         """Build LSTM neural network model."""
+        from tensorflow.keras.layers import LSTM, Dense, Dropout
+        from tensorflow.keras.models import Sequential
+        
         model = Sequential([
-            LSTM(50, return_sequences=True, input_shape=input_shape),
-            Dropout(0.2),
-            LSTM(50, return_sequences=True),
-            Dropout(0.2),
-            LSTM(50),
-            Dropout(0.2),
+            LSTM(LSTM_UNITS[0], return_sequences=True, input_shape=input_shape),
+            Dropout(DROPOUT_RATE),
+            LSTM(LSTM_UNITS[1], return_sequences=True),
+            Dropout(DROPOUT_RATE),
+            LSTM(LSTM_UNITS[2]),
+            Dropout(DROPOUT_RATE),
             Dense(1)
         ])
         
         model.compile(optimizer='adam', loss='mean_squared_error')
         return model
     
-    def train_lstm_model(self, symbol, epochs=50, batch_size=32):
-        """Train LSTM model for a specific symbol."""
+    def build_global_lstm_model(self, input_shape, n_symbols, embedding_dim=8):
+        """Build one LSTM shared by many symbols, conditioned on a learned symbol embedding."""
+        from tensorflow.keras.layers import LSTM, Concatenate, Dense, Dropout, Embedding, Flatten, Input
+        from tensorflow.keras.models import Model
+        
+        sequence = Input(shape=input_shape, name='sequence')
+        symbol_id = Input(shape=(1,), dtype='int32', name='symbol_id')
+        
+        x = LSTM(LSTM_UNITS[0], return_sequences=True)(sequence)
+        x = Dropout(DROPOUT_RATE)(x)
+        x = LSTM(LSTM_UNITS[1], return_sequences=True)(x)
+        x = Dropout(DROPOUT_RATE)(x)
+        x = LSTM(LSTM_UNITS[2])(x)
+        x = Dropout(DROPOUT_RATE)(x)
+        embedding = Flatten()(Embedding(n_symbols, embedding_dim)(symbol_id))
+        output = Dense(1)(Concatenate()([x, embedding]))
+        
+        model = Model(inputs=[sequence, symbol_id], outputs=output)
+        model.compile(optimizer='adam', loss='mean_squared_error')
+        return model
+    
+    def train_lstm_model(self, symbol, epochs=50, batch_size=32, streaming=False, lookback_window=60,
+                         keep_arrays=None):
+        """Train LSTM model for a specific symbol.
+        
+        The train/test predictions and actuals (``RESULT_ARRAYS``) are
+        returned only with ``keep_arrays`` (default: unless the predictor is
+        compact); metrics are computed either way.
+        With ``streaming=True`` windows are fed batch by batch through
+        ``lstm_dataset`` and window memory stays O(T); by default ``fit``
+        converts them to one dense O(T * lookback_window) tensor.
+        When the predictor has a registry and it already holds a model for the
+        same series and hyperparameters, that model is loaded instead of
+        training (``results['from_registry']`` is True).
+        """
         if symbol not in self.data:
             raise ValueError(f"No data available for symbol {symbol}")
         
         data = self.data[symbol]
-        X, y, scaler = self.prepare_lstm_data(data)
+        keep_arrays = not self.compact if keep_arrays is None else keep_arrays
+        
+        if self.registry is not None:
+            params = {'lookback_window': lookback_window, 'lstm_units': LSTM_UNITS, 'dropout': DROPOUT_RATE,
+                      'epochs': epochs, 'batch_size': batch_size, 'target_column': 'Close'}
+            registry_key = self.registry.make_key(data['Close'], params)
+            cached = self.registry.load(registry_key)
+            if cached is not None:
+                self.models[f'{symbol}_lstm'] = cached['model']
+                self.scalers[f'{symbol}_lstm'] = cached['scaler']
+                self.trained_until[symbol] = data.index[-1]
+                return {'model': cached['model'], 'scaler': cached['scaler'], 'history': cached['history'],
+                        **cached['metrics'], **(cached['arrays'] if keep_arrays else {}), 'from_registry': True}
+        
+        instrumentation = self.instrumentation
+        with instrumentation.span('prepare', symbol=symbol):
+            X, y, scaler = self.prepare_lstm_data(data, lookback_window)
         
         # Split data
         split_index = int(len(X) * 0.8)
@@ -124,16 +596,49 @@ class MarketTrendPredictor:
         
         # Build and train model
         model = self.build_lstm_model((X_train.shape[1], 1))
-        history = model.fit(X_train, y_train, epochs=epochs, batch_size=batch_size, 
-                           validation_data=(X_test, y_test), verbose=0)
+        with instrumentation.span('fit', symbol=symbol):
+            if streaming:
+                history = model.fit(self.lstm_dataset(X_train, y_train, batch_size, shuffle=True), epochs=epochs,
+                                   validation_data=self.lstm_dataset(X_test, y_test, batch_size),
+                                   shuffle=False, verbose=0)
+            else:
+                history = model.fit(X_train, y_train, epochs=epochs, batch_size=batch_size, 
+                                   validation_data=(X_test, y_test), verbose=0)
         
         # Store model and scaler
         self.models[f'{symbol}_lstm'] = model
         self.scalers[f'{symbol}_lstm'] = scaler
+        self.trained_until[symbol] = data.index[-1]
+        
+        results = self._evaluate_lstm(symbol, model, scaler, history.history, X_train, y_train, X_test, y_test,
+                                      batch_size, streaming)
+        
+        if self.registry is not None:
+            self.registry.save(registry_key, symbol, model, scaler,
+                               metrics={name: results[name] for name in RESULT_METRICS},
+                               history=history.history, params=params,
+                               arrays={name: results[name] for name in RESULT_ARRAYS},
+                               trained_until=data.index[-1], recent=data.iloc[-(lookback_window + RECENT_WINDOW):])
+            results['from_registry'] = False
+        
+        if not keep_arrays:
+            for name in RESULT_ARRAYS:
+                del results[name]
+        return results
+    
+    def _evaluate_lstm(self, symbol, model, scaler, history, X_train, y_train, X_test, y_test, batch_size=32,
+                       streaming=False):
+        """Results of ``train_lstm_model`` for a fitted model: metrics and ``RESULT_ARRAYS`` in prices."""
+        from sklearn.metrics import mean_squared_error, mean_absolute_error
         
         # Make predictions
-        train_predictions = model.predict(X_train)
-        test_predictions = model.predict(X_test)
+        with self.instrumentation.span('evaluate', symbol=symbol):
+            if streaming:
+                train_predictions = model.predict(self.lstm_dataset(X_train, batch_size=batch_size), verbose=0)
+                test_predictions = model.predict(self.lstm_dataset(X_test, batch_size=batch_size), verbose=0)
+            else:
+                train_predictions = model.predict(X_train)
+                test_predictions = model.predict(X_test)
         
         # Inverse transform predictions
         train_predictions = scaler.inverse_transform(train_predictions)
@@ -147,10 +652,10 @@ class MarketTrendPredictor:
         train_mae = mean_absolute_error(y_train_actual, train_predictions)
         test_mae = mean_absolute_error(y_test_actual, test_predictions)
         
-        results = {
+        return {
             'model': model,
             'scaler': scaler,
-            'history': history.history,
+            'history': history,
             'train_rmse': train_rmse,
             'test_rmse': test_rmse,
             'train_mae': train_mae,
@@ -160,205 +665,734 @@ class MarketTrendPredictor:
             'y_train_actual': y_train_actual,
             'y_test_actual': y_test_actual
         }
+    
+    def train_lstm_model_from_cache(self, symbol, cache, epochs=50, batch_size=32, lookback_window=60,
+                                    chunk_rows=65536, keep_arrays=False, seed=None):
+        """Train a per-symbol LSTM on a ``MarketDataCache`` partition without loading the series.
+        
+        Out-of-core counterpart of ``train_lstm_model`` for histories that do
+        not fit in memory, such as years of minute bars. One pass over the
+        cached Close column in ``chunk_rows`` slices fits the scaler with
+        ``partial_fit`` (the same min/max as fitting the whole series). Windows
+        are then built lazily per slice, each slice re-reading the
+        ``lookback_window`` bars before it, and streamed through a prefetching
+        ``tf.data`` pipeline; training windows are shuffled within a slice and
+        slices are visited in random order. The 80/20 split and the metrics
+        match ``train_lstm_model``, with errors accumulated slice by slice, so
+        peak memory depends on ``chunk_rows`` and not on history length. The
+        prediction/actual arrays grow with the history and are only returned
+        with ``keep_arrays``.
+        """
+        n_windows = cache.rows(symbol) - lookback_window
+        if n_windows < 2:
+            raise ValueError(f"Not enough cached data for symbol {symbol} with lookback_window={lookback_window}")
+        
+        import tensorflow as tf
+        from sklearn.preprocessing import MinMaxScaler
         
+        instrumentation = self.instrumentation
+        rng = np.random.default_rng(seed)
+        chunk_windows = max(chunk_rows - lookback_window, 1)
+        split_index = int(n_windows * 0.8)
+        
+        # Single pass for the scaler statistics
+        scaler = MinMaxScaler(feature_range=(0, 1))
+        with instrumentation.span('prepare', symbol=symbol):
+            for start in range(0, n_windows + lookback_window, chunk_rows):
+                scaler.partial_fit(pd.DataFrame({'Close': cache.read_column(symbol, 'Close', start,
+                                                                             start + chunk_rows)}))
+        instrumentation.count('windows_built', n_windows)
+        
+        def chunks(first, stop, shuffle=False):
+            """Scaled (windows, targets) for windows ``first .. stop - 1``, one slice at a time."""
+            starts = np.arange(first, stop, chunk_windows)
+            if shuffle:
+                rng.shuffle(starts)
+            for start in starts:
+                end = min(start + chunk_windows, stop)
+                close = cache.read_column(symbol, 'Close', start, end + lookback_window)
+                values = scaler.transform(pd.DataFrame({'Close': close}))
+                yield make_lstm_windows(values, lookback_window), values[lookback_window:, 0]
+        
+        def dataset(first, stop, shuffle=False):
+            def batches():
+                for X, y in chunks(first, stop, shuffle):
+                    order = rng.permutation(len(X)) if shuffle else np.arange(len(X))
+                    for i in range(0, len(X), batch_size):
+                        index = order[i:i + batch_size]
+                        yield np.ascontiguousarray(X[index], dtype=np.float32), y[index].astype(np.float32)
+            
+            signature = (tf.TensorSpec(shape=(None, lookback_window, 1), dtype=tf.float32),
+                         tf.TensorSpec(shape=(None,), dtype=tf.float32))
+            n_batches = sum(-(-(min(start + chunk_windows, stop) - start) // batch_size)
+                            for start in range(first, stop, chunk_windows))
+            dataset = tf.data.Dataset.from_generator(batches, output_signature=signature)
+            dataset = dataset.apply(tf.data.experimental.assert_cardinality(n_batches))
+            return dataset.prefetch(tf.data.AUTOTUNE)
+        
+        def errors(first, stop):
+            """RMSE and MAE in price units, plus the arrays when ``keep_arrays``."""
+            squared, absolute = 0.0, 0.0
+            predictions, actuals = [], []
+            for X, y in chunks(first, stop):
+                prediction = scaler.inverse_transform(model.predict(np.ascontiguousarray(X, dtype=np.float32),
+                                                                    batch_size=batch_size, verbose=0))
+                actual = scaler.inverse_transform(y.reshape(-1, 1))
+                squared += float(np.square(prediction - actual).sum())
+                absolute += float(np.abs(prediction - actual).sum())
+                if keep_arrays:
+                    predictions.append(prediction)
+                    actuals.append(actual)
+            count = stop - first
+            arrays = (np.concatenate(predictions), np.concatenate(actuals)) if keep_arrays else (None, None)
+            return np.sqrt(squared / count), absolute / count, arrays
+        
+        model = self.build_lstm_model((lookback_window, 1))
+        with instrumentation.span('fit', symbol=symbol):
+            history = model.fit(dataset(0, split_index, shuffle=True), epochs=epochs,
+                                validation_data=dataset(split_index, n_windows), shuffle=False, verbose=0)
+        
+        self.models[f'{symbol}_lstm'] = model
+        self.scalers[f'{symbol}_lstm'] = scaler
+        self.trained_until[symbol] = cache.last_timestamp(symbol)
+        
+        with instrumentation.span('evaluate', symbol=symbol):
+            train_rmse, train_mae, (train_predictions, y_train_actual) = errors(0, split_index)
+            test_rmse, test_mae, (test_predictions, y_test_actual) = errors(split_index, n_windows)
+        
+        results = {
+            'model': model,
+            'scaler': scaler,
+            'history': history.history,
+            'train_rmse': train_rmse,
+            'test_rmse': test_rmse,
+            'train_mae': train_mae,
+            'test_mae': test_mae,
+        }
+        if keep_arrays:
+            results.update(train_predictions=train_predictions, test_predictions=test_predictions,
+                           y_train_actual=y_train_actual, y_test_actual=y_test_actual)
         return results
     
-    def predict_future_prices(self, symbol, days_ahead=30, lookback_window=60):
-        """Predict future prices for a given symbol."""
+    def update_lstm_model(self, symbol, new_data=None, epochs=3, recent_window=RECENT_WINDOW, batch_size=32,
+                          lookback_window=60, full_epochs=50, drift_tolerance=0.0, cache=None):
+        """Fine-tune a trained model on recent bars instead of retraining from scratch.
+        
+        ``new_data`` bars newer than the stored history are appended first.
+        The existing model and scaler are then trained for ``epochs`` on the
+        last ``recent_window`` windows. If any bar since the last training
+        falls outside the scaler's fitted min/max range (widened by
+        ``drift_tolerance`` times that range) the model would have to
+        extrapolate, so the symbol is retrained in full with ``full_epochs``.
+        ``results['mode']`` is 'fine_tune', 'retrain' or 'unchanged'.
+        
+        With a registry, a symbol without a model in memory resumes from its
+        newest entry for the same ``lookback_window`` (e.g. in a nightly job
+        in a new process): the model, scaler, last trained bar and the bars
+        saved with it are restored, so ``new_data`` may hold only the latest
+        bars. Fine-tuned models are saved back to the registry. Those saved
+        bars are too few for a full retrain: on drift the full history is
+        read from ``cache`` (a ``MarketDataCache``), and without one the
+        stored model is kept and ``results['mode']`` is 'needs_full_history'.
+        """
+        if new_data is not None:
+            current = self.data.get(symbol)
+            if current is not None and len(current) > 0:
+                new_data = new_data[new_data.index > current.index[-1]]
+                self.data[symbol] = pd.concat([current, new_data[current.columns]])
+            else:
+                self.data[symbol] = new_data
+        
+        if symbol not in self.data:
+            raise ValueError(f"No data available for symbol {symbol}")
+        
+        from sklearn.metrics import mean_squared_error, mean_absolute_error
+        
+        if f'{symbol}_lstm' not in self.models and self.registry is not None:
+            self._resume_from_registry(symbol, lookback_window)
         if f'{symbol}_lstm' not in self.models:
-            raise ValueError(f"No trained model available for symbol {symbol}")
+            results = self.train_lstm_model(symbol, epochs=full_epochs, batch_size=batch_size,
+                                            lookback_window=lookback_window)
+            return {**results, 'mode': 'retrain', 'drift': False, 'new_bars': len(self.data[symbol])}
         
+        data = self.data[symbol]
         model = self.models[f'{symbol}_lstm']
         scaler = self.scalers[f'{symbol}_lstm']
-        data = self.data[symbol]
+        trained_until = self.trained_until.get(symbol)
+        new_bars = data[data.index > trained_until] if trained_until is not None else data.iloc[-recent_window:]
+        if len(new_bars) == 0:
+            return {'model': model, 'scaler': scaler, 'mode': 'unchanged', 'drift': False, 'new_bars': 0}
+        
+        # Scaler drift: new prices outside the fitted range
+        low, high = scaler.data_min_[0], scaler.data_max_[0]
+        margin = (high - low) * drift_tolerance
+        drift = bool((new_bars['Close'] < low - margin).any() or (new_bars['Close'] > high + margin).any())
+        if drift and self._restored_since.get(symbol) == data.index[0]:
+            # Only the bars saved in the registry are in memory: retraining on them would replace a model
+            # trained on the full history with a much worse one
+            cached = cache.read(symbol) if cache is not None else None
+            if cached is None or len(cached) == 0 or cached.index[0] >= data.index[0]:
+                return {'model': model, 'scaler': scaler, 'mode': 'needs_full_history', 'drift': True,
+                        'new_bars': len(new_bars)}
+            self.data[symbol] = pd.concat([cached, data[data.index > cached.index[-1]][cached.columns]])
+            del self._restored_since[symbol]
+        if drift:
+            results = self.train_lstm_model(symbol, epochs=full_epochs, batch_size=batch_size,
+                                            lookback_window=lookback_window)
+            return {**results, 'mode': 'retrain', 'drift': True, 'new_bars': len(new_bars)}
+        
+        # Fine-tune on the most recent windows with the existing scaler
+        scaled = scaler.transform(data[['Close']].iloc[-(recent_window + lookback_window):])
+        X = make_lstm_windows(scaled, lookback_window)
+        y = scaled[lookback_window:, 0]
+        history = model.fit(X, y, epochs=epochs, batch_size=batch_size, verbose=0)
+        self.trained_until[symbol] = data.index[-1]
+        
+        predictions = scaler.inverse_transform(model.predict(X, verbose=0))
+        actual = scaler.inverse_transform(y.reshape(-1, 1))
+        
+        results = {
+            'model': model,
+            'scaler': scaler,
+            'history': history.history,
+            'mode': 'fine_tune',
+            'drift': False,
+            'new_bars': len(new_bars),
+            'recent_rmse': np.sqrt(mean_squared_error(actual, predictions)),
+            'recent_mae': mean_absolute_error(actual, predictions),
+        }
+        
+        if self.registry is not None:
+            params = {'lookback_window': lookback_window, 'lstm_units': LSTM_UNITS, 'dropout': DROPOUT_RATE,
+                      'epochs': epochs, 'recent_window': recent_window, 'batch_size': batch_size,
+                      'target_column': 'Close', 'fine_tuned': True}
+            self.registry.save(self.registry.make_key(data['Close'], params), symbol, model, scaler,
+                               metrics={name: results[name] for name in ('recent_rmse', 'recent_mae')},
+                               history=history.history, params=params, trained_until=data.index[-1],
+                               recent=data.iloc[-(lookback_window + max(recent_window, RECENT_WINDOW)):])
+        return results
+    
+    def _resume_from_registry(self, symbol, lookback_window):
+        """Load ``symbol``'s newest registry model and prepend its saved bars older than ``self.data``."""
+        entry = self.registry.latest(symbol, lookback_window=lookback_window)
+        if entry is None:
+            return False
+        
+        self.models[f'{symbol}_lstm'] = entry['model']
+        self.scalers[f'{symbol}_lstm'] = entry['scaler']
+        if entry.get('trained_until') is not None:
+            self.trained_until[symbol] = entry['trained_until']
+        recent = entry.get('recent')
+        if recent is not None:
+            current = self.data.get(symbol)
+            if current is None or len(current) == 0:
+                self.data[symbol] = recent
+            else:
+                older = recent[recent.index < current.index[0]]
+                if len(older) == 0:
+                    return True  # The bars in memory already reach back further
+                self.data[symbol] = pd.concat([older[current.columns], current])
+            self._restored_since[symbol] = self.data[symbol].index[0]
+        return True
+    
+    def train_global_lstm_model(self, symbols=None, epochs=50, batch_size=32, lookback_window=60,
+                                embedding_dim=8):
+        """Train one shared LSTM on windows pooled from many symbols.
+        
+        Each symbol is scaled with its own ``MinMaxScaler`` and split 80/20 in
+        time exactly like ``train_lstm_model``, so per-symbol RMSE/MAE are
+        directly comparable. The model is stored under ``'global_lstm'`` and
+        ``predict_future_prices`` uses it for any trained symbol that has no
+        per-symbol model.
+        """
+        symbols = list(self.data) if symbols is None else list(symbols)
+        for symbol in symbols:
+            if symbol not in self.data:
+                raise ValueError(f"No data available for symbol {symbol}")
         
-        # Prepare last sequence
-        last_sequence = data['Close'].values[-lookback_window:]
-        last_sequence_scaled = scaler.transform(last_sequence.reshape(-1, 1))
+        from sklearn.metrics import mean_squared_error, mean_absolute_error
+        from sklearn.preprocessing import MinMaxScaler
         
-        predictions = []
-        current_sequence = last_sequence_scaled[-lookback_window:].reshape(1, lookback_window, 1)
+        start_time = time.perf_counter()
         
-        for _ in range(days_ahead):
-            next_pred = model.predict(current_sequence, verbose=0)
-            predictions.append(next_pred[0, 0])
+        # Pool every symbol's scaled series into one flat array of window starts
+        series, scalers = [], {}
+        train_starts, test_starts, train_ids, test_ids = [], [], [], []
+        offset = 0
+        for symbol_id, symbol in enumerate(symbols):
+            scaler = MinMaxScaler(feature_range=(0, 1))
+            scaled_series = scaler.fit_transform(self.data[symbol][['Close']])
+            n_windows = len(scaled_series) - lookback_window
+            if n_windows <= 0:
+                raise ValueError(f"Not enough data for symbol {symbol} with lookback_window={lookback_window}")
+            starts = offset + np.arange(n_windows)
+            split_index = int(n_windows * 0.8)
             
-            # Update sequence for next prediction
-            current_sequence = np.roll(current_sequence, -1, axis=1)
-            current_sequence[0, -1, 0] = next_pred[0, 0]
+            series.append(scaled_series)
+            scalers[symbol] = scaler
+            train_starts.append(starts[:split_index])
+            test_starts.append(starts[split_index:])
+            train_ids.append(np.full(split_index, symbol_id))
+            test_ids.append(np.full(n_windows - split_index, symbol_id))
+            offset += len(scaled_series)
         
-        # Inverse transform predictions
-        predictions = np.array(predictions).reshape(-1, 1)
-        predictions = scaler.inverse_transform(predictions)
+        values = np.concatenate(series).astype(np.float32)
+        X_train = PooledWindows(values, np.concatenate(train_starts), lookback_window)
+        X_test = PooledWindows(values, np.concatenate(test_starts), lookback_window)
+        y_train, y_test = X_train.targets(), X_test.targets()
+        ids_train, ids_test = np.concatenate(train_ids), np.concatenate(test_ids)
+        
+        # Build and train model
+        model = self.build_global_lstm_model((lookback_window, 1), len(symbols), embedding_dim)
+        history = model.fit(self.lstm_dataset(X_train, y_train, batch_size, shuffle=True, symbol_ids=ids_train),
+                            epochs=epochs, shuffle=False, verbose=0,
+                            validation_data=self.lstm_dataset(X_test, y_test, batch_size, symbol_ids=ids_test))
+        
+        # Store model and scalers
+        self.models['global_lstm'] = model
+        self.global_symbols = {symbol: symbol_id for symbol_id, symbol in enumerate(symbols)}
+        for symbol, scaler in scalers.items():
+            self.scalers[f'{symbol}_global'] = scaler
         
-        # Create future dates
-        last_date = data.index[-1]
-        future_dates = pd.date_range(start=last_date + timedelta(days=1), 
-                                   periods=days_ahead, freq='D')
+        # Per-symbol metrics in price units
+        train_predictions = model.predict(self.lstm_dataset(X_train, batch_size=1024, symbol_ids=ids_train), verbose=0)
+        test_predictions = model.predict(self.lstm_dataset(X_test, batch_size=1024, symbol_ids=ids_test), verbose=0)
         
-        future_predictions = pd.DataFrame({
-            'Date': future_dates,
-            'Predicted_Price': predictions.flatten()
-        })
+        symbol_metrics = {}
+        for symbol_id, symbol in enumerate(symbols):
+            scaler = scalers[symbol]
+            train_mask, test_mask = ids_train == symbol_id, ids_test == symbol_id
+            y_train_actual = scaler.inverse_transform(y_train[train_mask].reshape(-1, 1))
+            y_test_actual = scaler.inverse_transform(y_test[test_mask].reshape(-1, 1))
+            train_pred = scaler.inverse_transform(train_predictions[train_mask])
+            test_pred = scaler.inverse_transform(test_predictions[test_mask])
+            symbol_metrics[symbol] = {
+                'train_rmse': np.sqrt(mean_squared_error(y_train_actual, train_pred)),
+                'test_rmse': np.sqrt(mean_squared_error(y_test_actual, test_pred)),
+                'train_mae': mean_absolute_error(y_train_actual, train_pred),
+                'test_mae': mean_absolute_error(y_test_actual, test_pred),
+            }
+        
+        results = {
+            'model': model,
+            'scalers': scalers,
+            'history': history.history,
+            'training_time': time.perf_counter() - start_time,
+            'symbols': symbol_metrics,
+            'train_rmse': np.mean([m['train_rmse'] for m in symbol_metrics.values()]),
+            'test_rmse': np.mean([m['test_rmse'] for m in symbol_metrics.values()]),
+        }
+        
+        return results
+    
+    def predict_future_prices(self, symbol, days_ahead=30, lookback_window=60, freq='D', samples=0,
+                              quantiles=DEFAULT_QUANTILES):
+        """Predict future prices for a given symbol.
+        
+        Use ``freq='B'`` to forecast business days only. With ``samples`` > 0
+        the frame also holds Monte Carlo dropout quantile columns (see
+        ``predict_future_prices_batch``).
+        """
+        return self.predict_future_prices_batch([symbol], days_ahead, lookback_window, freq, samples,
+                                                quantiles)[symbol]
+    
+    def predict_future_prices_batch(self, symbols, days_ahead=30, lookback_window=60, freq='D', samples=0,
+                                    quantiles=DEFAULT_QUANTILES):
+        """Predict future prices for several symbols with compiled rollouts, one call per model.
+        
+        Symbols are grouped by the model that forecasts them and each group
+        is rolled out in one call of the graph built by ``compile_forecast_fn``.
+        Only symbols of the global model share a call; every symbol with its
+        own model still costs one rollout of its own. Returns a dict of the
+        same ``Date``/``Predicted_Price`` frames as ``predict_future_prices``.
+        
+        With ``samples`` > 0, ``samples`` dropout-enabled paths per symbol are
+        rolled out as extra rows of one more call per model and each frame gains
+        a column per quantile (``Q05``, ``Q50``, ``Q95`` for the defaults) of
+        the sampled prices at every date. ``Predicted_Price`` stays the
+        deterministic path.
+        """
+        import tensorflow as tf
+        
+        groups = {}
+        for symbol in symbols:
+            groups.setdefault(self._model_key(symbol), []).append(symbol)
+        
+        future_predictions = {}
+        for model_key, group in groups.items():
+            # Prepare last sequences
+            suffix = 'global' if model_key == 'global_lstm' else 'lstm'
+            scalers = [self.scalers[f'{symbol}_{suffix}'] for symbol in group]
+            # One lookup per symbol: a compact PanelStore builds a new frame on every access
+            frames = [self.data[symbol] for symbol in group]
+            sequences = np.stack([
+                scaler.transform(frame[['Close']].iloc[-lookback_window:])
+                for frame, scaler in zip(frames, scalers)
+            ]).astype(np.float32)
+            symbol_ids = np.array([[self.global_symbols.get(symbol, 0)] for symbol in group], dtype=np.int32)
+            
+            rollout = self._forecast_fn(model_key)
+            scaled_predictions = rollout(tf.constant(sequences), tf.constant(days_ahead), tf.constant(symbol_ids))
+            scaled_predictions = scaled_predictions.numpy()
+            self.instrumentation.count('model_calls', days_ahead, stage='forecast')
+            
+            if samples:
+                # Every symbol's window repeated ``samples`` times: one batch, one call per step
+                sampled = rollout(tf.constant(np.repeat(sequences, samples, axis=0)), tf.constant(days_ahead),
+                                  tf.constant(np.repeat(symbol_ids, samples, axis=0)), training=True)
+                sampled = sampled.numpy().reshape(len(group), samples, days_ahead)
+                # The scaler is monotonic, so quantiles can be taken before inverse transforming
+                bands = np.quantile(sampled, quantiles, axis=1)
+                self.instrumentation.count('model_calls', days_ahead, stage='forecast')
+            
+            for i, (symbol, frame, scaler, predictions) in enumerate(zip(group, frames, scalers,
+                                                                          scaled_predictions)):
+                # Inverse transform predictions
+                predictions = scaler.inverse_transform(predictions.reshape(-1, 1))
+                
+                # Create future dates
+                last_date = frame.index[-1]
+                future_dates = pd.date_range(start=last_date + timedelta(days=1), 
+                                           periods=days_ahead, freq=freq)
+                
+                future_predictions[symbol] = pd.DataFrame({
+                    'Date': future_dates,
+                    'Predicted_Price': predictions.flatten()
+                })
+                if samples:
+                    for q, band in zip(quantiles, bands[:, i]):
+                        band = scaler.inverse_transform(band.reshape(-1, 1))
+                        future_predictions[symbol][quantile_column(q)] = band.flatten()
         
         return future_predictions
     
-    def calculate_technical_indicators(self, data):
-        """Calculate technical indicators for enhanced predictions."""
+    def export_numpy_model(self, symbol, path):
+        """Export the trained per-symbol model and scaler for ``numpy_lstm.NumpyLSTMRuntime``."""
+        if f'{symbol}_lstm' not in self.models:
+            raise ValueError(f"No trained model available for symbol {symbol}")
+        return export_lstm_model(self.models[f'{symbol}_lstm'], self.scalers[f'{symbol}_lstm'], path)
+    
+    def _model_key(self, symbol):
+        """Key of the model that forecasts ``symbol``: its own model, else the global one."""
+        if f'{symbol}_lstm' in self.models:
+            return f'{symbol}_lstm'
+        if 'global_lstm' in self.models and symbol in self.global_symbols:
+            return 'global_lstm'
+        raise ValueError(f"No trained model available for symbol {symbol}")
+    
+    def _forecast_fn(self, model_key):
+        """Compiled rollout for ``self.models[model_key]``, rebuilt when the model is replaced."""
+        model = self.models[model_key]
+        cached = self._forecast_fns.get(model_key)
+        if cached is None or cached[0] is not model:
+            cached = (model, compile_forecast_fn(model))
+            self._forecast_fns[model_key] = cached
+        return cached[1]
+    
+    def calculate_technical_indicators(self, data, symbol=None):
+        """Calculate technical indicators for enhanced predictions.
+        
+        Results are memoized in ``self.indicator_cache`` by ``symbol``, a
+        fingerprint of ``data`` and ``INDICATOR_PARAMS``; a disabled cache
+        skips the fingerprint. Each call returns a new copy, so neither new
+        columns nor in-place edits alter the cached frame. The copy is
+        shallow under Copy-on-Write (pandas >= 3) and deep otherwise.
+        """
+        cache = self.indicator_cache
+        key = cache.make_key(symbol, data, INDICATOR_PARAMS) if cache.enabled else None
+        cached = cache.get(key)
+        if cached is not None:
+            return cached.copy(deep=not COPY_ON_WRITE)
+        
+        self.instrumentation.count('bars_processed', len(data), stage='indicators')
         df = data.copy()
+        close = df['Close']
         
-        # Moving averages
-        df['MA_5'] = df['Close'].rolling(window=5).mean()
-        df['MA_10'] = df['Close'].rolling(window=10).mean()
-        df['MA_20'] = df['Close'].rolling(window=20).mean()
-        df['MA_50'] = df['Close'].rolling(window=50).mean()
+        # Moving averages; each window's rolling mean is computed once and shared (MA_20 is BB_Middle)
+        rolling_means = {}
+        
+        def rolling_mean(window):
+            if window not in rolling_means:
+                rolling_means[window] = close.rolling(window=window).mean()
+            return rolling_means[window]
+        
+        for window in INDICATOR_PARAMS['ma_windows']:
+            df[f'MA_{window}'] = rolling_mean(window)
         
         # Exponential moving averages
-        df['EMA_12'] = df['Close'].ewm(span=12).mean()
-        df['EMA_26'] = df['Close'].ewm(span=26).mean()
+        for span in INDICATOR_PARAMS['ema_spans']:
+            df[f'EMA_{span}'] = close.ewm(span=span).mean()
         
         # MACD
-        df['MACD'] = df['EMA_12'] - df['EMA_26']
-        df['MACD_Signal'] = df['MACD'].ewm(span=9).mean()
+        fast_span, slow_span = INDICATOR_PARAMS['ema_spans']
+        df['MACD'] = df[f'EMA_{fast_span}'] - df[f'EMA_{slow_span}']
+        df['MACD_Signal'] = df['MACD'].ewm(span=INDICATOR_PARAMS['macd_signal_span']).mean()
         df['MACD_Histogram'] = df['MACD'] - df['MACD_Signal']
         
         # RSI
-        delta = df['Close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+        delta = close.diff()
+        rsi_window = INDICATOR_PARAMS['rsi_window']
+        gain = (delta.where(delta > 0, 0)).rolling(window=rsi_window).mean()
+        loss = (-delta.where(delta < 0, 0)).rolling(window=rsi_window).mean()
         rs = gain / loss
         df['RSI'] = 100 - (100 / (1 + rs))
         
         # Bollinger Bands
-        df['BB_Middle'] = df['Close'].rolling(window=20).mean()
-        bb_std = df['Close'].rolling(window=20).std()
-        df['BB_Upper'] = df['BB_Middle'] + (bb_std * 2)
-        df['BB_Lower'] = df['BB_Middle'] - (bb_std * 2)
+        bb_window, bb_std_width = INDICATOR_PARAMS['bb_window'], INDICATOR_PARAMS['bb_std']
+        df['BB_Middle'] = rolling_mean(bb_window)
+        bb_std = close.rolling(window=bb_window).std()
+        df['BB_Upper'] = df['BB_Middle'] + (bb_std * bb_std_width)
+        df['BB_Lower'] = df['BB_Middle'] - (bb_std * bb_std_width)
         
         # Volume indicators
-        df['Volume_MA'] = df['Volume'].rolling(window=20).mean()
+        df['Volume_MA'] = df['Volume'].rolling(window=INDICATOR_PARAMS['volume_window']).mean()
         df['Volume_Ratio'] = df['Volume'] / df['Volume_MA']
         
-        return df
+        if self.compact:
+            added = df.columns.difference(data.columns)
+            df[added] = df[added].astype(np.float32)
+        
+        cache.put(key, df)
+        return df.copy(deep=not COPY_ON_WRITE) if key is not None else df
     
-    def generate_trading_signals(self, symbol):
-        """Generate trading signals based on technical analysis."""
+    def streaming_indicators(self, symbol):
+        """Return a ``StreamingIndicators`` seeded from the stored history of a symbol."""
         if symbol not in self.data:
             raise ValueError(f"No data available for symbol {symbol}")
         
-        data = self.calculate_technical_indicators(self.data[symbol])
-        
-        signals = []
+        return StreamingIndicators(self.data[symbol])
+    
+    def generate_trading_signals(self, symbol, rules=None):
+        """Generate trading signals based on technical analysis.
         
-        for i in range(len(data)):
-            if i < 50:  # Need enough data for indicators
-                signals.append('HOLD')
-                continue
-            
-            current = data.iloc[i]
-            previous = data.iloc[i-1]
-            
-            buy_signals = 0
-            sell_signals = 0
-            
-            # Moving average crossover
-            if current['MA_5'] > current['MA_20'] and previous['MA_5'] <= previous['MA_20']:
-                buy_signals += 1
-            elif current['MA_5'] < current['MA_20'] and previous['MA_5'] >= previous['MA_20']:
-                sell_signals += 1
-            
-            # MACD crossover
-            if current['MACD'] > current['MACD_Signal'] and previous['MACD'] <= previous['MACD_Signal']:
-                buy_signals += 1
-            elif current['MACD'] < current['MACD_Signal'] and previous['MACD'] >= previous['MACD_Signal']:
-                sell_signals += 1
-            
-            # RSI levels
-            if current['RSI'] < 30:  # Oversold
-                buy_signals += 1
-            elif current['RSI'] > 70:  # Overbought
-                sell_signals += 1
-            
-            # Bollinger Bands
-            if current['Close'] < current['BB_Lower']:  # Below lower band
-                buy_signals += 1
-            elif current['Close'] > current['BB_Upper']:  # Above upper band
-                sell_signals += 1
-            
-            # Generate final signal
-            if buy_signals >= 2:
-                signals.append('BUY')
-            elif sell_signals >= 2:
-                signals.append('SELL')
-            else:
-                signals.append('HOLD')
+        ``rules`` overrides entries of ``DEFAULT_SIGNAL_RULES``.
+        """
+        if symbol not in self.data:
+            raise ValueError(f"No data available for symbol {symbol}")
         
-        data['Signal'] = signals
+        data = self.calculate_technical_indicators(self.data[symbol], symbol)
+        data['Signal'] = signals_from_indicators(data, rules)
         return data
     
-    def create_market_dashboard(self, symbols):
-        """Create comprehensive market analysis dashboard."""
-        dashboard_data = {}
+    def screen_universe(self, symbols=None, rules=None):
+        """Ranked latest-bar snapshot of every loaded symbol in one panel pass (see ``screener.screen``)."""
+        from screener import screen
+        
+        symbols = list(self.data) if symbols is None else [symbol for symbol in symbols if symbol in self.data]
+        return screen(self.data, symbols, rules)
+    
+    def backtest_trading_signals(self, symbol, rules=None, cost=0.0005, allow_short=False):
+        """Backtest ``generate_trading_signals`` for a symbol (see ``backtest.backtest_signals``)."""
+        from backtest import backtest_signals
+        
+        signals = self.generate_trading_signals(symbol, rules)
+        return backtest_signals(signals['Close'], signals['Signal'], cost=cost, allow_short=allow_short)
+    
+    def sweep_signal_rules(self, symbol, cost=0.0005, allow_short=False, **values):
+        """Backtest every combination of signal rule values for a symbol, best Sharpe ratio first.
+        
+        ``values`` are lists per rule, e.g. ``rsi_oversold=[25, 30, 35]``;
+        see ``backtest.parameter_grid`` and ``backtest.sweep``.
+        """
+        from backtest import parameter_grid, sweep
+        
+        if symbol not in self.data:
+            raise ValueError(f"No data available for symbol {symbol}")
+        
+        indicators = self.calculate_technical_indicators(self.data[symbol], symbol)
+        return sweep(indicators, parameter_grid(**values), cost=cost, allow_short=allow_short)
+    
+    def create_market_dashboard(self, symbols, epochs=20, n_jobs=1, tf_threads=1, trained=None):
+        """Create comprehensive market analysis dashboard.
+        
+        With ``n_jobs`` > 1 (or ``None`` for one worker per CPU) symbols are
+        trained and analyzed in a spawned process pool, each worker capped at
+        ``tf_threads`` intra-op and inter-op TensorFlow threads. Trained
+        models and scalers are sent back so ``self.models`` ends up the same
+        as in a sequential run. Per-symbol stage timings are kept in
+        ``self.timings``. ``trained`` maps symbols to ``train_lstm_model``
+        results of models already trained (e.g. by ``TrainingScheduler``);
+        those symbols are analyzed in this process without training, always
+        sequentially (a ValueError is raised if ``n_jobs`` is not 1 as well).
+        Results holding an ``'error'`` give that error entry, and symbols
+        missing from ``trained`` get an error entry instead of being trained.
+        """
+        symbols = [symbol for symbol in symbols if symbol in self.data]
+        self.timings = {}
         
+        if trained is not None:
+            if n_jobs != 1:
+                raise ValueError("trained models are analyzed sequentially; pass n_jobs=1 with trained")
+            dashboard_data = {}
+            for symbol in symbols:
+                lstm_results = trained.get(symbol, {'error': 'Not trained within the time budget'})
+                dashboard_data[symbol] = ({'error': lstm_results['error']} if 'error' in lstm_results
+                                          else self._analyze_symbol(symbol, epochs, lstm_results))
+            return dashboard_data
+        if n_jobs == 1 or len(symbols) <= 1:
+            return {symbol: self._analyze_symbol(symbol, epochs) for symbol in symbols}
+        
+        results = {}
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=n_jobs, mp_context=context,
+                                 initializer=_init_dashboard_worker, initargs=(tf_threads,)) as pool:
+            futures = {pool.submit(_dashboard_worker, symbol, self.data[symbol], epochs, self.registry,
+                                   self.instrumentation.enabled): symbol
+                       for symbol in symbols}
+            for future in as_completed(futures):
+                symbol = futures[future]
+                try:
+                    results[symbol] = future.result()
+                except Exception as e:
+                    print(f"Error processing {symbol}: {e}")
+                    results[symbol] = {'entry': {'error': str(e)}, 'timing': {}}
+        
+        # Merge in input order so the output does not depend on completion order
+        dashboard_data = {}
         for symbol in symbols:
-            if symbol not in self.data:
-                continue
-            
-            # Train model and get predictions
-            try:
-                lstm_results = self.train_lstm_model(symbol, epochs=20)  # Reduced epochs for speed
+            result = results[symbol]
+            if 'weights' in result:
+                model = self.build_lstm_model(result['input_shape'])
+                model.set_weights(result['weights'])
+                self.models[f'{symbol}_lstm'] = model
+                self.scalers[f'{symbol}_lstm'] = result['scaler']
+                self.trained_until[symbol] = self.data[symbol].index[-1]
+            self.timings[symbol] = result['timing']
+            self.instrumentation.merge(result.get('spans', ()), result.get('counters', {}))
+            dashboard_data[symbol] = result['entry']
+        
+        return dashboard_data
+    
+    def _analyze_symbol(self, symbol, epochs=20, lstm_results=None):
+        """Train (unless ``lstm_results`` are given), forecast and score one symbol for the dashboard."""
+        timing = {}
+        start = time.perf_counter()
+        instrumentation = self.instrumentation
+        
+        # Train model and get predictions
+        try:
+            if lstm_results is None:
+                with instrumentation.span('train', symbol=symbol):
+                    lstm_results = self.train_lstm_model(symbol, epochs=epochs)  # Reduced epochs for speed
+            timing['train'] = time.perf_counter() - start
+            with instrumentation.span('forecast', symbol=symbol):
                 future_predictions = self.predict_future_prices(symbol, days_ahead=30)
+            timing['forecast'] = time.perf_counter() - start - timing['train']
+            with instrumentation.span('signals', symbol=symbol):
                 signals_data = self.generate_trading_signals(symbol)
-                
-                # Calculate performance metrics
-                current_price = self.data[symbol]['Close'].iloc[-1]
-                price_change_1d = ((current_price - self.data[symbol]['Close'].iloc[-2]) / 
-                                 self.data[symbol]['Close'].iloc[-2] * 100)
-                price_change_7d = ((current_price - self.data[symbol]['Close'].iloc[-7]) / 
-                                 self.data[symbol]['Close'].iloc[-7] * 100)
-                
-                # Get latest technical indicators
-                latest_indicators = signals_data.iloc[-1]
-                
-                dashboard_data[symbol] = {
-                    'current_price': round(current_price, 2),
-                    'price_change_1d': round(price_change_1d, 2),
-                    'price_change_7d': round(price_change_7d, 2),
-                    'predicted_price_30d': round(future_predictions['Predicted_Price'].iloc[-1], 2),
-                    'model_accuracy': {
-                        'train_rmse': round(lstm_results['train_rmse'], 2),
-                        'test_rmse': round(lstm_results['test_rmse'], 2)
-                    },
-                    'technical_indicators': {
-                        'RSI': round(latest_indicators['RSI'], 2),
-                        'MACD': round(latest_indicators['MACD'], 4),
-                        'Signal': latest_indicators['Signal']
-                    },
-                    'future_predictions': future_predictions.to_dict('records')
-                }
-                
-            except Exception as e:
-                print(f"Error processing {symbol}: {e}")
-                dashboard_data[symbol] = {'error': str(e)}
+            timing['signals'] = time.perf_counter() - start - timing['train'] - timing['forecast']
+            
+            # Calculate performance metrics
+            close = signals_data['Close']
+            current_price = close.iloc[-1]
+            price_change_1d = (current_price - close.iloc[-2]) / close.iloc[-2] * 100
+            price_change_7d = (current_price - close.iloc[-7]) / close.iloc[-7] * 100
+            
+            # Get latest technical indicators
+            latest_indicators = signals_data.iloc[-1]
+            
+            entry = {
+                'current_price': round(current_price, 2),
+                'price_change_1d': round(price_change_1d, 2),
+                'price_change_7d': round(price_change_7d, 2),
+                'predicted_price_30d': round(future_predictions['Predicted_Price'].iloc[-1], 2),
+                'model_accuracy': {
+                    'train_rmse': round(lstm_results['train_rmse'], 2),
+                    'test_rmse': round(lstm_results['test_rmse'], 2)
+                },
+                'technical_indicators': {
+                    'RSI': round(latest_indicators['RSI'], 2),
+                    'MACD': round(latest_indicators['MACD'], 4),
+                    'Signal': latest_indicators['Signal']
+                },
+                'future_predictions': future_predictions.to_dict('records')
+            }
+            
+        except Exception as e:
+            print(f"Error processing {symbol}: {e}")
+            entry = {'error': str(e)}
         
-        return dashboard_data
+        timing['total'] = time.perf_counter() - start
+        instrumentation.record_span('analyze_symbol', timing['total'], symbol=symbol)
+        self.timings[symbol] = timing
+        return entry
     
-    def run_complete_analysis(self, symbols=['AAPL', 'GOOGL', 'MSFT']):
-        """Run complete market trend analysis."""
-        print("Starting Market Trend Prediction Analysis...")
+    def run_complete_analysis(self, symbols=['AAPL', 'GOOGL', 'MSFT'], n_jobs=1, time_budget=None):
+        """Run complete market trend analysis.
         
-        # Fetch market data
-        print("1. Fetching market data...")
-        self.fetch_market_data(symbols)
+        With instrumentation enabled the whole run, the fetch and the
+        dashboard are recorded as spans and exported to the sinks at the end.
+        With ``time_budget`` (seconds, counted from the start of the run) the
+        models are trained by a ``TrainingScheduler`` with whatever the fetch
+        left of the budget instead of a fixed epoch count. The scheduler
+        reserves time for the dashboard's evaluation and 30-day forecasts, and
+        symbols it skips or fails to train get error entries. Its per-symbol
+        report is kept in ``self.training_report``. The scheduled models are
+        analyzed in this process, so ``n_jobs`` is then ignored with a warning.
+        """
+        print("Starting Market Trend Prediction Analysis...")
+        instrumentation = self.instrumentation
+        start = time.perf_counter()
         
-        # Create dashboard
-        print("2. Training models and generating predictions...")
-        dashboard = self.create_market_dashboard(symbols)
+        with instrumentation.span('analysis'):
+            # Fetch market data
+            print("1. Fetching market data...")
+            with instrumentation.span('fetch_all'):
+                self.fetch_market_data(symbols)
+            
+            trained = None
+            if time_budget is not None:
+                from scheduler import TrainingScheduler
+                
+                if n_jobs != 1:
+                    warnings.warn("n_jobs is ignored with time_budget: scheduled models are analyzed sequentially")
+                    n_jobs = 1
+                print("2. Training models within the time budget...")
+                scheduler = TrainingScheduler(self, max(time_budget - (time.perf_counter() - start), 0.0))
+                with instrumentation.span('schedule'):
+                    trained = scheduler.run(symbols)
+                self.training_report = scheduler.report()
+                print(self.training_report.to_string(index=False))
+            
+            # Create dashboard
+            print("2. Training models and generating predictions..." if trained is None
+                  else "3. Generating predictions...")
+            with instrumentation.span('dashboard'):
+                dashboard = self.create_market_dashboard(symbols, n_jobs=n_jobs, trained=trained)
         
-        print("3. Analysis completed!")
+        print(f"{3 if trained is None else 4}. Analysis completed!")
+        instrumentation.flush()
         
         return dashboard
 
+def _init_dashboard_worker(tf_threads):
+    """Cap TensorFlow threads in a dashboard worker to avoid oversubscription."""
+    import tensorflow as tf
+    
+    tf.config.threading.set_intra_op_parallelism_threads(tf_threads)
+    tf.config.threading.set_inter_op_parallelism_threads(tf_threads)
+
+
+def _dashboard_worker(symbol, data, epochs, registry=None, instrumented=False):
+    """Analyze one symbol in a worker process and return what the parent needs to merge.
+    
+    With ``instrumented`` the worker's spans and counters are returned too.
+    """
+    instrumentation = Instrumentation() if instrumented else None
+    predictor = MarketTrendPredictor(registry=registry, instrumentation=instrumentation)
+    predictor.data[symbol] = data
+    result = {'entry': predictor._analyze_symbol(symbol, epochs), 'timing': predictor.timings[symbol]}
+    if instrumented:
+        result['spans'], result['counters'] = instrumentation.spans, instrumentation.counters
+    
+    model = predictor.models.get(f'{symbol}_lstm')
+    if model is not None:
+        result['input_shape'] = model.input_shape[1:]
+        result['weights'] = model.get_weights()
+        result['scaler'] = predictor.scalers[f'{symbol}_lstm']
+    return result
+
+
 def main():
     """Main function to run market trend prediction."""
     predictor = MarketTrendPredictor()
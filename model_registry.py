@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Model Registry
+Persistent store of trained LSTM models, scalers and metrics keyed by a content hash
+of the input series and hyperparameters, so unchanged symbols skip retraining.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import time
+import warnings
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+
+
+class ModelRegistry:
+    """On-disk registry of trained models with size-bounded LRU eviction.
+    
+    Each entry is a directory named after its key holding the saved Keras
+    model, the pickled scaler, a ``meta.json`` with metrics, training
+    history and the last bar trained on, and optionally an ``arrays.npz`` of
+    predictions and a pickled ``recent.pkl`` frame of the latest bars (what
+    fine-tuning needs to resume in a new process). Entries are written to a
+    private temporary directory and renamed into place, so processes sharing
+    the registry never write to the same path. ``symbols/<symbol>/`` holds an
+    empty marker file per entry key, so looking up a symbol's entries does
+    not read the whole registry. When ``max_bytes`` is set, the least
+    recently used entries are evicted after every save until the registry
+    fits; the entry just saved is never evicted.
+    """
+    
+    def __init__(self, root, max_bytes=None):
+        """Create a registry rooted at ``root``."""
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+    
+    @staticmethod
+    def make_key(data, params):
+        """Content hash of a price series (values and timestamps) plus hyperparameters."""
+        digest = hashlib.sha256()
+        digest.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+        digest.update(json.dumps(params, sort_keys=True, default=str).encode('utf-8'))
+        return digest.hexdigest()
+    
+    def save(self, key, symbol, model, scaler, metrics, history=None, arrays=None, params=None,
+             trained_until=None, recent=None):
+        """Store a trained model under ``key`` and evict old entries if over budget."""
+        path = os.path.join(self.root, key)
+        tmp_path = tempfile.mkdtemp(prefix=f'{key}.', suffix='.tmp', dir=self.root)
+        
+        model.save(os.path.join(tmp_path, 'model.keras'))
+        with open(os.path.join(tmp_path, 'scaler.pkl'), 'wb') as f:
+            pickle.dump(scaler, f)
+        if arrays:
+            np.savez(os.path.join(tmp_path, 'arrays.npz'), **arrays)
+        if recent is not None:
+            with open(os.path.join(tmp_path, 'recent.pkl'), 'wb') as f:
+                pickle.dump(recent, f)
+        
+        now = time.time()
+        meta = {
+            'key': key,
+            'symbol': symbol,
+            'params': params or {},
+            'metrics': {name: float(value) for name, value in metrics.items()},
+            'history': {name: [float(v) for v in values] for name, values in (history or {}).items()},
+            'trained_until': None if trained_until is None else pd.Timestamp(trained_until).isoformat(),
+            'created': now,
+            'last_used': now,
+        }
+        with open(os.path.join(tmp_path, 'meta.json'), 'w') as f:
+            json.dump(meta, f)
+        
+        # Publish the finished entry in one rename so readers never see a partial one
+        shutil.rmtree(path, ignore_errors=True)
+        try:
+            os.replace(tmp_path, path)
+        except OSError:
+            # Another process published the same key (same data and parameters) first: keep its entry
+            shutil.rmtree(tmp_path, ignore_errors=True)
+        symbol_dir = self._symbol_dir(symbol)
+        os.makedirs(symbol_dir, exist_ok=True)
+        open(os.path.join(symbol_dir, key), 'w').close()
+        
+        self.evict(keep=(key,))
+        if self.max_bytes is not None and self._size(key) > self.max_bytes:
+            warnings.warn(f"Registry entry {key} alone exceeds max_bytes={self.max_bytes}")
+        return key
+    
+    def load(self, key):
+        """Return ``{'model', 'scaler', 'metrics', 'history', 'arrays', 'recent', ...}`` for ``key``, or None.
+        
+        ``trained_until`` comes back as a ``pd.Timestamp`` (or None) and
+        ``recent`` as the saved frame (or None).
+        """
+        meta = self._read_meta(key)
+        if meta is None:
+            return None
+        
+        from tensorflow.keras.models import load_model
+        
+        path = os.path.join(self.root, key)
+        entry = dict(meta)
+        entry['model'] = load_model(os.path.join(path, 'model.keras'))
+        with open(os.path.join(path, 'scaler.pkl'), 'rb') as f:
+            entry['scaler'] = pickle.load(f)
+        arrays_path = os.path.join(path, 'arrays.npz')
+        if os.path.exists(arrays_path):
+            with np.load(arrays_path) as arrays:
+                entry['arrays'] = {name: arrays[name] for name in arrays.files}
+        else:
+            entry['arrays'] = {}
+        recent_path = os.path.join(path, 'recent.pkl')
+        entry['recent'] = None
+        if os.path.exists(recent_path):
+            with open(recent_path, 'rb') as f:
+                entry['recent'] = pickle.load(f)
+        if entry.get('trained_until') is not None:
+            entry['trained_until'] = pd.Timestamp(entry['trained_until'])
+        
+        meta['last_used'] = time.time()
+        self._write_meta(key, meta)
+        return entry
+    
+    def latest(self, symbol, **params):
+        """Load the most recently created entry of ``symbol`` whose params include ``params``, or None."""
+        symbol_dir = self._symbol_dir(symbol)
+        keys = os.listdir(symbol_dir) if os.path.isdir(symbol_dir) else []
+        matches = [meta for meta in map(self._read_meta, keys) if meta is not None
+                   and all(meta['params'].get(name) == value for name, value in params.items())]
+        if not matches:
+            return None
+        return self.load(max(matches, key=lambda entry: entry['created'])['key'])
+    
+    def contains(self, key):
+        """Whether ``key`` has a stored entry."""
+        return self._read_meta(key) is not None
+    
+    def entries(self):
+        """List entries (metadata plus size in bytes), most recently used first."""
+        entries = []
+        for key in os.listdir(self.root):
+            if key.endswith('.tmp'):
+                continue  # An entry still being written
+            meta = self._read_meta(key)
+            if meta is not None:
+                meta['size'] = self._size(key)
+                entries.append(meta)
+        return sorted(entries, key=lambda meta: meta['last_used'], reverse=True)
+    
+    def total_bytes(self):
+        """Disk space used by all entries."""
+        return sum(entry['size'] for entry in self.entries())
+    
+    def purge(self, key=None, symbol=None):
+        """Delete one entry, every entry of a symbol, or (with no arguments) everything."""
+        removed = []
+        for entry in self.entries():
+            if (key is None or entry['key'] == key) and (symbol is None or entry['symbol'] == symbol):
+                self._remove(entry)
+                removed.append(entry['key'])
+        return removed
+    
+    def evict(self, keep=()):
+        """Remove least recently used entries not in ``keep`` until the registry fits in ``max_bytes``."""
+        if self.max_bytes is None:
+            return []
+        
+        entries = self.entries()
+        total = sum(entry['size'] for entry in entries)
+        candidates = [entry for entry in entries if entry['key'] not in keep]
+        evicted = []
+        while candidates and total > self.max_bytes:
+            entry = candidates.pop()
+            self._remove(entry)
+            total -= entry['size']
+            evicted.append(entry['key'])
+        return evicted
+    
+    def _remove(self, entry):
+        shutil.rmtree(os.path.join(self.root, entry['key']), ignore_errors=True)
+        try:
+            os.remove(os.path.join(self._symbol_dir(entry['symbol']), entry['key']))
+        except OSError:
+            pass
+    
+    def _symbol_dir(self, symbol):
+        return os.path.join(self.root, 'symbols', quote(symbol, safe=''))
+    
+    def _read_meta(self, key):
+        meta_path = os.path.join(self.root, key, 'meta.json')
+        try:
+            with open(meta_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def _write_meta(self, key, meta):
+        meta_path = os.path.join(self.root, key, 'meta.json')
+        with open(meta_path + '.tmp', 'w') as f:
+            json.dump(meta, f)
+        os.replace(meta_path + '.tmp', meta_path)
+    
+    def _size(self, key):
+        path = os.path.join(self.root, key)
+        return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
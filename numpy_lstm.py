@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+NumPy LSTM Runtime
+Inference-only forward pass for the models built by MarketTrendPredictor.build_lstm_model.
+Exported weights are served with NumPy alone, without importing TensorFlow.
+"""
+
+import numpy as np
+
+
+def export_lstm_model(model, scaler, path):
+    """Write the weights of a ``build_lstm_model`` network and its scaler to a compact ``.npz`` file.
+    
+    Supports stacks of LSTM layers (Dropout is skipped, as at inference)
+    followed by a single Dense output, the layout ``build_lstm_model`` creates.
+    """
+    arrays = {}
+    n_lstm = 0
+    dense = None
+    for layer in model.layers:
+        kind = layer.__class__.__name__
+        if kind == 'LSTM':
+            kernel, recurrent_kernel, bias = layer.get_weights()
+            arrays[f'lstm{n_lstm}_kernel'] = kernel
+            arrays[f'lstm{n_lstm}_recurrent_kernel'] = recurrent_kernel
+            arrays[f'lstm{n_lstm}_bias'] = bias
+            n_lstm += 1
+        elif kind == 'Dense':
+            dense = layer.get_weights()
+        elif kind != 'Dropout':
+            raise ValueError(f"Unsupported layer for NumPy export: {kind}")
+    
+    if n_lstm == 0 or dense is None:
+        raise ValueError("Expected LSTM layers followed by a Dense output layer")
+    
+    arrays['dense_kernel'], arrays['dense_bias'] = dense
+    arrays['n_lstm_layers'] = np.array(n_lstm)
+    arrays['lookback_window'] = np.array(model.input_shape[1])
+    arrays['scaler_min'] = np.asarray(scaler.min_, dtype=np.float64)
+    arrays['scaler_scale'] = np.asarray(scaler.scale_, dtype=np.float64)
+    np.savez(path, **arrays)
+    return path
+
+
+def _sigmoid(x):
+    return 0.5 * (np.tanh(0.5 * x) + 1.0)  # Overflow-free logistic
+
+
+class NumpyLSTMRuntime:
+    """Batched NumPy inference over one exported model per symbol.
+    
+    Weights of all symbols are stacked along a leading symbol axis, so each
+    LSTM time step for every symbol is one batched matmul. All models must
+    share the same architecture.
+    """
+    
+    def __init__(self, exported, dtype=np.float32):
+        """Load ``{symbol: path_or_npz_dict}`` as produced by ``export_lstm_model``."""
+        self.symbols = list(exported)
+        self.dtype = dtype
+        loaded = [self._load(exported[symbol]) for symbol in self.symbols]
+        first = loaded[0]
+        self.n_lstm_layers = int(first['n_lstm_layers'])
+        self.lookback_window = int(first['lookback_window'])
+        
+        def stack(name):
+            return np.stack([arrays[name] for arrays in loaded]).astype(dtype)
+        
+        self.layers = [
+            (stack(f'lstm{k}_kernel'), stack(f'lstm{k}_recurrent_kernel'), stack(f'lstm{k}_bias'))
+            for k in range(self.n_lstm_layers)
+        ]
+        self.dense_kernel = stack('dense_kernel')
+        self.dense_bias = stack('dense_bias')
+        self.scaler_min = np.stack([arrays['scaler_min'][0] for arrays in loaded])
+        self.scaler_scale = np.stack([arrays['scaler_scale'][0] for arrays in loaded])
+    
+    @staticmethod
+    def _load(source):
+        if isinstance(source, dict):
+            return source
+        with np.load(source) as arrays:
+            return {name: arrays[name] for name in arrays.files}
+    
+    def predict_scaled(self, windows):
+        """One-step prediction for scaled windows of shape (symbols, batch, lookback, 1) -> (symbols, batch)."""
+        x = np.asarray(windows, dtype=self.dtype)
+        n_symbols, batch, steps, _ = x.shape
+        
+        for k, (kernel, recurrent_kernel, bias) in enumerate(self.layers):
+            units = recurrent_kernel.shape[1]
+            return_sequences = k < self.n_lstm_layers - 1
+            # Input projections for every time step at once: (S, B, T, 4u)
+            projected = np.matmul(x, kernel[:, None]) + bias[:, None, None, :]
+            h = np.zeros((n_symbols, batch, units), dtype=self.dtype)
+            c = np.zeros_like(h)
+            outputs = np.empty((n_symbols, batch, steps, units), dtype=self.dtype) if return_sequences else None
+            
+            for t in range(steps):
+                # Gate order matches Keras: input, forget, cell, output
+                z = projected[:, :, t, :] + np.matmul(h, recurrent_kernel)
+                gates = _sigmoid(z)
+                i, f, o = gates[..., :units], gates[..., units:2 * units], gates[..., 3 * units:]
+                g = np.tanh(z[..., 2 * units:3 * units])
+                c = f * c + i * g
+                h = o * np.tanh(c)
+                if return_sequences:
+                    outputs[:, :, t, :] = h
+            
+            x = outputs if return_sequences else h
+        
+        return (np.matmul(x, self.dense_kernel) + self.dense_bias[:, None, :])[..., 0]
+    
+    def forecast(self, closes, days_ahead=30):
+        """Autoregressive price forecast for every symbol.
+        
+        ``closes`` maps each symbol (or is a (symbols, >= lookback) array in
+        ``self.symbols`` order) to its recent close prices. Returns a
+        (symbols, days_ahead) array of prices.
+        """
+        if isinstance(closes, dict):
+            closes = [closes[symbol] for symbol in self.symbols]
+        last = np.stack([np.asarray(c, dtype=np.float64)[-self.lookback_window:] for c in closes])
+        
+        # One buffer holds the window and every prediction; step k reads a slice of it
+        buffer = np.empty((len(self.symbols), self.lookback_window + days_ahead), dtype=self.dtype)
+        buffer[:, :self.lookback_window] = last * self.scaler_scale[:, None] + self.scaler_min[:, None]
+        for step in range(days_ahead):
+            window = buffer[:, step:step + self.lookback_window]
+            buffer[:, self.lookback_window + step] = self.predict_scaled(window[:, None, :, None])[:, 0]
+        
+        scaled = buffer[:, self.lookback_window:].astype(np.float64)
+        return (scaled - self.scaler_min[:, None]) / self.scaler_scale[:, None]
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Panel Store
+Compact columnar storage for many symbols: one contiguous float32 (symbol x time x field)
+price array plus an integer volume array, exposed as a mapping of per-symbol frames.
+"""
+
+from collections.abc import MutableMapping
+from functools import reduce
+
+import numpy as np
+import pandas as pd
+
+from market_data import synthetic_universe
+
+PRICE_COLUMNS = ('Open', 'High', 'Low', 'Close')
+
+
+def volume_dtype(max_volume):
+    """Smallest unsigned integer type that holds ``max_volume`` (uint32 for any listed stock, else uint64)."""
+    return np.uint32 if max_volume <= np.iinfo(np.uint32).max else np.uint64
+
+
+def compact_frame(frame, dtype=np.float32):
+    """Copy of an OHLCV frame with ``dtype`` prices and integer volume."""
+    compact = frame.astype({column: dtype for column in PRICE_COLUMNS if column in frame.columns})
+    if 'Volume' in compact.columns:
+        volume = compact['Volume'].fillna(0).to_numpy()
+        compact['Volume'] = volume.astype(volume_dtype(volume.max(initial=0)))
+    return compact
+
+
+class PanelStore(MutableMapping):
+    """All symbols' bars in one (symbol, time, field) array behind a ``{symbol: DataFrame}`` interface.
+    
+    Bars are aligned on the union of all timestamps; a symbol's missing bars
+    are NaN in the panel and left out of its frame. Frames are built on
+    access, so the resident data stays at 4 bytes per price plus the volume
+    width; as every access builds a new frame, hot paths should look a
+    symbol up once. Assigning a frame with exactly the panel's index writes
+    it into the panel; any other frame (e.g. one with new bars) is kept
+    compacted on the side and shadows the panel row.
+    """
+    
+    def __init__(self, symbols, index, prices, volume):
+        """Wrap ``prices`` of shape (symbols, time, 4) and ``volume`` of shape (symbols, time)."""
+        self.symbols = list(symbols)
+        self.index = index
+        self.prices = prices
+        self.volume = volume
+        self._rows = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self._frames = {}
+    
+    @classmethod
+    def from_frames(cls, frames, dtype=np.float32):
+        """Build a panel from ``{symbol: OHLCV DataFrame}``."""
+        symbols = list(frames)
+        index = reduce(lambda left, right: left.union(right), (frames[s].index for s in symbols))
+        prices = np.full((len(symbols), len(index), len(PRICE_COLUMNS)), np.nan, dtype=dtype)
+        max_volume = max((frames[s]['Volume'].max() for s in symbols if len(frames[s])), default=0)
+        volume = np.zeros((len(symbols), len(index)), dtype=volume_dtype(np.nan_to_num(max_volume)))
+        
+        for i, symbol in enumerate(symbols):
+            frame = frames[symbol]
+            positions = index.get_indexer(frame.index)
+            prices[i, positions] = frame[list(PRICE_COLUMNS)].to_numpy(dtype=dtype)
+            volume[i, positions] = frame['Volume'].fillna(0).to_numpy()
+        return cls(symbols, index, prices, volume)
+    
+    @classmethod
+    def from_synthetic(cls, symbols, days=730, dtype=np.float32):
+        """Synthetic universe (same bars as ``synthetic_universe``) stored directly as a panel."""
+        symbols = list(symbols)
+        dates, fields = synthetic_universe(symbols, days=days, dtype=dtype, as_frames=False)
+        prices = np.stack([fields[column] for column in PRICE_COLUMNS], axis=-1)
+        volume = fields['Volume'].astype(volume_dtype(fields['Volume'].max(initial=0)))
+        return cls(symbols, dates, prices, volume)
+    
+    @property
+    def nbytes(self):
+        """Resident bytes of the panel arrays and any side frames."""
+        side = sum(int(frame.memory_usage(index=True).sum()) for frame in self._frames.values())
+        return self.prices.nbytes + self.volume.nbytes + side
+    
+    def panel_row(self, symbol):
+        """Row of ``symbol`` in ``prices``/``volume``, or None when its bars are kept in a side frame."""
+        return None if symbol in self._frames else self._rows[symbol]
+    
+    def __getitem__(self, symbol):
+        if symbol in self._frames:
+            return self._frames[symbol]
+        row = self._rows[symbol]
+        frame = pd.DataFrame({column: self.prices[row, :, k] for k, column in enumerate(PRICE_COLUMNS)},
+                             index=self.index)
+        frame['Volume'] = self.volume[row]
+        valid = ~np.isnan(self.prices[row, :, PRICE_COLUMNS.index('Close')])
+        return frame if valid.all() else frame[valid]
+    
+    def __setitem__(self, symbol, frame):
+        row = self._rows.get(symbol)
+        if row is not None and frame.index.equals(self.index):
+            self.prices[row] = frame[list(PRICE_COLUMNS)].to_numpy(dtype=self.prices.dtype)
+            self.volume[row] = frame['Volume'].fillna(0).to_numpy()
+            self._frames.pop(symbol, None)
+            return
+        if symbol not in self._rows:
+            self.symbols.append(symbol)
+            self._rows[symbol] = None
+        self._frames[symbol] = compact_frame(frame, self.prices.dtype)
+    
+    def __delitem__(self, symbol):
+        del self._rows[symbol]
+        self._frames.pop(symbol, None)
+        self.symbols.remove(symbol)
+    
+    def __iter__(self):
+        return iter(self.symbols)
+    
+    def __len__(self):
+        return len(self.symbols)
+    
+    def __contains__(self, symbol):
+        return symbol in self._rows
+
+
+def right_align(data, symbols=None, columns=('Close', 'Volume'), max_bars=None):
+    """Stack each symbol's own bars into (time, symbol) arrays aligned on its newest bar.
+    
+    Rows count bars back from each symbol's latest bar instead of following
+    calendar dates, so later listings, halts and other missing bars never
+    leave gaps inside a column: column j holds the bars (with a Close) of
+    ``data[symbols[j]]`` in its last rows and NaN above. ``max_bars`` keeps
+    only each symbol's most recent bars. ``data`` is a ``{symbol:
+    DataFrame}`` mapping; a ``PanelStore`` is aligned straight from its
+    arrays. Returns ``(fields, last_bars, lengths)``: float64 (T, N) arrays
+    per column, the timestamp of each symbol's newest bar (NaT without bars)
+    and each symbol's total bar count.
+    """
+    symbols = list(data) if symbols is None else list(symbols)
+    panel_rows = [data.panel_row(symbol) if isinstance(data, PanelStore) else None for symbol in symbols]
+    in_panel = [j for j, row in enumerate(panel_rows) if row is not None]
+    framed = sorted(set(range(len(symbols))) - set(in_panel))
+    lengths = np.zeros(len(symbols), dtype=np.int64)
+    last_bars = [pd.NaT] * len(symbols)
+    
+    frames = {}
+    for j in framed:
+        frame = data[symbols[j]]
+        close = frame['Close'].to_numpy(dtype=np.float64)
+        valid = ~np.isnan(close)
+        values = {column: close if column == 'Close' else frame[column].to_numpy(dtype=np.float64)
+                  for column in columns}
+        if not valid.all():
+            values = {column: series[valid] for column, series in values.items()}
+        frames[j] = values
+        lengths[j] = len(values['Close'])
+        if lengths[j]:
+            last_bars[j] = frame.index[-1] if valid[-1] else frame.index[valid][-1]
+    
+    if in_panel:
+        rows = np.array([panel_rows[j] for j in in_panel])
+        panel = {column: data.volume[rows] if column == 'Volume' else data.prices[rows, :, PRICE_COLUMNS.index(column)]
+                 for column in columns}
+        valid = ~np.isnan(data.prices[rows, :, PRICE_COLUMNS.index('Close')])
+        lengths[in_panel] = valid.sum(axis=1)
+        newest = valid.shape[1] - 1 - np.argmax(valid[:, ::-1], axis=1)
+        for j, length, stamp in zip(in_panel, lengths[in_panel], data.index[newest]):
+            if length:
+                last_bars[j] = stamp
+        if not valid.all():
+            # A stable sort of the mask moves each row's missing bars to the front, keeping bar order
+            order = np.argsort(valid, axis=1, kind='stable')
+            panel = {column: np.take_along_axis(values, order, axis=1) for column, values in panel.items()}
+            padding = ~np.take_along_axis(valid, order, axis=1)
+        else:
+            padding = None
+    
+    n_rows = int(lengths.max(initial=0))
+    if max_bars is not None:
+        n_rows = min(n_rows, max_bars)
+    fields = {column: np.full((n_rows, len(symbols)), np.nan) for column in columns}
+    for j, values in frames.items():
+        count = min(lengths[j], n_rows)
+        for column in columns:
+            fields[column][n_rows - count:, j] = values[column][len(values[column]) - count:]
+    if in_panel and n_rows:
+        width = min(n_rows, valid.shape[1])
+        targets = slice(None) if len(in_panel) == len(symbols) else in_panel
+        for column in columns:
+            block = panel[column][:, -width:].astype(np.float64)
+            if padding is not None:
+                block[padding[:, -width:]] = np.nan
+            fields[column][n_rows - width:, targets] = block.T
+    
+    return fields, pd.Index(last_bars), lengths
@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+"""
+Prediction Service
+Long-running HTTP service around MarketTrendPredictor. Models stay in memory, concurrent
+forecast requests are grouped by a micro-batcher into one rollout per model, signals are
+served from a cache, and /metrics reports latency percentiles and queue depth.
+"""
+
+import argparse
+import json
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from market_data import fetch_many
+from market_predictor import MarketTrendPredictor
+from signals_cli import latest_signals
+
+MAX_DAYS_AHEAD = 365
+
+
+class MicroBatcher:
+    """Groups items submitted from many threads into batches handled by one worker thread.
+    
+    The worker takes the first waiting item, then keeps collecting until
+    ``max_batch_size`` items are gathered or ``max_delay`` seconds have passed
+    since that first item, and calls ``process(items)``, which must return
+    one result per item in order. An exception instance returned as a result
+    is raised by that item's future alone; if ``process`` itself raises,
+    every item of the batch gets the exception.
+    """
+    
+    def __init__(self, process, max_batch_size=64, max_delay=0.005):
+        """Start the worker thread."""
+        self.process = process
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+        self.max_depth = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+        self._thread.start()
+    
+    @property
+    def depth(self):
+        """Items waiting for a batch."""
+        return self._queue.qsize()
+    
+    def submit(self, item):
+        """Queue ``item`` and return a ``Future`` of its result."""
+        future = Future()
+        self._queue.put((item, future))
+        self.max_depth = max(self.max_depth, self._queue.qsize())
+        return future
+    
+    def close(self):
+        """Finish the queued items and stop the worker."""
+        self._queue.put(None)
+        self._thread.join()
+    
+    def _run(self):
+        stopping = False
+        while not stopping:
+            entry = self._queue.get()
+            if entry is None:
+                break
+            batch = [entry]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch_size:
+                try:
+                    entry = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if entry is None:
+                    stopping = True
+                    break
+                batch.append(entry)
+            
+            self.batches += 1
+            self.items += len(batch)
+            self.largest_batch = max(self.largest_batch, len(batch))
+            try:
+                results = self.process([item for item, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+            else:
+                for (_, future), result in zip(batch, results):
+                    if isinstance(result, Exception):
+                        future.set_exception(result)
+                    else:
+                        future.set_result(result)
+
+
+class LatencyStats:
+    """Request count, error count and latency percentiles over the most recent ``window`` requests."""
+    
+    def __init__(self, window=10000):
+        self.count = 0
+        self.errors = 0
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+    
+    def add(self, seconds, error=False):
+        """Record one request."""
+        with self._lock:
+            self.count += 1
+            self.errors += error
+            self._latencies.append(seconds)
+    
+    def summary(self):
+        """Counts plus p50/p95/p99 latency in milliseconds."""
+        with self._lock:
+            latencies = np.array(self._latencies)
+        summary = {'count': self.count, 'errors': self.errors}
+        for q in (50, 95, 99):
+            summary[f'p{q}_ms'] = round(float(np.percentile(latencies, q)) * 1000, 3) if len(latencies) else None
+        return summary
+
+
+class PredictionService:
+    """Forecasts and signals for the symbols of a trained ``MarketTrendPredictor``.
+    
+    Forecast requests go through a ``MicroBatcher``: a batch forecasts its
+    distinct symbols once, for the longest horizon asked, with
+    ``predict_future_prices_batch`` and hands each request the first
+    ``days_ahead`` rows (a rollout's first steps do not depend on its
+    length). Symbols sharing a model (all symbols of a global model) take one
+    model call per batch; a failing model call is retried symbol by symbol,
+    so only the requests of the failing symbol get its exception. The worker
+    thread is the only one running the model. Signal rows are cached per
+    symbol until ``invalidate``; a cache miss is computed under that
+    symbol's lock only, so it never delays other symbols.
+    """
+    
+    def __init__(self, predictor, lookback_window=60, max_batch_size=64, max_delay=0.005):
+        """Serve ``predictor``, whose models were trained with ``lookback_window``."""
+        self.predictor = predictor
+        self.lookback_window = lookback_window
+        self.batcher = MicroBatcher(self._forecast_batch, max_batch_size, max_delay)
+        self.latency = {'forecast': LatencyStats(), 'signals': LatencyStats()}
+        self.signal_cache = {}
+        self.signal_hits = 0
+        self.signal_misses = 0
+        self.started = time.time()
+        self._signal_lock = threading.Lock()
+        self._symbol_locks = {}
+        self._generation = 0
+    
+    def forecast(self, symbol, days_ahead=30):
+        """Forecast rows (``Date``, ``Predicted_Price``) for ``symbol``; raises KeyError for unknown symbols."""
+        if not 1 <= days_ahead <= MAX_DAYS_AHEAD:
+            raise ValueError(f"days must be between 1 and {MAX_DAYS_AHEAD}")
+        try:
+            self.predictor._model_key(symbol)
+        except ValueError:
+            raise KeyError(symbol) from None
+        return self.batcher.submit((symbol, days_ahead)).result()
+    
+    def signals(self, symbol):
+        """Latest indicators and trading signal for ``symbol``; raises KeyError for unknown symbols."""
+        if symbol not in self.predictor.data:
+            raise KeyError(symbol)
+        with self._signal_lock:
+            row = self.signal_cache.get(symbol)
+            if row is not None:
+                self.signal_hits += 1
+                return row
+            symbol_lock = self._symbol_locks.setdefault(symbol, threading.Lock())
+        
+        with symbol_lock:
+            # Another request may have filled the entry while this one waited
+            with self._signal_lock:
+                row = self.signal_cache.get(symbol)
+                if row is not None:
+                    self.signal_hits += 1
+                    return row
+                self.signal_misses += 1
+                generation = self._generation
+            row = latest_signals(self.predictor, [symbol])[0]
+            with self._signal_lock:
+                # A row computed from data invalidated meanwhile is returned but not cached
+                if generation == self._generation:
+                    self.signal_cache[symbol] = row
+        return row
+    
+    def invalidate(self, symbol=None):
+        """Drop cached signal rows, e.g. after ``predictor.data`` was refreshed."""
+        with self._signal_lock:
+            self._generation += 1
+            if symbol is None:
+                self.signal_cache.clear()
+            else:
+                self.signal_cache.pop(symbol, None)
+    
+    def warm_up(self, days_ahead=30):
+        """Trace the forecast graph before taking traffic.
+        
+        The rollout is traced for two batch sizes so that ``reduce_retracing``
+        relaxes the batch dimension and later batch sizes reuse the graph.
+        """
+        symbols = [symbol for symbol in self.predictor.data if self._has_model(symbol)]
+        if symbols:
+            self._forecast_batch([(symbol, days_ahead) for symbol in symbols])
+            self._forecast_batch([(symbols[0], days_ahead)])
+    
+    def metrics(self):
+        """Latency percentiles per endpoint, queue depth, batching and cache statistics."""
+        batcher = self.batcher
+        return {
+            'uptime_seconds': round(time.time() - self.started, 3),
+            'queue_depth': batcher.depth,
+            'max_queue_depth': batcher.max_depth,
+            'batches': batcher.batches,
+            'batched_requests': batcher.items,
+            'mean_batch_size': round(batcher.items / batcher.batches, 3) if batcher.batches else None,
+            'largest_batch': batcher.largest_batch,
+            'signal_cache': {'hits': self.signal_hits, 'misses': self.signal_misses,
+                             'entries': len(self.signal_cache)},
+            'endpoints': {name: stats.summary() for name, stats in self.latency.items()},
+        }
+    
+    def close(self):
+        """Stop the batcher after the queued requests."""
+        self.batcher.close()
+    
+    def _has_model(self, symbol):
+        try:
+            self.predictor._model_key(symbol)
+        except ValueError:
+            return False
+        return True
+    
+    def _forecast_batch(self, requests):
+        """One forecast (or the exception that stopped it) per request, one model call per model."""
+        horizon = max(days_ahead for _, days_ahead in requests)
+        groups, forecasts = {}, {}
+        for symbol in dict.fromkeys(symbol for symbol, _ in requests):
+            if self._has_model(symbol):
+                groups.setdefault(self.predictor._model_key(symbol), []).append(symbol)
+            else:
+                forecasts[symbol] = KeyError(symbol)
+        for group in groups.values():
+            forecasts.update(self._forecast_group(group, horizon))
+        return [forecasts[symbol] if isinstance(forecasts[symbol], Exception)
+                else forecasts[symbol].iloc[:days_ahead] for symbol, days_ahead in requests]
+    
+    def _forecast_group(self, symbols, horizon):
+        try:
+            return self.predictor.predict_future_prices_batch(symbols, horizon, self.lookback_window)
+        except Exception as e:
+            if len(symbols) == 1:
+                return {symbols[0]: e}
+        # Isolate the failing symbols of a shared model: each retry is its own model call
+        forecasts = {}
+        for symbol in symbols:
+            forecasts.update(self._forecast_group([symbol], horizon))
+        return forecasts
+
+
+def make_handler(service):
+    """``BaseHTTPRequestHandler`` subclass serving ``service``.
+    
+    Endpoints (all GET, JSON responses): ``/health``, ``/metrics``,
+    ``/forecast?symbol=AAPL&days=30`` and ``/signals?symbol=AAPL``.
+    """
+    
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        
+        def do_GET(self):
+            url = urlparse(self.path)
+            params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            routes = {'/health': self._health, '/metrics': self._metrics,
+                      '/forecast': self._forecast, '/signals': self._signals}
+            route = routes.get(url.path)
+            if route is None:
+                self._send(404, {'error': f"Unknown path {url.path}"})
+                return
+            route(params)
+        
+        def log_message(self, format, *args):
+            pass  # One line per request would dominate a load test
+        
+        def _health(self, params):
+            self._send(200, {'status': 'ok', 'symbols': len(service.predictor.data)})
+        
+        def _metrics(self, params):
+            self._send(200, service.metrics())
+        
+        def _forecast(self, params):
+            self._timed('forecast', params, lambda symbol: self._forecast_body(symbol, params))
+        
+        def _signals(self, params):
+            self._timed('signals', params, service.signals)
+        
+        def _forecast_body(self, symbol, params):
+            frame = service.forecast(symbol, int(params.get('days', 30)))
+            return {
+                'symbol': symbol,
+                'dates': [date.strftime('%Y-%m-%d') for date in frame['Date']],
+                'predicted_prices': [round(float(price), 4) for price in frame['Predicted_Price']],
+            }
+        
+        def _timed(self, endpoint, params, handle):
+            start = time.perf_counter()
+            symbol = params.get('symbol')
+            try:
+                if symbol is None:
+                    raise ValueError("Missing 'symbol' parameter")
+                status, body = 200, handle(symbol)
+            except KeyError:
+                status, body = 404, {'error': f"Unknown symbol {symbol}"}
+            except ValueError as e:
+                status, body = 400, {'error': str(e)}
+            except Exception as e:
+                status, body = 500, {'error': str(e)}
+            service.latency[endpoint].add(time.perf_counter() - start, error=status != 200)
+            self._send(status, body)
+        
+        def _send(self, status, body):
+            payload = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+    
+    return Handler
+
+
+def make_server(service, host='127.0.0.1', port=8000):
+    """Threaded HTTP server for ``service`` (``port=0`` picks a free port)."""
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    server.daemon_threads = True
+    return server
+
+
+def load_predictor(symbols, synthetic=False, days=730, period='2y', epochs=10, lookback_window=60,
+                   per_symbol=False, registry=None):
+    """Fetch (or generate) data and train the models a service will keep warm.
+    
+    By default one global model is trained so every batch is a single model
+    call; ``per_symbol=True`` trains one model per symbol instead, reusing
+    ``registry`` entries when given.
+    """
+    predictor = MarketTrendPredictor(registry=registry)
+    if synthetic:
+        predictor.data = predictor.generate_synthetic_universe(symbols, days=days)
+    else:
+        predictor.data, report = fetch_many(symbols, period=period)
+        for symbol in symbols:
+            if symbol not in predictor.data:
+                print(f"Error fetching data for {symbol}: {report[symbol]['error']}", file=sys.stderr)
+    
+    if per_symbol:
+        for symbol in predictor.data:
+            predictor.train_lstm_model(symbol, epochs=epochs, lookback_window=lookback_window)
+    elif predictor.data:
+        predictor.train_global_lstm_model(epochs=epochs, lookback_window=lookback_window)
+    return predictor
+
+
+def main(argv=None):
+    """Train or load models, then serve until interrupted."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('symbols', nargs='+')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--period', default='2y')
+    parser.add_argument('--synthetic', action='store_true', help='use synthetic data instead of fetching')
+    parser.add_argument('--days', type=int, default=730, help='bars of synthetic data')
+    parser.add_argument('--epochs', type=int, default=10)
+    parser.add_argument('--lookback', type=int, default=60)
+    parser.add_argument('--per-symbol', action='store_true', help='one model per symbol instead of a global model')
+    parser.add_argument('--registry', help='ModelRegistry directory for per-symbol models')
+    parser.add_argument('--max-batch-size', type=int, default=64)
+    parser.add_argument('--max-delay-ms', type=float, default=5.0)
+    args = parser.parse_args(argv)
+    
+    registry = None
+    if args.registry:
+        from model_registry import ModelRegistry
+        registry = ModelRegistry(args.registry)
+    
+    predictor = load_predictor(args.symbols, args.synthetic, args.days, args.period, args.epochs, args.lookback,
+                               args.per_symbol, registry)
+    if not predictor.data:
+        print("No data available for any symbol", file=sys.stderr)
+        return 1
+    
+    service = PredictionService(predictor, args.lookback, args.max_batch_size, args.max_delay_ms / 1000)
+    service.warm_up()
+    server = make_server(service, args.host, args.port)
+    print(f"Serving {len(predictor.data)} symbols on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Training scheduler
+Trains the per-symbol LSTMs of a watchlist within one wall-clock budget: epochs go in
+chunks to whichever model's validation loss is falling fastest, converged models stop
+early with their best weights, and the time spent on every symbol is reported.
+"""
+
+import math
+import time
+
+import numpy as np
+import pandas as pd
+
+from market_predictor import RESULT_ARRAYS
+
+REPORT_COLUMNS = ('Symbol', 'Epochs', 'Best_Epoch', 'Best_Val_Loss', 'Seconds', 'Budget_Share', 'Stopped',
+                  'Error')
+
+
+class TrainingScheduler:
+    """Spend at most ``time_budget`` seconds training, evaluating and forecasting several symbols.
+    
+    The budget covers the training here and the work that follows it: the
+    final evaluation and, with ``days_ahead``, one forecast per model (as the
+    dashboard makes). Every symbol first gets a one-epoch probe, which also
+    traces its forecast graph. A symbol is ``skipped`` (no model) when the
+    probes so far predict that its probe would not fit its equal share of
+    the time left; the first probe has nothing to go by and always runs.
+    After the probes, chunks of ``chunk_epochs`` epochs go to the symbol
+    with the highest improvement rate: the relative drop of its best
+    validation loss over its last chunk, per second of that chunk (symbols
+    with no chunk yet go first). A symbol stops as ``converged`` after
+    ``patience`` epochs without a relative improvement of ``min_delta``, as
+    ``max_epochs`` at the epoch cap and as ``budget`` once its next chunk
+    would not fit in the time left after the evaluation and forecast of
+    every model are reserved. Epoch costs come from the last chunk's epochs;
+    for the probe, the excess of its first train and test batches over the
+    median (graph tracing) is taken out. Each model ends with the weights of
+    its best validation epoch. A symbol whose preparation, training or
+    evaluation raises (e.g. fewer bars than ``lookback_window``) stops as
+    ``error`` with the message in its report row; the others carry on.
+    
+    Models and scalers are stored on ``predictor`` as ``train_lstm_model``
+    stores them; the registry is not consulted because the epoch count is
+    not known in advance. Every duration is read from ``clock``
+    (``time.perf_counter`` unless given), so tests can run on a fake one.
+    """
+    
+    def __init__(self, predictor, time_budget, chunk_epochs=2, patience=4, min_delta=1e-3, max_epochs=None,
+                 batch_size=32, lookback_window=60, days_ahead=30, clock=time.perf_counter):
+        """Schedule training on ``predictor`` for ``time_budget`` seconds from the call to ``run``."""
+        self.predictor = predictor
+        self.time_budget = time_budget
+        self.chunk_epochs = chunk_epochs
+        self.patience = patience
+        self.min_delta = min_delta
+        self.max_epochs = max_epochs
+        self.batch_size = batch_size
+        self.lookback_window = lookback_window
+        self.days_ahead = days_ahead
+        self.clock = clock
+        self.jobs = {}
+        self.elapsed = 0.0
+    
+    def run(self, symbols, keep_arrays=None):
+        """Train every symbol of ``symbols`` and return ``{symbol: train_lstm_model results}``.
+        
+        The results also carry the symbol's ``report`` row under
+        ``'schedule'``. Symbols without data are ignored, skipped symbols
+        have no results and failed symbols get ``{'error': message,
+        'schedule': row}`` instead.
+        """
+        predictor = self.predictor
+        keep_arrays = not predictor.compact if keep_arrays is None else keep_arrays
+        start = self.clock()
+        symbols = [symbol for symbol in symbols if symbol in predictor.data]
+        self.jobs = {}
+        
+        def remaining():
+            return self.time_budget - (self.clock() - start) - sum(map(self._reserve, self.jobs.values()))
+        
+        for i, symbol in enumerate(symbols):
+            probed = [job for job in self.jobs.values() if job['stopped'] not in ('skipped', 'error')]
+            share = remaining() / (len(symbols) - i)
+            if probed and np.median([job['probe_seconds'] + self._reserve(job) for job in probed]) > share:
+                self.jobs[symbol] = self._skipped(symbol)
+                continue
+            try:
+                job = self.jobs[symbol] = self._prepare(symbol)
+                # Building the first model also imports TensorFlow, a one-off left out of the probe cost
+                prepared = job['seconds']
+                self._train_chunk(job, epochs=1)
+                self._warm_up(job)
+                job['probe_seconds'] = job['seconds'] - prepared
+            except Exception as e:
+                self._fail(self.jobs.setdefault(symbol, self._skipped(symbol)), e)
+        
+        while True:
+            active = [job for job in self.jobs.values() if job['stopped'] is None]
+            if not active:
+                break
+            job = max(active, key=lambda candidate: (candidate['rate'], -candidate['epochs']))
+            epochs = self._chunk_size(job)
+            if job['epoch_seconds'] * epochs + job['fit_overhead'] > remaining():
+                job['stopped'] = 'budget'
+                continue
+            try:
+                self._train_chunk(job, epochs)
+            except Exception as e:
+                self._fail(job, e)
+        
+        results = {}
+        for symbol, job in self.jobs.items():
+            if job['stopped'] not in ('skipped', 'error'):
+                try:
+                    results[symbol] = self._finish(job, keep_arrays)
+                except Exception as e:
+                    self._fail(job, e)
+            if job['stopped'] == 'error':
+                results[symbol] = {'error': job['error']}
+        self.elapsed = self.clock() - start
+        for symbol in results:
+            results[symbol]['schedule'] = self._report_row(symbol, self.jobs[symbol])
+        return results
+    
+    def report(self):
+        """One row per symbol: epochs run, best epoch and validation loss, seconds and share of the budget."""
+        rows = [self._report_row(symbol, job) for symbol, job in self.jobs.items()]
+        return pd.DataFrame(rows, columns=list(REPORT_COLUMNS))
+    
+    def _prepare(self, symbol):
+        predictor = self.predictor
+        start = self.clock()
+        with predictor.instrumentation.span('prepare', symbol=symbol):
+            X, y, scaler = predictor.prepare_lstm_data(predictor.data[symbol], self.lookback_window)
+        
+        # Same chronological split as ``train_lstm_model``
+        split_index = int(len(X) * 0.8)
+        job = self._skipped(symbol)
+        job.update({
+            'model': predictor.build_lstm_model((X.shape[1], 1)),
+            'scaler': scaler,
+            'windows': (X[:split_index], y[:split_index], X[split_index:], y[split_index:]),
+            'seconds': self.clock() - start,
+            'rate': math.inf,  # Symbols without a chunk after their probe go first
+            'stopped': None,
+        })
+        return job
+    
+    def _skipped(self, symbol):
+        return {
+            'symbol': symbol,
+            'history': {},
+            'epochs': 0,
+            'seconds': 0.0,
+            'probe_seconds': 0.0,
+            'epoch_seconds': 0.0,
+            'fit_overhead': 0.0,
+            'predict_seconds': 0.0,
+            'forecast_seconds': 0.0,
+            'best_loss': math.inf,
+            'best_epoch': None,
+            'best_weights': None,
+            'wait': 0,
+            'rate': 0.0,
+            'stopped': 'skipped',
+            'error': None,
+        }
+    
+    def _fail(self, job, error):
+        """Stop ``job`` as ``error`` and drop its model, also from the predictor if already stored there."""
+        print(f"Error training {job['symbol']}: {error}")
+        predictor, key = self.predictor, f"{job['symbol']}_lstm"
+        if job.get('model') is not None and predictor.models.get(key) is job['model']:
+            del predictor.models[key]
+            predictor.scalers.pop(key, None)
+            predictor.trained_until.pop(job['symbol'], None)
+        job.update({'model': None, 'windows': None, 'predict_seconds': 0.0, 'forecast_seconds': 0.0,
+                    'stopped': 'error', 'error': str(error)})
+    
+    def _reserve(self, job):
+        """Predicted seconds of ``job``'s final evaluation and forecast."""
+        return job['predict_seconds'] + job['forecast_seconds']
+    
+    def _chunk_size(self, job):
+        if self.max_epochs is None:
+            return self.chunk_epochs
+        return min(self.chunk_epochs, self.max_epochs - job['epochs'])
+    
+    def _train_chunk(self, job, epochs):
+        """Fit ``job``'s model for ``epochs`` epochs and update its costs, best weights, patience and rate."""
+        from tensorflow.keras.callbacks import LambdaCallback
+        
+        model = job['model']
+        X_train, y_train, X_test, y_test = job['windows']
+        losses, durations, train_batches, test_batches = [], [], [], []
+        
+        clock = self.clock
+        
+        def timer(durations):
+            def begin(step, logs=None):
+                durations.append(clock())
+            
+            def end(step, logs=None):
+                durations[-1] = clock() - durations[-1]
+            return begin, end
+        
+        epoch_begin, epoch_end = timer(durations)
+        
+        def on_epoch_end(epoch, logs):
+            epoch_end(epoch)
+            loss = logs['val_loss']
+            losses.append(loss)
+            if loss < job['best_loss'] * (1 - self.min_delta) or job['best_weights'] is None:
+                job['best_loss'], job['best_epoch'], job['wait'] = loss, epoch + 1, 0
+                job['best_weights'] = model.get_weights()
+            else:
+                job['wait'] += 1
+                if job['wait'] >= self.patience:
+                    model.stop_training = True
+        
+        train_begin, train_end = timer(train_batches)
+        test_begin, test_end = timer(test_batches)
+        callback = LambdaCallback(
+            on_epoch_begin=epoch_begin, on_epoch_end=on_epoch_end,
+            on_train_batch_begin=train_begin, on_train_batch_end=train_end,
+            on_test_batch_begin=test_begin, on_test_batch_end=test_end)
+        
+        best_before, traced = job['best_loss'], job['epochs'] > 0
+        start = clock()
+        with self.predictor.instrumentation.span('fit', symbol=job['symbol']):
+            history = model.fit(X_train, y_train, epochs=job['epochs'] + epochs, initial_epoch=job['epochs'],
+                                batch_size=self.batch_size, validation_data=(X_test, y_test), verbose=0,
+                                callbacks=[callback])
+        seconds = clock() - start
+        
+        for name, values in history.history.items():
+            job['history'].setdefault(name, []).extend(values)
+        job['epochs'] += len(losses)
+        job['seconds'] += seconds
+        
+        # A model's first train and test batches also trace its graphs: take out their excess over the median
+        if traced:
+            job['epoch_seconds'] = np.mean(durations)
+        else:
+            job['epoch_seconds'] = (durations[0] - (train_batches[0] - np.median(train_batches))
+                                    - (test_batches[0] - np.median(test_batches)))
+        job['fit_overhead'] = max(seconds - sum(durations), 0.0)
+        if not math.isinf(best_before):
+            job['rate'] = (best_before - job['best_loss']) / best_before / seconds if best_before > 0 else 0.0
+        
+        if job['wait'] >= self.patience:
+            job['stopped'] = 'converged'
+        elif self.max_epochs is not None and job['epochs'] >= self.max_epochs:
+            job['stopped'] = 'max_epochs'
+    
+    def _warm_up(self, job):
+        """Store ``job``'s model on the predictor and trace its predict and forecast graphs.
+        
+        The traced graphs belong to the model object, which keeps its
+        identity until the end, so the final evaluation and later forecasts
+        reuse them. Second, timed calls give the evaluation and forecast costs.
+        """
+        import tensorflow as tf
+        
+        predictor = self.predictor
+        symbol, model = job['symbol'], job['model']
+        start = self.clock()
+        predictor.models[f'{symbol}_lstm'] = model
+        predictor.scalers[f'{symbol}_lstm'] = job['scaler']
+        predictor.trained_until[symbol] = predictor.data[symbol].index[-1]
+        
+        X_train, _, X_test, _ = job['windows']
+        model.predict(X_test, verbose=0)
+        predict_start = self.clock()
+        model.predict(X_test, verbose=0)
+        # The evaluation predicts the train and test windows; scaling by window count over-counts call overhead
+        job['predict_seconds'] = (self.clock() - predict_start) * (len(X_train) + len(X_test)) / len(X_test)
+        window = X_test[-1:]
+        if self.days_ahead:
+            rollout = predictor._forecast_fn(f'{symbol}_lstm')
+            args = (tf.constant(window.astype(np.float32)), tf.constant(self.days_ahead),
+                    tf.constant(np.zeros((1, 1), dtype=np.int32)))
+            rollout(*args)
+            forecast_start = self.clock()
+            rollout(*args)
+            job['forecast_seconds'] = self.clock() - forecast_start
+        job['seconds'] += self.clock() - start
+    
+    def _finish(self, job, keep_arrays):
+        """Restore the best weights, store the model on the predictor and evaluate it."""
+        predictor = self.predictor
+        symbol, model, scaler = job['symbol'], job['model'], job['scaler']
+        start = self.clock()
+        model.set_weights(job['best_weights'])
+        predictor.models[f'{symbol}_lstm'] = model
+        predictor.scalers[f'{symbol}_lstm'] = scaler
+        predictor.trained_until[symbol] = predictor.data[symbol].index[-1]
+        
+        results = predictor._evaluate_lstm(symbol, model, scaler, job['history'], *job['windows'])
+        if not keep_arrays:
+            for name in RESULT_ARRAYS:
+                del results[name]
+        job['windows'] = None  # The windows are no longer needed once evaluated
+        job['seconds'] += self.clock() - start
+        return results
+    
+    def _report_row(self, symbol, job):
+        return {
+            'Symbol': symbol,
+            'Epochs': job['epochs'],
+            'Best_Epoch': job['best_epoch'],
+            'Best_Val_Loss': job['best_loss'] if job['best_epoch'] is not None else None,
+            'Seconds': round(job['seconds'], 3),
+            'Budget_Share': round(job['seconds'] / self.time_budget, 4) if self.time_budget else None,
+            'Stopped': job['stopped'],
+            'Error': job['error'],
+        }
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Screener
+Technical indicators and trading signals for a whole universe in one vectorized pass over a
+(time x symbol) panel, summarized as a ranked snapshot of every symbol's latest bar.
+"""
+
+import numpy as np
+import pandas as pd
+
+from market_predictor import DEFAULT_SIGNAL_RULES, INDICATOR_PARAMS, rule_votes
+from panel import right_align
+
+SIGNAL_ORDER = {'BUY': 0, 'HOLD': 1, 'SELL': 2}
+SCREEN_BARS = 512  # EWM weights of the slowest span (26) fall below 1e-17 over this many bars
+
+
+def panel_indicators(close, volume=None, tail=None):
+    """``calculate_technical_indicators`` columns as (T, N) arrays, one column per symbol.
+    
+    ``close`` and ``volume`` must be right-aligned as by
+    ``panel.right_align`` (NaN only before each symbol's first bar), so every
+    column sees the same bars as the per-symbol frame and the values match
+    the pandas ones up to floating point rounding, warm-up NaNs included.
+    Rolling windows are differences of cumulative sums of prices centred on
+    each symbol's last close; EWMs use the adjusted weights pandas uses.
+    With ``tail`` only the last ``tail`` rows of each indicator are computed
+    where the indicator allows it (EWMs always need every row).
+    """
+    n_rows = len(close)
+    keep = slice(None) if tail is None else slice(max(n_rows - tail, 0), None)
+    valid = ~np.isnan(close)
+    # Bars seen so far by each symbol at each row, minus one (negative before its first bar)
+    age = np.arange(n_rows)[:, None] - (n_rows - valid.sum(axis=0))
+    reference = np.nan_to_num(close[-1:])
+    centred = close - reference
+    indicators = {'Close': close[keep]}
+    
+    def rolling_mean(values, window, offset=0.0):
+        return _rolling_sum(values, window, age, keep) / window + offset
+    
+    # Moving averages; each window's mean is computed once and shared (MA_20 is BB_Middle)
+    close_means = {}
+    
+    def close_mean(window):
+        if window not in close_means:
+            close_means[window] = rolling_mean(centred, window, reference)
+        return close_means[window]
+    
+    for window in INDICATOR_PARAMS['ma_windows']:
+        indicators[f'MA_{window}'] = close_mean(window)
+    
+    # Exponential moving averages and MACD
+    fast_span, slow_span = INDICATOR_PARAMS['ema_spans']
+    emas = {span: _ewm_mean(close, span, age) for span in INDICATOR_PARAMS['ema_spans']}
+    macd = emas[fast_span] - emas[slow_span]
+    macd_signal = _ewm_mean(macd, INDICATOR_PARAMS['macd_signal_span'], age)
+    for span, ema in emas.items():
+        indicators[f'EMA_{span}'] = ema[keep]
+    indicators['MACD'] = macd[keep]
+    indicators['MACD_Signal'] = macd_signal[keep]
+    indicators['MACD_Histogram'] = (macd - macd_signal)[keep]
+    
+    # RSI; like ``delta.where(delta > 0, 0)`` the first bar's gain and loss are 0, not NaN
+    delta = np.diff(close, axis=0, prepend=np.nan)
+    gain = np.where(delta > 0, delta, 0.0)
+    loss = np.where(delta < 0, -delta, 0.0)
+    rsi_window = INDICATOR_PARAMS['rsi_window']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = rolling_mean(gain, rsi_window) / rolling_mean(loss, rsi_window)
+        indicators['RSI'] = 100 - (100 / (1 + rs))
+    
+    # Bollinger Bands with the sample standard deviation
+    bb_window, bb_std_width = INDICATOR_PARAMS['bb_window'], INDICATOR_PARAMS['bb_std']
+    sums = _rolling_sum(centred, bb_window, age, keep)
+    squares = _rolling_sum(centred ** 2, bb_window, age, keep)
+    bb_std = np.sqrt(np.maximum(squares - sums ** 2 / bb_window, 0.0) / (bb_window - 1))
+    bb_middle = close_mean(bb_window)
+    indicators['BB_Middle'] = bb_middle
+    indicators['BB_Upper'] = bb_middle + bb_std * bb_std_width
+    indicators['BB_Lower'] = bb_middle - bb_std * bb_std_width
+    
+    if volume is not None:
+        indicators['Volume'] = volume[keep]
+        indicators['Volume_MA'] = rolling_mean(volume, INDICATOR_PARAMS['volume_window'])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            indicators['Volume_Ratio'] = volume[keep] / indicators['Volume_MA']
+    return indicators
+
+
+def screen(data, symbols=None, rules=None):
+    """Ranked snapshot of every symbol's latest bar: indicators, 1d/7d change and signal.
+    
+    ``data`` is a ``{symbol: DataFrame}`` mapping or a ``PanelStore``. The
+    universe is right-aligned into one panel, indicators are computed for all
+    symbols at once and the ``rules`` (overriding ``DEFAULT_SIGNAL_RULES``)
+    are applied to the last bar, with the warm-up counted from each symbol's
+    own first bar; the Signal equals the last row of
+    ``generate_trading_signals``. Changes are in percent against the bar
+    before (1d) and six bars before (7d, like the dashboard's ``iloc[-7]``).
+    Rows are ranked BUY, HOLD, SELL, then by net votes (``Score``) and by RSI,
+    most oversold first.
+    """
+    rules = {**DEFAULT_SIGNAL_RULES, **(rules or {})}
+    fields, last_bars, lengths = right_align(data, symbols, max_bars=SCREEN_BARS)
+    symbols = list(data) if symbols is None else list(symbols)
+    close = fields['Close']
+    indicators = panel_indicators(close, fields['Volume'], tail=2)
+    
+    buy_votes, sell_votes = rule_votes(lambda name: indicators[name].T, rules)
+    buy_votes, sell_votes = buy_votes[:, -1], sell_votes[:, -1]
+    warmed_up = lengths > rules['warmup']
+    signal = np.where(warmed_up & (buy_votes >= rules['min_votes']), 'BUY',
+                      np.where(warmed_up & (sell_votes >= rules['min_votes']), 'SELL', 'HOLD'))
+    
+    def change(bars_back):
+        if len(close) <= bars_back:
+            return np.full(len(symbols), np.nan)
+        previous = close[-1 - bars_back]
+        return (close[-1] - previous) / previous * 100
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        snapshot = pd.DataFrame({
+            'Symbol': symbols,
+            'Date': last_bars,
+            'Bars': lengths,
+            'Close': indicators['Close'][-1],
+            'Change_1d': change(1),
+            'Change_7d': change(6),
+            'RSI': indicators['RSI'][-1],
+            'MACD': indicators['MACD'][-1],
+            'MACD_Signal': indicators['MACD_Signal'][-1],
+            'BB_Upper': indicators['BB_Upper'][-1],
+            'BB_Lower': indicators['BB_Lower'][-1],
+            'Buy_Votes': buy_votes,
+            'Sell_Votes': sell_votes,
+            'Score': buy_votes.astype(np.int64) - sell_votes,
+            'Signal': signal,
+        })
+    order = np.lexsort((snapshot['RSI'].to_numpy(), -snapshot['Score'].to_numpy(),
+                        snapshot['Signal'].map(SIGNAL_ORDER).to_numpy()))
+    return snapshot.iloc[order].reset_index(drop=True)
+
+
+def _rolling_sum(values, window, age, keep):
+    """Sums over the last ``window`` rows at the rows selected by ``keep``.
+    
+    Only the rows from ``window`` before the first kept row are summed, and
+    results where a symbol has fewer than ``window`` bars are NaN.
+    """
+    rows = np.arange(len(values))[keep]
+    first = max(rows[0] + 1 - window, 0) if len(rows) else len(values)
+    cumulative = np.zeros((len(values) - first + 1,) + values.shape[1:])
+    tail = values[first:]
+    np.cumsum(np.where(np.isnan(tail), 0.0, tail), axis=0, out=cumulative[1:])
+    totals = cumulative[rows + 1 - first] - cumulative[np.maximum(rows + 1 - window - first, 0)]
+    return np.where(age[keep] >= window - 1, totals, np.nan)
+
+
+def _ewm_mean(values, span, age):
+    """Adjusted exponentially weighted mean along axis 0, as ``Series.ewm(span=span).mean()``.
+    
+    The weighted sum ``s_t = x_t + beta * s_(t-1)`` is stepped one row at a
+    time, each step a vector operation over every symbol, which suits wide
+    panels with a few hundred rows. Without gaps the weight total is the
+    geometric series ``(1 - beta**(age + 1)) / (1 - beta)``.
+    """
+    beta = 1 - 2 / (span + 1)
+    weighted = np.where(np.isnan(values), 0.0, values)
+    numerators = np.empty(values.shape, dtype=np.float64)
+    running = np.zeros(values.shape[1:])
+    for row, value in enumerate(weighted):
+        running *= beta
+        running += value
+        numerators[row] = running
+    totals = (1 - beta ** np.arange(1, len(values) + 1)) / (1 - beta)
+    return np.where(age >= 0, numerators / totals[np.maximum(age, 0)], np.nan)
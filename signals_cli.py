@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Signals CLI
+Latest technical indicators and trading signals for a list of symbols.
+Only the indicator code path is imported, so TensorFlow is never loaded.
+"""
+
+import argparse
+import json
+import math
+import sys
+
+from market_data import MarketDataCache, fetch_many
+from market_predictor import MarketTrendPredictor
+
+SNAPSHOT_COLUMNS = ['Close', 'RSI', 'MACD', 'MACD_Signal', 'MA_20', 'Signal']
+
+
+def latest_signals(predictor, symbols, rules=None):
+    """Return one row per symbol with the last bar's indicators and signal.
+    
+    Undefined indicator values (e.g. RSI during warm-up or on a flat series)
+    are None, so the rows serialize to valid JSON.
+    """
+    rows = []
+    for symbol in symbols:
+        last = predictor.generate_trading_signals(symbol, rules).iloc[-1]
+        row = {'Symbol': symbol, 'Date': str(last.name.date())}
+        for column in SNAPSHOT_COLUMNS:
+            value = last[column]
+            if not isinstance(value, str):
+                value = None if math.isnan(value) else round(float(value), 4)
+            row[column] = value
+        rows.append(row)
+    return rows
+
+
+def _format(value, width, precision):
+    return f"{value:>{width}.{precision}f}" if value is not None else f"{'n/a':>{width}}"
+
+
+def main(argv=None):
+    """Fetch data, compute signals and print them; exit status 1 if any symbol failed."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('symbols', nargs='+')
+    parser.add_argument('--period', default='2y')
+    parser.add_argument('--cache', help='MarketDataCache directory for incremental refreshes')
+    parser.add_argument('--synthetic', action='store_true', help='use synthetic data instead of fetching')
+    parser.add_argument('--days', type=int, default=730, help='bars of synthetic data')
+    parser.add_argument('--max-workers', type=int, default=8)
+    parser.add_argument('--json', action='store_true', help='print JSON instead of a table')
+    args = parser.parse_args(argv)
+    
+    predictor = MarketTrendPredictor()
+    failed = []
+    if args.synthetic:
+        predictor.data = predictor.generate_synthetic_universe(args.symbols, days=args.days)
+    else:
+        cache = MarketDataCache(args.cache) if args.cache else None
+        predictor.data, report = fetch_many(args.symbols, cache=cache, period=args.period,
+                                            max_workers=args.max_workers)
+        for symbol in args.symbols:
+            if symbol not in predictor.data:
+                failed.append(symbol)
+                print(f"Error fetching data for {symbol}: {report[symbol]['error']}", file=sys.stderr)
+    
+    rows = latest_signals(predictor, [symbol for symbol in args.symbols if symbol not in failed])
+    if args.json:
+        print(json.dumps(rows, indent=2, allow_nan=False))
+    else:
+        print(f"{'Symbol':<8} {'Date':<10} {'Close':>10} {'RSI':>7} {'MACD':>9} {'Signal':>6}")
+        for row in rows:
+            print(f"{row['Symbol']:<8} {row['Date']:<10} {_format(row['Close'], 10, 2)} "
+                  f"{_format(row['RSI'], 7, 2)} {_format(row['MACD'], 9, 4)} {row['Signal']:>6}")
+    
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
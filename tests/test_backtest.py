@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Unit tests for Backtesting
+Tests positions, PnL metrics and the broadcast parameter sweep against per-rule backtests.
+"""
+import pytest
+import numpy as np
+import sys
+import os
+
+# Add parent directory to path to import backtest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backtest import backtest_positions, backtest_signals, parameter_grid, positions_from_signals, sweep
+from market_predictor import MarketTrendPredictor
+
+
+@pytest.fixture(scope='module')
+def predictor():
+    """Create a predictor with one synthetic symbol."""
+    predictor = MarketTrendPredictor()
+    predictor.data['TEST'] = predictor.generate_synthetic_data('TEST', days=600)
+    return predictor
+
+
+class TestBacktest:
+    """Test suite for backtest."""
+    
+    def test_positions_and_metrics(self):
+        """Test signal carry-forward, next-bar returns and transaction costs on a hand-made series."""
+        buy = np.array([False, True, False, False, False])
+        sell = np.array([False, False, False, True, False])
+        np.testing.assert_array_equal(positions_from_signals(buy, sell), [0, 1, 1, 0, 0])
+        np.testing.assert_array_equal(positions_from_signals(buy, sell, allow_short=True), [0, 1, 1, -1, -1])
+        
+        close = np.array([100.0, 100.0, 110.0, 121.0, 100.0])
+        results = backtest_positions(close, [0, 1, 1, 0, 0], cost=0.01)
+        
+        np.testing.assert_allclose(results['returns'], [0, -0.01, 0.1, 0.1 - 0.01, 0])
+        assert results['total_return'] == pytest.approx(0.99 * 1.1 * 1.09 - 1)
+        assert results['max_drawdown'] == pytest.approx(-0.01)
+        assert results['turnover'] == 2
+        assert results['trades'] == 2
+    
+    def test_sweep_matches_per_rule_backtests(self, predictor):
+        """Test that the broadcast sweep reproduces backtests of generate_trading_signals rule by rule."""
+        indicators = predictor.calculate_technical_indicators(predictor.data['TEST'])
+        grid = parameter_grid(fast_ma=[5, 10], slow_ma=[20, 50], rsi_oversold=[30, 40],
+                              bb_std=[1.5, 2], min_votes=[1, 2])
+        ranked = sweep(indicators, grid, cost=0.001, chunk_size=5)
+        
+        assert len(ranked) == len(grid) == 32
+        assert ranked['sharpe'].is_monotonic_decreasing
+        for _, row in ranked.iterrows():
+            rules = {'fast_ma': f"MA_{int(row['fast_ma'])}", 'slow_ma': f"MA_{int(row['slow_ma'])}",
+                     'rsi_oversold': row['rsi_oversold'], 'rsi_overbought': row['rsi_overbought'],
+                     'bb_std': row['bb_std'], 'min_votes': row['min_votes']}
+            signals = predictor.generate_trading_signals('TEST', rules)
+            expected = backtest_signals(signals['Close'], signals['Signal'], cost=0.001)
+            for name in ['total_return', 'sharpe', 'max_drawdown', 'turnover', 'trades']:
+                assert row[name] == pytest.approx(expected[name]), name
+    
+    def test_grid_drops_overlapping_rsi_thresholds(self):
+        """Test that parameter_grid drops rule sets whose oversold level is not below the overbought one."""
+        grid = parameter_grid(rsi_oversold=[30, 50, 70], rsi_overbought=[50, 70])
+        
+        assert (grid['rsi_oversold'] < grid['rsi_overbought']).all()
+        assert len(grid) == 3
+    
+    def test_predictor_helpers(self, predictor):
+        """Test the MarketTrendPredictor entry points."""
+        results = predictor.backtest_trading_signals('TEST')
+        ranked = predictor.sweep_signal_rules('TEST', rsi_oversold=[25, 30])
+        
+        assert len(results['returns']) == 600
+        assert len(ranked) == 2
+        with pytest.raises(ValueError):
+            predictor.sweep_signal_rules('MISSING')
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the Benchmark Suite
+Tests the baseline comparison that decides the suite's CI exit code.
+"""
+import pytest
+import sys
+import os
+
+# Add the benchmarks directory to path to import run_benchmarks
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'benchmarks')))
+
+from run_benchmarks import SUITE_VERSION, compare
+
+
+def record(stage, seconds, peak_mb, symbols=1, bars=1000):
+    """One result record of run_suite."""
+    return {'stage': stage, 'symbols': symbols, 'bars': bars, 'seconds': seconds, 'peak_mb': peak_mb,
+            'bars_per_s': symbols * bars / seconds}
+
+
+@pytest.fixture
+def baseline():
+    """A baseline with one slow-enough case and one case under min_seconds."""
+    return {'meta': {'suite_version': SUITE_VERSION},
+            'results': [record('train', 1.0, 10.0), record('signals', 0.001, 10.0)]}
+
+
+class TestCompare:
+    """Test suite for run_benchmarks.compare."""
+    
+    def test_within_tolerance(self, baseline):
+        """Test that cases within the tolerance and cases missing from the baseline pass."""
+        results = [record('train', 1.15, 11.0), record('signals', 0.001, 10.0), record('predict', 9.0, 99.0)]
+        
+        assert compare(results, baseline, tolerance=0.2, min_seconds=0.01) == []
+    
+    def test_time_regression(self, baseline):
+        """Test that a case slower than the tolerance allows is reported with its ratios."""
+        regressions = compare([record('train', 1.5, 10.0)], baseline, tolerance=0.2, min_seconds=0.01)
+        
+        assert len(regressions) == 1
+        assert regressions[0]['time_ratio'] == pytest.approx(1.5)
+        assert regressions[0]['memory_ratio'] == pytest.approx(1.0)
+    
+    def test_memory_regression(self, baseline):
+        """Test that more peak memory than the tolerance allows is reported."""
+        regressions = compare([record('train', 1.0, 13.0)], baseline, tolerance=0.2, min_seconds=0.01)
+        
+        assert [r['memory_ratio'] for r in regressions] == [pytest.approx(1.3)]
+    
+    def test_min_seconds_skips_time_only(self, baseline):
+        """Test that cases under min_seconds are judged on memory but not on time."""
+        slower = [record('signals', 0.005, 10.0)]
+        bigger = [record('signals', 0.001, 20.0)]
+        
+        assert compare(slower, baseline, tolerance=0.2, min_seconds=0.01) == []
+        assert len(compare(slower, baseline, tolerance=0.2, min_seconds=0.0001)) == 1
+        assert len(compare(bigger, baseline, tolerance=0.2, min_seconds=0.01)) == 1
+    
+    def test_suite_version_mismatch(self, baseline):
+        """Test that baselines of another suite version (or none, i.e. version 1) are refused."""
+        results = [record('train', 1.0, 10.0)]
+        
+        baseline['meta']['suite_version'] = SUITE_VERSION - 1
+        with pytest.raises(ValueError, match='suite version'):
+            compare(results, baseline, tolerance=0.2, min_seconds=0.01)
+        del baseline['meta']['suite_version']
+        with pytest.raises(ValueError):
+            compare(results, baseline, tolerance=0.2, min_seconds=0.01)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Unit tests for Indicator Cache
+Tests memoized indicator frames, hit/miss statistics and size-bounded LRU eviction.
+"""
+import pytest
+import pandas as pd
+import sys
+import os
+
+# Add parent directory to path to import indicator_cache
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from indicator_cache import IndicatorCache
+from market_predictor import MarketTrendPredictor
+
+
+class TestIndicatorCache:
+    """Test suite for IndicatorCache."""
+    
+    def test_signals_reuse_cached_indicators(self):
+        """Test that repeated calls hit the cache and return the same values as an uncached run."""
+        predictor = MarketTrendPredictor()
+        uncached = MarketTrendPredictor(indicator_cache=IndicatorCache(max_bytes=0))
+        predictor.data['TEST'] = uncached.data['TEST'] = predictor.generate_synthetic_data('TEST', days=300)
+        
+        first = predictor.generate_trading_signals('TEST')
+        second = predictor.generate_trading_signals('TEST', {'rsi_oversold': 40})
+        indicators = predictor.calculate_technical_indicators(predictor.data['TEST'], 'TEST')
+        
+        stats = predictor.indicator_cache.stats()
+        assert (stats['hits'], stats['misses'], stats['entries']) == (2, 1, 1)
+        assert 'Signal' not in indicators.columns
+        pd.testing.assert_frame_equal(first, uncached.generate_trading_signals('TEST'))
+        pd.testing.assert_series_equal(second['RSI'], first['RSI'])
+        pd.testing.assert_series_equal(indicators['BB_Middle'], indicators['MA_20'], check_names=False)
+        assert uncached.indicator_cache.stats()['entries'] == 0
+    
+    def test_changed_data_misses(self):
+        """Test that appending a bar changes the fingerprint."""
+        predictor = MarketTrendPredictor()
+        data = predictor.generate_synthetic_data('TEST', days=200)
+        
+        predictor.calculate_technical_indicators(data.iloc[:-1], 'TEST')
+        predictor.calculate_technical_indicators(data, 'TEST')
+        predictor.calculate_technical_indicators(data, 'OTHER')
+        
+        assert predictor.indicator_cache.stats()['misses'] == 3
+        predictor.indicator_cache.invalidate('TEST')
+        assert len(predictor.indicator_cache) == 1
+    
+    def test_in_place_edits_do_not_reach_the_cache(self):
+        """Test that editing a returned frame in place leaves the cached frame untouched."""
+        predictor = MarketTrendPredictor()
+        data = predictor.generate_synthetic_data('TEST', days=200)
+        
+        first = predictor.calculate_technical_indicators(data, 'TEST')
+        expected = first['RSI'].copy()
+        first.loc[first.index[-1], 'RSI'] = -1.0
+        first['MA_5'] = first['MA_5'].fillna(0.0)
+        second = predictor.calculate_technical_indicators(data, 'TEST')
+        
+        pd.testing.assert_series_equal(second['RSI'], expected)
+        assert second['MA_5'].isna().sum() == 4
+    
+    def test_disabled_cache_skips_fingerprint(self, monkeypatch):
+        """Test that max_bytes=0 never hashes the input bars but still counts misses."""
+        def fingerprint(data):
+            raise AssertionError("fingerprint computed with the cache disabled")
+        
+        monkeypatch.setattr(IndicatorCache, 'fingerprint', staticmethod(fingerprint))
+        predictor = MarketTrendPredictor(indicator_cache=IndicatorCache(max_bytes=0))
+        data = predictor.generate_synthetic_data('TEST', days=100)
+        
+        predictor.calculate_technical_indicators(data, 'TEST')
+        predictor.calculate_technical_indicators(data, 'TEST')
+        assert predictor.indicator_cache.stats()['misses'] == 2
+    
+    def test_lru_eviction_by_bytes(self):
+        """Test that the least recently used frame is evicted once over budget."""
+        predictor = MarketTrendPredictor()
+        frames = {symbol: predictor.generate_synthetic_data(symbol, days=200) for symbol in ['A', 'B', 'C']}
+        size = int(predictor.calculate_technical_indicators(frames['A']).memory_usage(index=True).sum())
+        cache = IndicatorCache(max_bytes=2 * size)
+        predictor.indicator_cache = cache
+        
+        predictor.calculate_technical_indicators(frames['A'], 'A')
+        predictor.calculate_technical_indicators(frames['B'], 'B')
+        predictor.calculate_technical_indicators(frames['A'], 'A')  # A is now most recently used
+        predictor.calculate_technical_indicators(frames['C'], 'C')
+        
+        assert cache.stats()['evictions'] == 1
+        assert cache.bytes <= cache.max_bytes
+        predictor.calculate_technical_indicators(frames['A'], 'A')
+        predictor.calculate_technical_indicators(frames['B'], 'B')
+        assert cache.stats()['hits'] == 2
+        assert cache.stats()['misses'] == 4
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
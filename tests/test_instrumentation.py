@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Unit tests for Instrumentation
+Tests spans, counters, sinks and the disabled default of the analysis pipeline.
+"""
+import pytest
+import json
+import sys
+import os
+import timeit
+
+# Add parent directory to path to import instrumentation
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from instrumentation import NULL_INSTRUMENTATION, Instrumentation, JsonLinesSink, PrometheusTextSink
+from market_predictor import MarketTrendPredictor
+
+
+class TestInstrumentation:
+    """Test suite for Instrumentation."""
+    
+    def test_dashboard_records_stage_spans_and_counters(self, tmp_path):
+        """Test that one analyzed symbol produces per-stage spans, counters and sink output."""
+        jsonl_path, prom_path = str(tmp_path / 'metrics.jsonl'), str(tmp_path / 'metrics.prom')
+        instrumentation = Instrumentation(sinks=[JsonLinesSink(jsonl_path), PrometheusTextSink(prom_path)],
+                                          profile=True)
+        predictor = MarketTrendPredictor(instrumentation=instrumentation)
+        predictor.data['TEST'] = predictor.generate_synthetic_data('TEST', days=150)
+        
+        predictor.create_market_dashboard(['TEST'], epochs=1)
+        instrumentation.flush()
+        
+        spans = {span['name']: span for span in instrumentation.spans}
+        for name in ['prepare', 'fit', 'evaluate', 'train', 'forecast', 'signals', 'analyze_symbol']:
+            assert spans[name]['labels'] == {'symbol': 'TEST'}
+            assert spans[name]['duration'] >= 0
+            assert spans[name]['peak_rss_bytes'] > 0
+        assert spans['fit']['parent'] == 'train'
+        assert instrumentation.counter('windows_built') == 90
+        assert instrumentation.counter('model_calls', stage='forecast') == 30
+        assert instrumentation.counter('bars_processed', stage='indicators') == 150
+        assert instrumentation.profile_stats().total_calls > 0
+        
+        with open(jsonl_path) as f:
+            records = [json.loads(line) for line in f]
+        assert {record['type'] for record in records} == {'span', 'counter'}
+        with open(prom_path) as f:
+            exposition = f.read()
+        assert 'market_predictor_span_seconds_count{span="fit",symbol="TEST"} 1' in exposition
+        assert 'market_predictor_windows_built_total 90' in exposition
+    
+    def test_process_pool_dashboard_reports_worker_metrics(self):
+        """Test that a parallel dashboard merges the workers' stage spans and counters."""
+        instrumentation = Instrumentation()
+        predictor = MarketTrendPredictor(instrumentation=instrumentation)
+        predictor.data = predictor.generate_synthetic_universe(['AAA', 'BBB'], days=150)
+        
+        with instrumentation.span('dashboard'):
+            predictor.create_market_dashboard(['AAA', 'BBB'], epochs=1, n_jobs=2)
+        
+        for symbol in ['AAA', 'BBB']:
+            spans = {span['name']: span for span in instrumentation.spans if span['labels'] == {'symbol': symbol}}
+            assert {'prepare', 'fit', 'evaluate', 'train', 'forecast', 'signals', 'analyze_symbol'} <= set(spans)
+            assert spans['fit']['parent'] == 'train'
+            assert spans['train']['parent'] == 'dashboard'
+        assert instrumentation.counter('windows_built') == 180
+        assert instrumentation.counter('model_calls', stage='forecast') == 60
+        assert instrumentation.counter('bars_processed', stage='indicators') == 300
+    
+    def test_disabled_by_default_with_negligible_overhead(self):
+        """Test that the default records nothing and a disabled span costs little more than a plain call."""
+        predictor = MarketTrendPredictor()
+        assert predictor.instrumentation is NULL_INSTRUMENTATION
+        
+        def disabled_span():
+            with NULL_INSTRUMENTATION.span('stage', symbol='TEST'):
+                pass
+        
+        def noop(name, **labels):
+            pass
+        
+        def plain_call():
+            noop('stage', symbol='TEST')
+        
+        # A ratio against the same call without the span stays stable on loaded machines
+        span_time = min(timeit.repeat(disabled_span, number=10000, repeat=5))
+        call_time = min(timeit.repeat(plain_call, number=10000, repeat=5))
+        assert span_time / call_time < 10
+        assert NULL_INSTRUMENTATION.spans == ()
+        assert NULL_INSTRUMENTATION.counter('windows_built') == 0
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Unit tests for Market Data
+Tests the columnar market data cache against a local fake provider.
+"""
+import pytest
+import numpy as np
+import pandas as pd
+import sys
+import os
+import time
+
+# Add parent directory to path to import market_data
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from market_data import OHLCV_COLUMNS, DataProvider, MarketDataCache, SimulatedProvider, YFinanceProvider, fetch_many
+
+
+class FakeProvider(DataProvider):
+    """Serves a fixed history up to a movable 'today', recording every request."""
+    
+    def __init__(self, history):
+        self.history = history
+        self.today = history.index[-1]
+        self.requests = []
+    
+    def fetch(self, symbol, start=None, period='2y'):
+        self.requests.append((symbol, start))
+        if symbol == 'BROKEN':
+            raise ConnectionError('provider unavailable')
+        available = self.history[self.history.index <= self.today]
+        if start is not None:
+            available = available[available.index >= pd.Timestamp(start, tz=available.index.tz)]
+        return available
+
+
+@pytest.fixture
+def history():
+    """Tz-aware daily bars like the ones yfinance returns."""
+    dates = pd.date_range('2024-01-01', periods=300, freq='B', tz='America/New_York')
+    np.random.seed(0)
+    prices = 100 + np.cumsum(np.random.randn(len(dates)))
+    return pd.DataFrame({
+        'Open': prices * 0.99,
+        'High': prices * 1.01,
+        'Low': prices * 0.98,
+        'Close': prices,
+        'Volume': np.random.randint(1000000, 10000000, len(dates)),
+        'Dividends': 0.0,
+    }, index=dates)
+
+
+class TestMarketDataCache:
+    """Test suite for MarketDataCache."""
+    
+    def test_refresh_appends_only_new_bars(self, tmp_path, history):
+        """Test that a warm refresh only requests and appends newer bars."""
+        provider = FakeProvider(history)
+        provider.today = history.index[249]
+        cache = MarketDataCache(str(tmp_path), provider)
+        
+        first = cache.refresh('AAPL')
+        assert len(first) == 250
+        assert provider.requests[-1] == ('AAPL', None)
+        
+        provider.today = history.index[-1]
+        refreshed = cache.refresh('AAPL')
+        
+        assert provider.requests[-1] == ('AAPL', history.index[249].date())
+        assert len(refreshed) == 300
+        assert refreshed.index.equals(history.index)
+        pd.testing.assert_frame_equal(refreshed.reset_index(drop=True),
+                                      history.drop(columns='Dividends').reset_index(drop=True))
+    
+    def test_read_is_memory_mapped(self, tmp_path, history):
+        """Test that cached columns are memory-mapped and keep their dtypes and timezone."""
+        cache = MarketDataCache(str(tmp_path), FakeProvider(history))
+        cache.write('MSFT', history)
+        
+        data = MarketDataCache(str(tmp_path)).read('MSFT')
+        
+        base = data['Close'].values
+        while base is not None and not isinstance(base, np.memmap):
+            base = base.base
+        assert isinstance(base, np.memmap)
+        assert not data['Close'].values.flags.writeable
+        assert data['Volume'].dtype == np.int64
+        assert str(data.index.tz) == 'America/New_York'
+        assert cache.symbols() == ['MSFT']
+        assert cache.read('UNKNOWN') is None
+    
+    def test_append_ignores_old_and_duplicate_bars(self, tmp_path, history):
+        """Test that appending overlapping bars keeps timestamps strictly increasing."""
+        cache = MarketDataCache(str(tmp_path), FakeProvider(history))
+        cache.write('GOOGL', history.iloc[:100])
+        
+        assert cache.append('GOOGL', history.iloc[50:150]) == 50
+        assert cache.append('GOOGL', history.iloc[:150]) == 0
+        assert cache.read('GOOGL').index.is_monotonic_increasing
+        
+        cache.purge('GOOGL')
+        assert cache.read('GOOGL') is None
+    
+    def test_symbols_with_special_characters(self, tmp_path, history):
+        """Test that index and FX style tickers map to safe partition names."""
+        cache = MarketDataCache(str(tmp_path), FakeProvider(history))
+        for symbol in ['^GSPC', 'EURUSD=X', 'BRK/B']:
+            cache.write(symbol, history)
+        
+        assert cache.symbols() == sorted(['^GSPC', 'EURUSD=X', 'BRK/B'])
+        assert len(cache.read('BRK/B')) == len(history)
+
+
+class TestFetchMany:
+    """Test suite for concurrent ingestion through fetch_many."""
+    
+    def test_concurrent_fetch_bounds_latency(self):
+        """Test that symbols are fetched in parallel and latency is recorded."""
+        provider = SimulatedProvider(latency=0.1, days=100)
+        symbols = [f'S{i}' for i in range(16)]
+        
+        start = time.perf_counter()
+        data, report = fetch_many(symbols, provider=provider, max_workers=8)
+        elapsed = time.perf_counter() - start
+        
+        assert list(data) == symbols
+        assert elapsed < 0.8  # 16 x 0.1s sequentially
+        assert all(report[s]['source'] == 'provider' and report[s]['latency'] >= 0.1 for s in symbols)
+        assert all(report[s]['rows'] == 100 for s in symbols)
+    
+    def test_retries_then_fallback(self):
+        """Test that transient failures are retried and permanent ones fall back."""
+        provider = SimulatedProvider(fail_first=2, fail_symbols={'DEAD'}, days=50)
+        
+        data, report = fetch_many(['OK', 'DEAD'], provider=provider, retries=2, backoff=0.001,
+                                  fallback=lambda symbol: pd.DataFrame({'Close': [1.0]}))
+        
+        assert report['OK']['source'] == 'provider'
+        assert report['OK']['attempts'] == 3
+        assert report['DEAD']['source'] == 'fallback'
+        assert 'simulated failure' in report['DEAD']['error']
+        assert len(data['DEAD']) == 1
+        
+        data, report = fetch_many(['LATE'], provider=SimulatedProvider(fail_first=3), retries=1, backoff=0.001)
+        assert report['LATE']['source'] == 'failed'
+        assert 'LATE' not in data
+    
+    def test_batched_requests(self):
+        """Test multi-ticker requests with per-symbol retry of batch misses."""
+        provider = SimulatedProvider(supports_batch=True, fail_symbols={'S3'}, days=30)
+        symbols = [f'S{i}' for i in range(10)]
+        
+        data, report = fetch_many(symbols, provider=provider, batch_size=4, retries=1, backoff=0.001)
+        
+        batch_calls = [call for call in provider.calls if len(call) > 1]
+        assert sorted(map(len, batch_calls)) == [2, 4, 4]
+        assert provider.calls.count(['S3']) == 2
+        assert report['S0']['batch'] is True
+        assert report['S3']['source'] == 'failed'
+        assert len(data) == 9
+    
+    def test_cache_refresh_with_stale_fallback(self, tmp_path):
+        """Test concurrent refresh through the cache, serving stale bars on failure."""
+        provider = SimulatedProvider(days=60)
+        cache = MarketDataCache(str(tmp_path), provider)
+        fetch_many(['AAA', 'BBB'], cache=cache)
+        
+        provider.fail_symbols.add('AAA')
+        data, report = fetch_many(['AAA', 'BBB'], cache=cache, retries=0)
+        
+        assert report['AAA']['source'] == 'cache'
+        assert report['BBB']['source'] == 'provider'
+        assert len(data['AAA']) == 60
+    
+    def test_yfinance_batching_is_opt_in(self, monkeypatch, history):
+        """Test that Yahoo Finance symbols go through Ticker.history unless batching is requested."""
+        calls = []
+        
+        class Ticker:
+            def __init__(self, symbol):
+                self.symbol = symbol
+            
+            def history(self, start=None, period=None):
+                calls.append(('history', self.symbol))
+                return history.assign(Dividends=0.0)
+        
+        def download(symbols, **kwargs):
+            calls.append(('download', tuple(symbols)))
+            frames = {symbol: history.assign(Dividends=0.0).tz_localize(None) for symbol in symbols}
+            return pd.concat(frames, axis=1)
+        
+        monkeypatch.setitem(sys.modules, 'yfinance', type(sys)('yfinance'))
+        monkeypatch.setattr(sys.modules['yfinance'], 'Ticker', Ticker, raising=False)
+        monkeypatch.setattr(sys.modules['yfinance'], 'download', download, raising=False)
+        
+        data, _ = fetch_many(['AAA', 'BBB'], max_workers=1)
+        assert sorted(calls) == [('history', 'AAA'), ('history', 'BBB')]
+        assert data['AAA'].index.tz is not None
+        
+        calls.clear()
+        data, report = fetch_many(['AAA', 'BBB'], provider=YFinanceProvider(batch=True))
+        assert calls == [('download', ('AAA', 'BBB'))]
+        assert list(data['AAA'].columns) == OHLCV_COLUMNS
+        assert report['BBB']['batch'] is True
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v', '--tb=short'])
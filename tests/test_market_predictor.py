@@ -6,14 +6,49 @@ Tests basic functionality of prediction models and data processing.
 import pytest
 import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
 import sys
 import os
 
 # Add parent directory to path to import market_predictor
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from market_predictor import MarketTrendPredictor
+from market_data import DataProvider, MarketDataCache, symbol_seed
+from market_predictor import (MarketTrendPredictor, PooledWindows, StreamingIndicators, label_signals,
+                              make_lstm_windows, signal_votes)
+
+
+def reference_signals(data, oversold=30, overbought=70, min_votes=2):
+    """Per-row signal loop that the vectorized engine must reproduce."""
+    signals = []
+    for i in range(len(data)):
+        if i < 50:
+            signals.append('HOLD')
+            continue
+        current, previous = data.iloc[i], data.iloc[i - 1]
+        buy_signals = sell_signals = 0
+        if current['MA_5'] > current['MA_20'] and previous['MA_5'] <= previous['MA_20']:
+            buy_signals += 1
+        elif current['MA_5'] < current['MA_20'] and previous['MA_5'] >= previous['MA_20']:
+            sell_signals += 1
+        if current['MACD'] > current['MACD_Signal'] and previous['MACD'] <= previous['MACD_Signal']:
+            buy_signals += 1
+        elif current['MACD'] < current['MACD_Signal'] and previous['MACD'] >= previous['MACD_Signal']:
+            sell_signals += 1
+        if current['RSI'] < oversold:
+            buy_signals += 1
+        elif current['RSI'] > overbought:
+            sell_signals += 1
+        if current['Close'] < current['BB_Lower']:
+            buy_signals += 1
+        elif current['Close'] > current['BB_Upper']:
+            sell_signals += 1
+        if buy_signals >= min_votes:
+            signals.append('BUY')
+        elif sell_signals >= min_votes:
+            signals.append('SELL')
+        else:
+            signals.append('HOLD')
+    return signals
 
 
 class TestMarketTrendPredictor:
@@ -63,6 +98,27 @@ class TestMarketTrendPredictor:
         assert all(data['Close'] > 0)  # Prices should be positive
         assert all(data['High'] >= data['Low'])  # High should be >= Low
     
+    def test_generate_synthetic_universe(self, predictor):
+        """Test batch generation matches per-symbol generation."""
+        symbols = ['AAA', 'TEST', 'ZZZ']
+        universe = predictor.generate_synthetic_universe(symbols, days=120)
+        
+        assert list(universe.keys()) == symbols
+        assert universe['TEST'].equals(predictor.generate_synthetic_data('TEST', days=120))
+        
+        dates, fields = predictor.generate_synthetic_universe(symbols, days=120, dtype=np.float32, as_frames=False)
+        assert len(dates) == 120
+        assert fields['Close'].shape == (3, 120)
+        assert fields['Close'].dtype == np.float32
+        assert fields['Volume'].dtype == np.int64
+        assert np.all(fields['High'] >= fields['Low'])
+    
+    def test_symbol_seed_is_stable(self):
+        """Test that symbol seeds do not depend on PYTHONHASHSEED."""
+        assert symbol_seed('AAPL') == symbol_seed('AAPL')
+        assert symbol_seed('AAPL') == 3060094812
+        assert symbol_seed('AAPL') != symbol_seed('MSFT')
+    
     def test_prepare_lstm_data(self, predictor, sample_data):
         """Test LSTM data preparation."""
         lookback = 60
@@ -76,6 +132,43 @@ class TestMarketTrendPredictor:
         assert len(X) == len(y)
         assert len(X) == len(sample_data) - lookback
     
+    def test_prepare_lstm_data_matches_copied_windows(self, predictor, sample_data):
+        """Test that strided windows equal explicitly copied windows."""
+        lookback = 60
+        X, y, scaler = predictor.prepare_lstm_data(sample_data, lookback_window=lookback)
+        
+        scaled = scaler.transform(sample_data[['Close']])
+        expected_X = np.array([scaled[i - lookback:i, 0] for i in range(lookback, len(scaled))])
+        expected_y = np.array([scaled[i, 0] for i in range(lookback, len(scaled))])
+        
+        np.testing.assert_array_equal(X[:, :, 0], expected_X)
+        np.testing.assert_array_equal(y, expected_y)
+        assert not X.flags.writeable
+        assert np.shares_memory(X, y)
+    
+    def test_prepare_lstm_data_multiple_features(self, predictor, sample_data):
+        """Test multi-feature windows built from technical indicators."""
+        indicators = predictor.calculate_technical_indicators(sample_data)
+        features = ['Close', 'RSI', 'MACD', 'Volume_Ratio']
+        X, y, scaler = predictor.prepare_lstm_data(indicators, lookback_window=30, feature_columns=features)
+        
+        valid_rows = len(indicators[features].dropna())
+        assert X.shape == (valid_rows - 30, 30, len(features))
+        assert len(y) == len(X)
+        assert not np.isnan(X).any()
+        np.testing.assert_array_equal(X[1:, -1, 0], y[:-1])
+        
+        with pytest.raises(ValueError):
+            predictor.prepare_lstm_data(indicators, feature_columns=['RSI', 'MACD'])
+    
+    def test_lstm_dataset_batches(self, predictor, sample_data):
+        """Test that the tf.data pipeline yields every window once."""
+        X, y, _ = predictor.prepare_lstm_data(sample_data, lookback_window=60)
+        batches = list(predictor.lstm_dataset(X, y, batch_size=50, shuffle=True, seed=0).as_numpy_iterator())
+        
+        assert sum(len(batch_y) for _, batch_y in batches) == len(y)
+        np.testing.assert_allclose(np.sort(np.concatenate([b for _, b in batches])), np.sort(y), rtol=1e-6)
+    
     def test_build_lstm_model(self, predictor):
         """Test LSTM model building."""
         input_shape = (60, 1)
@@ -123,6 +216,89 @@ class TestMarketTrendPredictor:
         assert 'Predicted_Price' in predictions.columns
         assert all(predictions['Predicted_Price'] > 0)  # Prices should be positive
     
+    def test_compiled_forecast_matches_predict_loop(self, predictor):
+        """Test that the compiled rollout reproduces step-by-step model.predict."""
+        symbols = ['AAA', 'BBB']
+        predictor.data.update(predictor.generate_synthetic_universe(symbols, days=200))
+        for symbol in symbols:
+            predictor.train_lstm_model(symbol, epochs=1, batch_size=32)
+        
+        batch = predictor.predict_future_prices_batch(symbols, days_ahead=5)
+        
+        for symbol in symbols:
+            model, scaler = predictor.models[f'{symbol}_lstm'], predictor.scalers[f'{symbol}_lstm']
+            sequence = scaler.transform(predictor.data[symbol][['Close']].iloc[-60:]).reshape(1, 60, 1)
+            expected = []
+            for _ in range(5):
+                next_pred = model.predict(sequence, verbose=0)
+                expected.append(next_pred[0, 0])
+                sequence = np.roll(sequence, -1, axis=1)
+                sequence[0, -1, 0] = next_pred[0, 0]
+            expected = scaler.inverse_transform(np.array(expected).reshape(-1, 1)).flatten()
+            
+            np.testing.assert_allclose(batch[symbol]['Predicted_Price'], expected, rtol=1e-4)
+            pd.testing.assert_frame_equal(batch[symbol], predictor.predict_future_prices(symbol, days_ahead=5))
+    
+    def test_predict_future_prices_dropout_quantiles(self, predictor):
+        """Test that sampled forecasts add ordered quantile columns around the unchanged point path."""
+        symbol = 'TEST'
+        predictor.data[symbol] = predictor.generate_synthetic_data(symbol, days=200)
+        predictor.train_lstm_model(symbol, epochs=1, batch_size=32)
+        
+        point = predictor.predict_future_prices(symbol, days_ahead=5)
+        sampled = predictor.predict_future_prices(symbol, days_ahead=5, samples=32, quantiles=(0.1, 0.5, 0.9))
+        
+        assert list(sampled.columns) == ['Date', 'Predicted_Price', 'Q10', 'Q50', 'Q90']
+        pd.testing.assert_frame_equal(sampled[['Date', 'Predicted_Price']], point)
+        assert all(sampled['Q10'] <= sampled['Q50'])
+        assert all(sampled['Q50'] <= sampled['Q90'])
+        assert all(sampled['Q90'] > sampled['Q10'])  # Dropout is active while sampling
+    
+    def test_predict_future_prices_business_days(self, predictor):
+        """Test that business-day forecasts skip weekends."""
+        symbol = 'TEST'
+        predictor.data[symbol] = predictor.generate_synthetic_data(symbol, days=200)
+        predictor.train_lstm_model(symbol, epochs=1, batch_size=32)
+        
+        predictions = predictor.predict_future_prices(symbol, days_ahead=10, freq='B')
+        
+        assert len(predictions) == 10
+        assert all(predictions['Date'].dt.dayofweek < 5)
+        assert predictions['Date'].iloc[0] > predictor.data[symbol].index[-1]
+    
+    def test_pooled_windows_match_per_symbol_windows(self):
+        """Test that pooled windows gather the same blocks as per-series views."""
+        first, second = np.arange(10.0), np.arange(100.0, 108.0)
+        values = np.concatenate([first, second])
+        starts = np.concatenate([np.arange(7), 10 + np.arange(5)])
+        pooled = PooledWindows(values, starts, lookback_window=3)
+        
+        expected = np.concatenate([make_lstm_windows(first, 3), make_lstm_windows(second, 3)])
+        assert pooled.shape == expected.shape
+        np.testing.assert_array_equal(pooled[np.arange(len(pooled))], expected)
+        np.testing.assert_array_equal(pooled.targets(), np.concatenate([first[3:], second[3:]]))
+    
+    def test_global_lstm_model_forecasts_all_symbols(self, predictor):
+        """Test training one shared model and forecasting every symbol in one call."""
+        symbols = ['AAA', 'BBB', 'CCC']
+        predictor.data.update(predictor.generate_synthetic_universe(symbols, days=150))
+        
+        results = predictor.train_global_lstm_model(symbols, epochs=1, batch_size=32)
+        
+        assert set(results['symbols']) == set(symbols)
+        assert all(metrics['test_rmse'] > 0 for metrics in results['symbols'].values())
+        assert results['training_time'] > 0
+        assert [key for key in predictor.models] == ['global_lstm']
+        
+        forecasts = predictor.predict_future_prices_batch(symbols, days_ahead=5)
+        assert list(predictor._forecast_fns) == ['global_lstm']
+        for symbol in symbols:
+            assert len(forecasts[symbol]) == 5
+            assert all(forecasts[symbol]['Predicted_Price'] > 0)
+        
+        with pytest.raises(ValueError):
+            predictor.predict_future_prices('UNKNOWN')
+    
     def test_generate_trading_signals(self, predictor, sample_data):
         """Test trading signal generation."""
         symbol = 'TEST'
@@ -134,6 +310,87 @@ class TestMarketTrendPredictor:
         unique_signals = signals_df['Signal'].unique()
         assert all(signal in ['BUY', 'SELL', 'HOLD'] for signal in unique_signals)
     
+    def test_trading_signals_match_reference_loop(self, predictor, sample_data):
+        """Test that vectorized signals reproduce the per-row rules exactly."""
+        universe = predictor.generate_synthetic_universe(['AAA', 'BBB', 'CCC'], days=600)
+        universe['SAMPLE'] = sample_data
+        predictor.data.update(universe)
+        
+        for symbol in universe:
+            signals_df = predictor.generate_trading_signals(symbol)
+            assert list(signals_df['Signal']) == reference_signals(signals_df)
+            assert set(signals_df['Signal'].iloc[:50]) == {'HOLD'}
+    
+    def test_trading_signals_configurable_rules(self, predictor, sample_data):
+        """Test that custom thresholds follow the same rule semantics."""
+        predictor.data['TEST'] = sample_data
+        rules = {'rsi_oversold': 45, 'rsi_overbought': 55, 'min_votes': 1}
+        
+        signals_df = predictor.generate_trading_signals('TEST', rules=rules)
+        expected = reference_signals(signals_df, oversold=45, overbought=55, min_votes=1)
+        
+        assert list(signals_df['Signal']) == expected
+        assert (signals_df['Signal'] != 'HOLD').sum() > 0
+    
+    def test_signal_votes_broadcast_thresholds(self, predictor, sample_data):
+        """Test evaluating several rule sets at once via broadcasting."""
+        df = predictor.calculate_technical_indicators(sample_data)
+        arrays = [df[c].to_numpy() for c in ['Close', 'MA_5', 'MA_20', 'MACD', 'MACD_Signal',
+                                             'RSI', 'BB_Upper', 'BB_Lower']]
+        oversold = np.array([[30], [45]])
+        
+        buy_votes, sell_votes = signal_votes(*arrays, rsi_oversold=oversold, rsi_overbought=70)
+        labels = label_signals(buy_votes, sell_votes)
+        
+        assert labels.shape == (2, len(df))
+        assert list(labels[0]) == reference_signals(df)
+        assert list(labels[1]) == reference_signals(df, oversold=45)
+    
+    def test_signal_votes_overlapping_rsi_thresholds(self):
+        """Test that RSI casts at most one vote, buy first, when the thresholds overlap."""
+        flat, nan = np.zeros(3), np.full(3, np.nan)
+        rsi = np.array([20.0, 50.0, 80.0])
+        
+        buy_votes, sell_votes = signal_votes(flat, flat, flat, flat, flat, rsi, nan, nan,
+                                             rsi_oversold=60, rsi_overbought=40)
+        
+        np.testing.assert_array_equal(buy_votes, [1, 1, 0])
+        np.testing.assert_array_equal(sell_votes, [0, 0, 1])
+    
+    def test_streaming_indicators_match_batch(self, predictor):
+        """Test that O(1) streaming updates reproduce the batch indicators."""
+        data = predictor.generate_synthetic_data('TEST', days=400)
+        predictor.data['TEST'] = data
+        batch = predictor.generate_trading_signals('TEST')
+        
+        stream = StreamingIndicators(data.iloc[:120])
+        rows, signals = [], []
+        for _, bar in data.iloc[120:].iterrows():
+            rows.append(stream.update(bar['Close'], bar['Volume']))
+            signals.append(stream.signal())
+        streamed = pd.DataFrame(rows, index=data.index[120:])
+        
+        columns = ['MA_5', 'MA_10', 'MA_20', 'MA_50', 'EMA_12', 'EMA_26', 'MACD', 'MACD_Signal',
+                   'MACD_Histogram', 'RSI', 'BB_Middle', 'BB_Upper', 'BB_Lower', 'Volume_MA', 'Volume_Ratio']
+        pd.testing.assert_frame_equal(streamed[columns], batch[columns].iloc[120:], rtol=1e-9, atol=1e-9)
+        assert signals == list(batch['Signal'].iloc[120:])
+    
+    def test_streaming_indicators_seeded_state(self, predictor, sample_data):
+        """Test seeding from a full history and cold-starting with warm-up NaNs."""
+        predictor.data['TEST'] = sample_data
+        batch = predictor.calculate_technical_indicators(sample_data)
+        
+        stream = predictor.streaming_indicators('TEST')
+        assert stream.bars == len(sample_data)
+        assert stream.current['RSI'] == pytest.approx(batch['RSI'].iloc[-1])
+        assert stream.previous['MACD_Signal'] == pytest.approx(batch['MACD_Signal'].iloc[-2])
+        
+        cold = StreamingIndicators()
+        first = cold.update(100.0, 1000)
+        assert np.isnan(first['MA_5']) and np.isnan(first['RSI'])
+        assert first['EMA_12'] == 100.0
+        assert cold.signal() == 'HOLD'
+    
     def test_train_lstm_model_returns_results(self, predictor):
         """Test that LSTM training returns expected results structure."""
         symbol = 'TEST'
@@ -150,6 +407,96 @@ class TestMarketTrendPredictor:
         assert results['train_rmse'] > 0
         assert results['test_rmse'] > 0
     
+    def test_train_lstm_model_streaming(self, predictor):
+        """Test training from the streaming tf.data pipeline."""
+        symbol = 'TEST'
+        predictor.data[symbol] = predictor.generate_synthetic_data(symbol, days=200)
+        
+        results = predictor.train_lstm_model(symbol, epochs=1, batch_size=32, streaming=True)
+        
+        assert results['test_rmse'] > 0
+        assert len(results['train_predictions']) == len(results['y_train_actual'])
+        assert len(results['test_predictions']) == len(results['y_test_actual'])
+    
+    def test_train_lstm_model_from_cache(self, predictor, tmp_path):
+        """Test out-of-core training over cache slices against the in-memory split and scaler."""
+        symbol = 'TEST'
+        history = predictor.generate_synthetic_data(symbol, days=300)
+        cache = MarketDataCache(str(tmp_path))
+        cache.write(symbol, history)
+        
+        results = predictor.train_lstm_model_from_cache(symbol, cache, epochs=1, lookback_window=20,
+                                                        chunk_rows=64, keep_arrays=True, seed=0)
+        X, _, scaler = predictor.prepare_lstm_data(history, lookback_window=20)
+        split_index = int(len(X) * 0.8)
+        
+        assert results['scaler'].data_min_ == pytest.approx(scaler.data_min_)
+        assert results['scaler'].data_max_ == pytest.approx(scaler.data_max_)
+        np.testing.assert_allclose(results['y_train_actual'].ravel(), history['Close'].iloc[20:20 + split_index])
+        np.testing.assert_allclose(results['y_test_actual'].ravel(), history['Close'].iloc[20 + split_index:])
+        errors = results['test_predictions'] - results['y_test_actual']
+        assert results['test_rmse'] == pytest.approx(np.sqrt(np.mean(errors ** 2)))
+        assert results['train_mae'] > 0
+        assert predictor.trained_until[symbol] == history.index[-1]
+        
+        predictor.data[symbol] = cache.read(symbol)
+        assert len(predictor.predict_future_prices(symbol, days_ahead=3, lookback_window=20)) == 3
+    
+    def test_create_market_dashboard_process_pool(self, predictor):
+        """Test parallel dashboard merging, failure entries and timings."""
+        predictor.data['GOOD'] = predictor.generate_synthetic_data('GOOD', days=120)
+        predictor.data['SHORT'] = predictor.generate_synthetic_data('SHORT', days=30)
+        
+        dashboard = predictor.create_market_dashboard(['SHORT', 'GOOD', 'MISSING'], epochs=1, n_jobs=2)
+        
+        assert list(dashboard.keys()) == ['SHORT', 'GOOD']
+        assert 'error' in dashboard['SHORT']
+        assert dashboard['GOOD']['technical_indicators']['Signal'] in ['BUY', 'SELL', 'HOLD']
+        assert set(predictor.timings['GOOD']) == {'train', 'forecast', 'signals', 'total'}
+        assert 'GOOD_lstm' in predictor.models
+        assert len(predictor.predict_future_prices('GOOD', days_ahead=3)) == 3
+    
+    def test_update_lstm_model_fine_tunes_in_range(self, predictor):
+        """Test fine-tuning the stored model on new bars inside the scaler range."""
+        symbol = 'TEST'
+        history = predictor.generate_synthetic_data(symbol, days=150)
+        predictor.data[symbol] = history
+        predictor.train_lstm_model(symbol, epochs=1)
+        model = predictor.models[f'{symbol}_lstm']
+        weights_before = [w.copy() for w in model.get_weights()]
+        
+        new_dates = pd.date_range(history.index[-1] + pd.Timedelta(days=1), periods=5, freq='D')
+        new_bars = history.iloc[-5:].set_axis(new_dates)
+        new_bars['Close'] = history['Close'].median()
+        
+        results = predictor.update_lstm_model(symbol, new_bars, epochs=1, recent_window=40)
+        
+        assert results['mode'] == 'fine_tune'
+        assert results['new_bars'] == 5
+        assert predictor.models[f'{symbol}_lstm'] is model
+        assert any(not np.array_equal(a, b) for a, b in zip(weights_before, model.get_weights()))
+        assert len(predictor.data[symbol]) == 155
+        assert predictor.trained_until[symbol] == new_dates[-1]
+        assert predictor.update_lstm_model(symbol, new_bars)['mode'] == 'unchanged'
+    
+    def test_update_lstm_model_retrains_on_scaler_drift(self, predictor):
+        """Test that prices outside the fitted range trigger a full retrain."""
+        symbol = 'TEST'
+        history = predictor.generate_synthetic_data(symbol, days=150)
+        predictor.data[symbol] = history
+        predictor.train_lstm_model(symbol, epochs=1)
+        old_scaler = predictor.scalers[f'{symbol}_lstm']
+        
+        new_bars = history.iloc[-1:].set_axis([history.index[-1] + pd.Timedelta(days=1)])
+        new_bars['Close'] = history['Close'].max() * 1.5
+        
+        results = predictor.update_lstm_model(symbol, new_bars, full_epochs=1)
+        
+        assert results['mode'] == 'retrain'
+        assert results['drift'] is True
+        assert predictor.scalers[f'{symbol}_lstm'] is not old_scaler
+        assert predictor.scalers[f'{symbol}_lstm'].data_max_[0] == pytest.approx(new_bars['Close'].iloc[0])
+    
     def test_data_persistence_after_fetch(self, predictor):
         """Test that data persists in predictor after generation."""
         symbol = 'TEST'
@@ -161,6 +508,45 @@ class TestMarketTrendPredictor:
         assert predictor.data[symbol].equals(data)
 
 
+class OfflineProvider(DataProvider):
+    """Local provider that serves synthetic bars and fails for one symbol."""
+    
+    def __init__(self):
+        self.fail = {'BROKEN'}
+    
+    def fetch(self, symbol, start=None, period='2y'):
+        if symbol in self.fail:
+            raise ConnectionError('provider unavailable')
+        data = MarketTrendPredictor().generate_synthetic_data(symbol, days=120)
+        return data if start is None else data[data.index >= pd.Timestamp(start)]
+
+
+class TestFetchMarketData:
+    """Test suite for fetching through providers and the local cache."""
+    
+    def test_fetch_with_provider_and_fallback(self):
+        """Test that provider failures fall back to synthetic data."""
+        predictor = MarketTrendPredictor()
+        data = predictor.fetch_market_data(['AAA', 'BROKEN'], provider=OfflineProvider())
+        
+        assert len(data['AAA']) == 120
+        assert len(data['BROKEN']) == 730
+        assert predictor.data is data
+    
+    def test_fetch_with_cache_uses_stale_bars_on_failure(self, tmp_path):
+        """Test that a failed refresh serves the cached history instead of synthetic data."""
+        provider = OfflineProvider()
+        cache = MarketDataCache(str(tmp_path), provider)
+        predictor = MarketTrendPredictor()
+        first = predictor.fetch_market_data(['AAA'], cache=cache)
+        
+        provider.fail.add('AAA')
+        second = predictor.fetch_market_data(['AAA'], cache=cache)
+        
+        assert len(first['AAA']) == len(second['AAA']) == 120
+        np.testing.assert_array_equal(second['AAA']['Close'], first['AAA']['Close'])
+
+
 class TestDataValidation:
     """Test suite for data validation and edge cases."""
     
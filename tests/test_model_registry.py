@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Unit tests for Model Registry
+Tests content-hash reuse of trained models, resuming fine-tuning, listing, purging and eviction.
+"""
+import pytest
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+# Add parent directory to path to import model_registry
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from market_data import MarketDataCache
+from market_predictor import MarketTrendPredictor
+from model_registry import ModelRegistry
+
+
+@pytest.fixture
+def registry(tmp_path):
+    """Create an empty registry in a temporary directory."""
+    return ModelRegistry(str(tmp_path / 'registry'))
+
+
+class TestModelRegistry:
+    """Test suite for ModelRegistry."""
+    
+    def test_unchanged_symbol_loads_instead_of_training(self, registry):
+        """Test that a second run with the same data reuses the stored model."""
+        first = MarketTrendPredictor(registry=registry)
+        first.data['TEST'] = first.generate_synthetic_data('TEST', days=150)
+        trained = first.train_lstm_model('TEST', epochs=1)
+        
+        second = MarketTrendPredictor(registry=registry)
+        second.data['TEST'] = first.data['TEST']
+        reused = second.train_lstm_model('TEST', epochs=1)
+        
+        assert trained['from_registry'] is False
+        assert reused['from_registry'] is True
+        assert reused['test_rmse'] == pytest.approx(trained['test_rmse'])
+        np.testing.assert_allclose(reused['test_predictions'], trained['test_predictions'])
+        for expected, actual in zip(trained['model'].get_weights(), second.models['TEST_lstm'].get_weights()):
+            np.testing.assert_array_equal(expected, actual)
+        assert len(second.predict_future_prices('TEST', days_ahead=3)) == 3
+    
+    def test_update_resumes_from_registry_in_a_fresh_predictor(self, registry):
+        """Test that a new process fine-tunes the stored model given only the latest bars."""
+        first = MarketTrendPredictor(registry=registry)
+        history = first.generate_synthetic_data('TEST', days=150)
+        first.data['TEST'] = history
+        first.train_lstm_model('TEST', epochs=1)
+        
+        new_dates = pd.date_range(history.index[-1] + pd.Timedelta(days=1), periods=5, freq='D')
+        new_bars = history.iloc[-5:].set_axis(new_dates)
+        new_bars['Close'] = history['Close'].median()
+        
+        nightly = MarketTrendPredictor(registry=registry)
+        results = nightly.update_lstm_model('TEST', new_bars, epochs=1, recent_window=40)
+        
+        assert results['mode'] == 'fine_tune'
+        assert results['new_bars'] == 5
+        assert nightly.trained_until['TEST'] == new_dates[-1]
+        assert nightly.data['TEST'].index[-1] == new_dates[-1]
+        assert len(nightly.data['TEST']) == 155  # Saved bars restored in front of the new ones
+        assert len(registry.entries()) == 2
+        
+        next_night = MarketTrendPredictor(registry=registry)
+        assert next_night.update_lstm_model('TEST', new_bars)['mode'] == 'unchanged'
+        for expected, actual in zip(nightly.models['TEST_lstm'].get_weights(),
+                                    next_night.models['TEST_lstm'].get_weights()):
+            np.testing.assert_array_equal(expected, actual)
+    
+    def test_drift_after_resume_needs_the_full_history(self, registry, tmp_path):
+        """Test that drift after a cross-process resume retrains on the full history, never on the saved bars."""
+        first = MarketTrendPredictor(registry=registry)
+        history = first.generate_synthetic_data('TEST', days=400)
+        first.data['TEST'] = history
+        first.train_lstm_model('TEST', epochs=1, lookback_window=20)
+        
+        new_dates = pd.date_range(history.index[-1] + pd.Timedelta(days=1), periods=5, freq='D')
+        new_bars = history.iloc[-5:].set_axis(new_dates)
+        new_bars['Close'] = history['Close'].max() * 2  # Outside the scaler's range
+        
+        nightly = MarketTrendPredictor(registry=registry)
+        results = nightly.update_lstm_model('TEST', new_bars, lookback_window=20, full_epochs=1)
+        
+        assert results['mode'] == 'needs_full_history'
+        assert results['drift'] is True
+        assert nightly.trained_until['TEST'] == history.index[-1]
+        assert len(registry.entries()) == 1
+        
+        cache = MarketDataCache(str(tmp_path / 'bars'))
+        cache.write('TEST', pd.concat([history, new_bars]))
+        results = nightly.update_lstm_model('TEST', lookback_window=20, full_epochs=1, cache=cache)
+        
+        assert results['mode'] == 'retrain'
+        assert len(nightly.data['TEST']) == 405
+        assert nightly.trained_until['TEST'] == new_dates[-1]
+    
+    def test_key_changes_with_data_and_hyperparameters(self, registry):
+        """Test that new bars or different hyperparameters miss the registry."""
+        predictor = MarketTrendPredictor()
+        data = predictor.generate_synthetic_data('TEST', days=100)['Close']
+        params = {'lookback_window': 60, 'epochs': 20}
+        
+        key = registry.make_key(data, params)
+        assert key == registry.make_key(data.copy(), dict(params))
+        assert key != registry.make_key(data.iloc[:-1], params)
+        assert key != registry.make_key(data, {**params, 'epochs': 21})
+    
+    def test_list_purge_and_evict(self, tmp_path):
+        """Test listing entries, purging by symbol and size-based LRU eviction."""
+        predictor = MarketTrendPredictor()
+        model = predictor.build_lstm_model((10, 1))
+        registry = ModelRegistry(str(tmp_path / 'registry'))
+        
+        for symbol in ['AAA', 'BBB', 'CCC']:
+            registry.save(f'key-{symbol}', symbol, model, scaler=None, metrics={'test_rmse': 1.0})
+        entry_size = registry.entries()[0]['size']
+        
+        assert [entry['symbol'] for entry in registry.entries()] == ['CCC', 'BBB', 'AAA']
+        assert registry.purge(symbol='BBB') == ['key-BBB']
+        assert not registry.contains('key-BBB')
+        
+        registry.load('key-AAA')  # AAA becomes most recently used
+        registry.max_bytes = int(entry_size * 1.5)
+        assert registry.evict() == ['key-CCC']
+        assert [entry['key'] for entry in registry.entries()] == ['key-AAA']
+        
+        registry.purge()
+        assert registry.entries() == []
+    
+    def test_oversized_entry_is_kept_and_indexed_by_symbol(self, tmp_path):
+        """Test that a save never evicts its own entry and that latest reads only the symbol's entries."""
+        predictor = MarketTrendPredictor()
+        model = predictor.build_lstm_model((10, 1))
+        registry = ModelRegistry(str(tmp_path / 'registry'), max_bytes=1)
+        
+        with pytest.warns(UserWarning, match='exceeds max_bytes'):
+            registry.save('key-old', 'AAA', model, scaler=None, metrics={}, params={'lookback_window': 10})
+        with pytest.warns(UserWarning):
+            registry.save('key-new', 'AAA', model, scaler=None, metrics={}, params={'lookback_window': 10})
+        
+        assert [entry['key'] for entry in registry.entries()] == ['key-new']
+        assert registry.latest('AAA', lookback_window=10)['key'] == 'key-new'
+        assert registry.latest('AAA', lookback_window=20) is None
+        assert registry.latest('BBB') is None
+        assert not [name for name in os.listdir(registry.root) if name.endswith('.tmp')]
+        
+        registry.purge(symbol='AAA')
+        assert registry.latest('AAA') is None
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v', '--tb=short'])
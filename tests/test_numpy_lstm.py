@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the NumPy LSTM runtime
+Tests that exported models reproduce the Keras forward pass and forecasts.
+"""
+import pytest
+import numpy as np
+import sys
+import os
+
+# Add parent directory to path to import numpy_lstm
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from market_predictor import MarketTrendPredictor
+from numpy_lstm import NumpyLSTMRuntime
+
+
+@pytest.fixture(scope='module')
+def trained():
+    """Train two small per-symbol models and export them."""
+    predictor = MarketTrendPredictor()
+    symbols = ['AAA', 'BBB']
+    predictor.data = predictor.generate_synthetic_universe(symbols, days=150)
+    for symbol in symbols:
+        predictor.train_lstm_model(symbol, epochs=1)
+    return predictor, symbols
+
+
+class TestNumpyLSTMRuntime:
+    """Test suite for NumpyLSTMRuntime."""
+    
+    def test_forward_pass_matches_keras(self, trained, tmp_path):
+        """Test that one-step predictions agree with model.predict."""
+        predictor, symbols = trained
+        paths = {symbol: predictor.export_numpy_model(symbol, str(tmp_path / f'{symbol}.npz')) for symbol in symbols}
+        runtime = NumpyLSTMRuntime(paths)
+        
+        rng = np.random.default_rng(0)
+        windows = rng.random((len(symbols), 4, 60, 1)).astype(np.float32)
+        expected = np.stack([
+            predictor.models[f'{symbol}_lstm'].predict(batch, verbose=0)[:, 0]
+            for symbol, batch in zip(symbols, windows)
+        ])
+        
+        np.testing.assert_allclose(runtime.predict_scaled(windows), expected, atol=1e-5)
+    
+    def test_forecast_matches_predictor(self, trained, tmp_path):
+        """Test that the autoregressive forecast matches predict_future_prices_batch."""
+        predictor, symbols = trained
+        paths = {symbol: predictor.export_numpy_model(symbol, str(tmp_path / f'{symbol}.npz')) for symbol in symbols}
+        runtime = NumpyLSTMRuntime(paths)
+        
+        expected = predictor.predict_future_prices_batch(symbols, days_ahead=10)
+        forecast = runtime.forecast({symbol: predictor.data[symbol]['Close'].to_numpy() for symbol in symbols},
+                                    days_ahead=10)
+        
+        assert forecast.shape == (len(symbols), 10)
+        for symbol, prices in zip(symbols, forecast):
+            np.testing.assert_allclose(prices, expected[symbol]['Predicted_Price'], rtol=1e-4)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
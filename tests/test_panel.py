@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Unit tests for Panel Store
+Tests the float32 columnar panel, its mapping interface and the compact predictor mode.
+"""
+import pytest
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+# Add parent directory to path to import panel
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from market_predictor import MarketTrendPredictor, RESULT_ARRAYS
+from panel import PanelStore
+
+
+class TestPanelStore:
+    """Test suite for PanelStore and compact mode."""
+    
+    def test_roundtrip_unequal_lengths(self):
+        """Test that frames of different lengths come back with their own bars at float32 precision."""
+        predictor = MarketTrendPredictor()
+        frames = {'LONG': predictor.generate_synthetic_data('LONG', days=300),
+                  'SHORT': predictor.generate_synthetic_data('SHORT', days=120)}
+        panel = PanelStore.from_frames(frames)
+        
+        assert list(panel) == ['LONG', 'SHORT']
+        assert panel.prices.dtype == np.float32
+        assert panel.nbytes < sum(int(frame.memory_usage(index=True).sum()) for frame in frames.values())
+        for symbol, frame in frames.items():
+            restored = panel[symbol]
+            pd.testing.assert_index_equal(restored.index, frame.index, check_names=False)
+            np.testing.assert_allclose(restored['Close'], frame['Close'], rtol=1e-6)
+            np.testing.assert_array_equal(restored['Volume'], frame['Volume'])
+        
+        extended = pd.concat([frames['SHORT'], frames['SHORT'].iloc[-1:].shift(1, freq='D')])
+        assert panel.panel_row('SHORT') == 1
+        panel['SHORT'] = extended
+        assert len(panel['SHORT']) == 121 and list(panel) == ['LONG', 'SHORT']
+        assert panel.panel_row('LONG') == 0 and panel.panel_row('SHORT') is None
+    
+    def test_compact_predictor(self):
+        """Test that a compact predictor keeps float32 data and drops result arrays unless asked."""
+        predictor = MarketTrendPredictor(compact=True)
+        predictor.data = PanelStore.from_frames({'TEST': predictor.generate_synthetic_data('TEST', days=200)})
+        
+        signals = predictor.generate_trading_signals('TEST')
+        assert signals['RSI'].dtype == np.float32
+        assert set(signals['Signal'].unique()) <= {'BUY', 'SELL', 'HOLD'}
+        
+        results = predictor.train_lstm_model('TEST', epochs=1, batch_size=32, lookback_window=20)
+        assert 'test_rmse' in results
+        assert not set(RESULT_ARRAYS) & set(results)
+        kept = predictor.train_lstm_model('TEST', epochs=1, batch_size=32, lookback_window=20, keep_arrays=True)
+        assert set(RESULT_ARRAYS) <= set(kept)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
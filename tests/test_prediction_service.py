@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Unit tests for Prediction Service
+Tests request micro-batching, the HTTP endpoints and the service metrics.
+"""
+import pytest
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+import sys
+import os
+
+# Add parent directory to path to import prediction_service
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import prediction_service
+from prediction_service import MicroBatcher, PredictionService, load_predictor, make_server
+
+
+class TestPredictionService:
+    """Test suite for the prediction service."""
+    
+    def test_micro_batcher_groups_concurrent_items(self):
+        """Test that items submitted together are processed in few batches and keep their own results."""
+        batch_sizes = []
+        
+        def process(items):
+            batch_sizes.append(len(items))
+            return [item * 2 for item in items]
+        
+        batcher = MicroBatcher(process, max_batch_size=8, max_delay=0.05)
+        results = {}
+        threads = [threading.Thread(target=lambda i=i: results.__setitem__(i, batcher.submit(i).result()))
+                   for i in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        batcher.close()
+        
+        assert results == {i: i * 2 for i in range(20)}
+        assert sum(batch_sizes) == 20
+        assert len(batch_sizes) < 20 and max(batch_sizes) <= 8
+    
+    def test_failing_symbol_only_fails_its_own_requests(self):
+        """Test that a symbol whose forecast raises leaves the other requests of its batch intact."""
+        predictor = load_predictor(['AAA', 'BBB', 'CCC'], synthetic=True, days=200, epochs=1, lookback_window=20)
+        batch = predictor.predict_future_prices_batch
+        
+        def failing_batch(symbols, *args, **kwargs):
+            if 'BBB' in symbols:
+                raise RuntimeError('BBB failed')
+            return batch(symbols, *args, **kwargs)
+        
+        predictor.predict_future_prices_batch = failing_batch
+        service = PredictionService(predictor, lookback_window=20, max_delay=0.05)
+        results = service._forecast_batch([('AAA', 5), ('BBB', 5), ('CCC', 3), ('BBB', 2)])
+        service.close()
+        
+        assert [len(result) for result in (results[0], results[2])] == [5, 3]
+        assert all(isinstance(result, RuntimeError) for result in (results[1], results[3]))
+        
+        batcher = MicroBatcher(lambda items: [ValueError(item) if item < 0 else item for item in items])
+        assert batcher.submit(1).result() == 1
+        with pytest.raises(ValueError):
+            batcher.submit(-1).result()
+        batcher.close()
+    
+    def test_signal_miss_does_not_block_other_symbols(self, monkeypatch):
+        """Test that a slow signal computation for one symbol does not delay cached rows of another."""
+        predictor = load_predictor(['AAA', 'BBB'], synthetic=True, days=200, epochs=1, lookback_window=20)
+        service = PredictionService(predictor, lookback_window=20)
+        service.signals('AAA')
+        compute = prediction_service.latest_signals
+        release = threading.Event()
+        
+        def slow_signals(predictor, symbols):
+            release.wait(10)
+            return compute(predictor, symbols)
+        
+        monkeypatch.setattr(prediction_service, 'latest_signals', slow_signals)
+        slow = threading.Thread(target=service.signals, args=('BBB',))
+        slow.start()
+        try:
+            start = time.perf_counter()
+            assert service.signals('AAA')['Signal'] in {'BUY', 'SELL', 'HOLD'}
+            assert time.perf_counter() - start < 5
+        finally:
+            release.set()
+            slow.join()
+            service.close()
+        assert service.signal_hits == 1 and service.signal_misses == 2
+    
+    def test_http_endpoints(self):
+        """Test that concurrent forecasts match direct predictions and signals are served from cache."""
+        symbols = ['AAA', 'BBB', 'CCC']
+        predictor = load_predictor(symbols, synthetic=True, days=200, epochs=1, lookback_window=20)
+        service = PredictionService(predictor, lookback_window=20, max_delay=0.05)
+        service.warm_up(5)
+        server = make_server(service, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f'http://127.0.0.1:{server.server_address[1]}'
+        
+        def get(path):
+            with urllib.request.urlopen(base_url + path, timeout=60) as response:
+                return json.loads(response.read())
+        
+        try:
+            responses = {}
+            threads = [threading.Thread(target=lambda s=s, d=d: responses.__setitem__(
+                           s, get(f'/forecast?symbol={s}&days={d}')))
+                       for s, d in zip(symbols, [5, 10, 3])]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            
+            for symbol, days in zip(symbols, [5, 10, 3]):
+                expected = predictor.predict_future_prices(symbol, days_ahead=days, lookback_window=20)
+                assert responses[symbol]['predicted_prices'] == pytest.approx(
+                    expected['Predicted_Price'].tolist(), rel=1e-4)
+            
+            first, second = get('/signals?symbol=AAA'), get('/signals?symbol=AAA')
+            assert first == second and first['Signal'] in {'BUY', 'SELL', 'HOLD'}
+            with pytest.raises(urllib.error.HTTPError) as error:
+                get('/forecast?symbol=MISSING')
+            assert error.value.code == 404
+            
+            metrics = get('/metrics')
+            assert metrics['signal_cache']['hits'] == 1
+            assert metrics['endpoints']['forecast']['count'] == 4
+            assert metrics['endpoints']['forecast']['p95_ms'] is not None
+            assert metrics['batched_requests'] == 3 and metrics['queue_depth'] == 0
+        finally:
+            server.shutdown()
+            server.server_close()
+            service.close()
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Unit tests for TrainingScheduler
+Tests the wall-clock budget, skipping, early stopping and best-weight restoring.
+"""
+import pytest
+import itertools
+import numpy as np
+import sys
+import os
+
+# Add parent directory to path to import scheduler
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from market_predictor import MarketTrendPredictor
+from scheduler import REPORT_COLUMNS, TrainingScheduler
+
+
+@pytest.fixture
+def predictor():
+    """Predictor holding a small synthetic universe."""
+    predictor = MarketTrendPredictor()
+    predictor.data = predictor.generate_synthetic_universe(['AAA', 'BBB'], days=200)
+    return predictor
+
+
+class TestTrainingScheduler:
+    """Test suite for the time-budgeted training scheduler."""
+    
+    def test_run_stays_within_budget(self, predictor):
+        """Test that a run, its evaluation and its forecasts fit the budget and every symbol is reported."""
+        scheduler = TrainingScheduler(predictor, time_budget=40, lookback_window=20)
+        results = scheduler.run(['AAA', 'BBB', 'MISSING'])
+        report = scheduler.report()
+        
+        assert list(report.columns) == list(REPORT_COLUMNS)
+        assert list(report['Symbol']) == ['AAA', 'BBB']
+        assert set(report['Stopped']) <= {'budget', 'converged', 'skipped'}
+        assert sorted(results) == sorted(report.loc[report['Stopped'] != 'skipped', 'Symbol'])
+        assert report['Seconds'].sum() <= scheduler.elapsed + 1e-6
+        for symbol in results:
+            assert results[symbol]['schedule']['Epochs'] == len(results[symbol]['history']['val_loss'])
+            assert len(predictor.predict_future_prices(symbol, days_ahead=30, lookback_window=20)) == 30
+        assert scheduler.elapsed < 40
+        
+        # The dashboard reuses the scheduled models instead of training again
+        dashboard = predictor.create_market_dashboard(['AAA'], trained=results)
+        assert predictor.models['AAA_lstm'] is results['AAA']['model']
+        assert dashboard['AAA']['model_accuracy']['test_rmse'] == round(results['AAA']['test_rmse'], 2)
+    
+    def test_tight_budget_skips_symbols(self, predictor):
+        """Test that symbols whose probe would not fit are skipped rather than trained over budget."""
+        predictor.data.update(predictor.generate_synthetic_universe(['CCC'], days=200))
+        # A fake clock advancing 0.1 s per reading: the probe alone outlasts the budget on any machine
+        ticks = itertools.count()
+        scheduler = TrainingScheduler(predictor, time_budget=1, lookback_window=20,
+                                      clock=lambda: next(ticks) * 0.1)
+        results = scheduler.run(['AAA', 'BBB', 'CCC'])
+        
+        assert list(results) == ['AAA']  # The first probe has no estimate to go by
+        assert list(scheduler.report()['Stopped']) == ['budget', 'skipped', 'skipped']
+        assert results['AAA']['schedule']['Epochs'] == 1
+        dashboard = predictor.create_market_dashboard(['AAA', 'BBB'], trained=results)
+        assert 'error' in dashboard['BBB']
+        assert 'BBB_lstm' not in predictor.models
+    
+    def test_failing_symbol_is_reported_as_error(self, predictor):
+        """Test that a symbol that cannot be trained stops as error while the others are trained."""
+        predictor.data.update(predictor.generate_synthetic_universe(['TINY'], days=15))
+        scheduler = TrainingScheduler(predictor, time_budget=600, max_epochs=1, lookback_window=20)
+        results = scheduler.run(['AAA', 'TINY', 'BBB'])
+        report = scheduler.report().set_index('Symbol')
+        
+        assert list(report['Stopped']) == ['max_epochs', 'error', 'max_epochs']
+        assert report.loc['TINY', 'Error'] == results['TINY']['error']
+        assert 'TINY_lstm' not in predictor.models
+        dashboard = predictor.create_market_dashboard(['AAA', 'TINY', 'BBB'], trained=results)
+        assert dashboard['TINY'] == {'error': results['TINY']['error']}
+        assert 'error' not in dashboard['AAA'] and 'error' not in dashboard['BBB']
+        with pytest.raises(ValueError):
+            predictor.create_market_dashboard(['AAA'], n_jobs=2, trained=results)
+    
+    def test_early_stopping_keeps_best_weights(self, predictor):
+        """Test that stopped models are left with the weights of their best validation epoch."""
+        scheduler = TrainingScheduler(predictor, time_budget=600, chunk_epochs=3, patience=1, max_epochs=6,
+                                      lookback_window=20)
+        results = scheduler.run(['AAA'])
+        row = results['AAA']['schedule']
+        
+        assert row['Stopped'] in ('converged', 'max_epochs')
+        assert row['Epochs'] <= 6
+        val_loss = results['AAA']['history']['val_loss']
+        assert row['Best_Val_Loss'] == min(val_loss[:row['Best_Epoch']])
+        
+        X, y, _ = predictor.prepare_lstm_data(predictor.data['AAA'], 20)
+        split_index = int(len(X) * 0.8)
+        loss = predictor.models['AAA_lstm'].evaluate(X[split_index:], y[split_index:], verbose=0)
+        np.testing.assert_allclose(loss, row['Best_Val_Loss'], rtol=1e-3)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Unit tests for Screener
+Tests panel indicators and the cross-sectional snapshot against the per-symbol pandas path.
+"""
+import pytest
+import numpy as np
+import pandas as pd
+import sys
+import os
+
+# Add parent directory to path to import screener
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from market_predictor import MarketTrendPredictor
+from panel import PanelStore, right_align
+from screener import panel_indicators, screen
+
+
+@pytest.fixture
+def predictor():
+    """Predictor holding symbols with different listing dates and missing bars."""
+    predictor = MarketTrendPredictor()
+    predictor.data = predictor.generate_synthetic_universe(['LONG', 'GAPPY', 'STALE', 'NEW'], days=300)
+    predictor.data['GAPPY'] = predictor.data['GAPPY'].drop(predictor.data['GAPPY'].index[100:115])
+    predictor.data['STALE'] = predictor.data['STALE'].iloc[:-4]
+    predictor.data['NEW'] = predictor.data['NEW'].iloc[-40:]
+    return predictor
+
+
+class TestScreener:
+    """Test suite for the panel screener."""
+    
+    def test_panel_indicators_match_per_symbol(self, predictor):
+        """Test that every right-aligned panel column equals calculate_technical_indicators."""
+        fields, last_bars, lengths = right_align(predictor.data)
+        indicators = panel_indicators(fields['Close'], fields['Volume'])
+        
+        for j, symbol in enumerate(predictor.data):
+            expected = predictor.calculate_technical_indicators(predictor.data[symbol], symbol)
+            assert lengths[j] == len(expected)
+            assert last_bars[j] == expected.index[-1]
+            for name, values in indicators.items():
+                np.testing.assert_allclose(values[-len(expected):, j], expected[name].to_numpy(dtype=np.float64),
+                                           rtol=1e-8, atol=1e-8, err_msg=f'{symbol} {name}')
+    
+    def test_snapshot_matches_signals_and_ranks(self, predictor):
+        """Test the snapshot's signals and changes per symbol, its order and PanelStore input."""
+        snapshot = predictor.screen_universe(rules={'min_votes': 1})
+        
+        assert sorted(snapshot['Symbol']) == sorted(predictor.data)
+        for row in snapshot.itertuples():
+            signals = predictor.generate_trading_signals(row.Symbol, {'min_votes': 1})
+            close = signals['Close']
+            assert row.Signal == signals['Signal'].iloc[-1]
+            assert row.Date == signals.index[-1]
+            assert row.RSI == pytest.approx(signals['RSI'].iloc[-1], rel=1e-8)
+            assert row.Change_1d == pytest.approx((close.iloc[-1] - close.iloc[-2]) / close.iloc[-2] * 100)
+            assert row.Change_7d == pytest.approx((close.iloc[-1] - close.iloc[-7]) / close.iloc[-7] * 100)
+        assert snapshot.set_index('Symbol').loc['NEW', 'Signal'] == 'HOLD'  # Still in its own warm-up
+        
+        order = snapshot['Signal'].map({'BUY': 0, 'HOLD': 1, 'SELL': 2})
+        assert order.is_monotonic_increasing
+        
+        from_panel = screen(PanelStore.from_frames(predictor.data), rules={'min_votes': 1})
+        pd.testing.assert_frame_equal(from_panel.drop(columns=['Close', 'BB_Upper', 'BB_Lower']),
+                                      snapshot.drop(columns=['Close', 'BB_Upper', 'BB_Lower']),
+                                      check_exact=False, rtol=1e-3)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
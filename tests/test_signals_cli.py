@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the Signals CLI
+Tests the TensorFlow-free signals path and records its startup cost.
+"""
+import pytest
+import json
+import subprocess
+import sys
+import os
+
+# Add parent directory to path to import signals_cli
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from market_predictor import MarketTrendPredictor
+from signals_cli import latest_signals, main
+
+STARTUP_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import signals_cli
+import_time = time.perf_counter() - start
+signals_cli.main(['AAA', 'BBB', '--synthetic', '--days', '200', '--json'])
+peak_rss_mb = None
+with open('/proc/self/status') as f:
+    for line in f:
+        if line.startswith('VmHWM:'):
+            peak_rss_mb = int(line.split()[1]) / 1024
+heavy = [name for name in ('tensorflow', 'keras', 'sklearn', 'matplotlib', 'seaborn', 'yfinance') if name in sys.modules]
+print(json.dumps({'import_time': import_time, 'peak_rss_mb': peak_rss_mb, 'heavy_modules': heavy}))
+"""
+
+
+class TestSignalsCLI:
+    """Test suite for signals_cli."""
+    
+    def test_synthetic_json_output(self, capsys):
+        """Test that the CLI prints the latest signal for every symbol."""
+        assert main(['AAA', 'BBB', '--synthetic', '--days', '200', '--json']) == 0
+        rows = json.loads(capsys.readouterr().out)
+        
+        assert [row['Symbol'] for row in rows] == ['AAA', 'BBB']
+        for row in rows:
+            assert row['Signal'] in ['BUY', 'SELL', 'HOLD']
+            assert 0 <= row['RSI'] <= 100
+    
+    def test_undefined_indicators_are_null(self, capsys):
+        """Test that NaN indicators (RSI of a flat series) are printed as JSON null."""
+        predictor = MarketTrendPredictor()
+        data = predictor.generate_synthetic_data('FLAT', days=100)
+        data['Close'] = 100.0
+        predictor.data['FLAT'] = data
+        
+        rows = latest_signals(predictor, ['FLAT'])
+        assert rows[0]['RSI'] is None
+        assert rows[0]['Close'] == 100.0
+        assert json.loads(json.dumps(rows, allow_nan=False)) == rows
+    
+    def test_startup_does_not_load_heavy_dependencies(self, record_property):
+        """Test in a fresh interpreter that signals never import TensorFlow or scikit-learn."""
+        output = subprocess.run([sys.executable, '-c', STARTUP_PROBE], cwd=ROOT, check=True,
+                                capture_output=True, text=True).stdout
+        stats = json.loads(output.strip().splitlines()[-1])
+        record_property('import_time', stats['import_time'])
+        record_property('peak_rss_mb', stats['peak_rss_mb'])
+        
+        assert stats['heavy_modules'] == []
+        assert stats['import_time'] < 10
+        if stats['peak_rss_mb'] is not None:
+            assert stats['peak_rss_mb'] < 400
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])